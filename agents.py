@@ -1,19 +1,25 @@
+import hashlib
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Mapping, Optional, Tuple
 from fpdf import FPDF
 
+from crm_store import get_crm_db
+from policy_engine import decide
+
 DATA_PATH = Path('data/mock_db.json')
 
+SANCTION_LETTER_VERSION = 2
+
 
-def load_db() -> Dict[str, Any]:
-    if not DATA_PATH.exists():
-        return {}
-    with DATA_PATH.open('r', encoding='utf-8') as f:
-        return json.load(f)
+def load_db() -> Mapping[str, Any]:
+    """Phone-indexed CRM records from the configured shared backend (JSON, SQLite or snapshot)."""
+    return get_crm_db(str(DATA_PATH))
 
 
-def verification_agent(phone: str, db: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+def verification_agent(phone: str, db: Mapping[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
     """Look up phone in mock DB."""
     record = db.get(phone)
     if record:
@@ -30,21 +36,9 @@ def fraud_agent(record: Optional[Dict[str, Any]]) -> str:
 
 
 def underwriting_agent(credit_score: Optional[int], income: Optional[float]) -> tuple[str, str]:
-    """Return decision and reason string for XAI panel."""
-    if credit_score is None or income is None:
-        return "Needs docs", "Missing credit score or income"
-
-    if credit_score < 650:
-        return "Reject", "Credit score < 650"
-    if credit_score < 700:
-        return "Conditional @ 15%", "Score between 650-699 triggers conditional review"
-
-    if income < 30000:
-        return "Reject", "Income below 30k"
-    if credit_score >= 750 and income >= 50000:
-        return "Approved @ 10.5%", "High score and income >= 50k"
-
-    return "Approved @ 13.5%", "Standard rate for mid-tier profile"
+    """Return decision and reason string for XAI panel (policy table 'underwriting')."""
+    outcome = decide('underwriting', credit_score=credit_score, income=income)
+    return outcome['status'], outcome['reason']
 
 
 def sales_agent(amount: float, rate: float, tenure_years: int, pre_limit: float, credit_score: Optional[int]) -> str:
@@ -59,9 +53,28 @@ def sales_agent(amount: float, rate: float, tenure_years: int, pre_limit: float,
     )
 
 
-def sanction_agent(applicant_name: str, amount: float, output_dir: Path = Path('outputs')) -> Path:
+def _masked_phone(phone: Optional[str]) -> Optional[str]:
+    return f"XXXXXX{phone[-4:]}" if phone else None
+
+
+def sanction_letter_id(applicant_name: str, amount: float, phone: Optional[str] = None) -> str:
+    """
+    Content address of a sanction letter: a hash of everything printed on it
+    plus the applicant's full phone, so two applicants with the same name
+    and amount never share a letter.
+    """
+    payload = json.dumps({'v': SANCTION_LETTER_VERSION, 'applicant': applicant_name, 'amount': f"{amount:,.0f}",
+                          'phone': phone}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def sanction_agent(applicant_name: str, amount: float, output_dir: Path = Path('outputs'),
+                   phone: Optional[str] = None) -> Path:
+    """Render the sanction letter to outputs/sanction_<content hash>.pdf (reused if already there)."""
     output_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = output_dir / f"sanction_{applicant_name.replace(' ', '_')}.pdf"
+    pdf_path = output_dir / f"sanction_{sanction_letter_id(applicant_name, amount, phone)}.pdf"
+    if pdf_path.exists():
+        return pdf_path
 
     pdf = FPDF()
     pdf.add_page()
@@ -70,10 +83,15 @@ def sanction_agent(applicant_name: str, amount: float, output_dir: Path = Path('
     pdf.ln(10)
     # Use ASCII-friendly text to avoid latin-1 encoding issues in fpdf
     pdf.cell(200, 10, txt=f"Applicant: {applicant_name}", ln=True)
+    if phone:
+        pdf.cell(200, 10, txt=f"Registered Mobile: {_masked_phone(phone)}", ln=True)
     pdf.cell(200, 10, txt=f"Approved Amount: INR {amount:,.0f}", ln=True)
     pdf.cell(200, 10, txt="Status: Conditional Approval", ln=True)
     pdf.ln(10)
     pdf.multi_cell(0, 10, txt="This is a system-generated document for demo purposes.")
 
-    pdf.output(str(pdf_path))
+    # Write-then-rename: concurrent renders of the same letter never expose a partial file
+    tmp_path = pdf_path.with_name(f"{pdf_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    pdf.output(str(tmp_path))
+    os.replace(tmp_path, pdf_path)
     return pdf_path
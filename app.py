@@ -13,6 +13,8 @@ from master_agent import run_unified_agent
 from session_manager import init_session, get_conversation_state, update_conversation_state, add_message, get_messages
 from voice_helper import speak_text, recognize_speech, is_voice_available
 from document_helper import generate_sanction_letter_pdf
+from intent_router import warm_intent_classifier
+from template_router import TEMPLATE_RATE
 from utils import compute_emi
 
 # --- PAGE CONFIGURATION ---
@@ -139,6 +141,8 @@ st.markdown("""
 
 # --- INITIALIZE SESSION STATE ---
 init_session()
+# Train the intent router while the customer reads the greeting
+warm_intent_classifier()
 
 # --- SIDEBAR: BRANDING & CONTROLS ---
 with st.sidebar:
@@ -206,8 +210,9 @@ with st.sidebar:
     can_generate = stage in ('approved', 'completed') and loan_amount is not None
     if can_generate:
         # Prepare PDF and show download option
-        pdf_bytes = generate_sanction_letter_pdf(state, interest_rate=12.0, tenure_months=60)
-        estimated_emi = compute_emi(float(loan_amount), 12.0, 60)
+        tenure_months = state.get('tenure_months') or 60
+        pdf_bytes = generate_sanction_letter_pdf(state, interest_rate=TEMPLATE_RATE, tenure_months=tenure_months)
+        estimated_emi = compute_emi(float(loan_amount), TEMPLATE_RATE, tenure_months)
 
         st.download_button(
             "⬇️ Download Sanction Letter (PDF)",
@@ -216,7 +221,7 @@ with st.sidebar:
             mime="application/pdf",
             use_container_width=True
         )
-        st.caption(f"EMI estimate: Rs. {estimated_emi:,.0f} @ 12% for 60 months")
+        st.caption(f"EMI estimate: Rs. {estimated_emi:,.0f} @ {TEMPLATE_RATE:g}% for {tenure_months} months")
     else:
         st.info("Sanction letter will be available after approval is confirmed.")
 
@@ -356,10 +361,18 @@ with col_chat:
                 update_dict['income'] = result['income']
             if result.get('requested_amount'):
                 update_dict['requested_amount'] = result['requested_amount']
+            if result.get('tenure_months'):
+                update_dict['tenure_months'] = result['tenure_months']
             if result.get('eligibility_path'):
                 update_dict['eligibility_path'] = result['eligibility_path']
+            if result.get('blacklisted'):
+                update_dict['blacklisted'] = result['blacklisted']
             if result.get('verified'):
                 update_dict['verified'] = result['verified']
+            if result.get('turn_count'):
+                update_dict['turn_count'] = result['turn_count']
+            # Reset every turn: an offer can only be picked right after the list
+            update_dict['offers_shown'] = bool(result.get('offers_shown'))
             
             update_conversation_state(update_dict)
         
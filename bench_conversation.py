@@ -0,0 +1,140 @@
+"""
+bench_conversation.py - Repeatable end-to-end latency benchmark for the agent
+Drives scripted conversations through run_unified_agent the way app.py does
+and reports per-turn latency percentiles and how turns were served.
+
+Record once with API keys, then replay anywhere without network:
+    python bench_conversation.py --mode record --cassette eval/llm_cassette.jsonl
+    python bench_conversation.py --mode replay --cassette eval/llm_cassette.jsonl --latency 1
+
+Replay fails loudly on an empty cassette or any request it has no recording
+for (re-record after changing prompts). The committed cassette was recorded
+with --synthetic: scripted replies and latencies instead of real providers,
+so the pipeline can be benchmarked offline; re-record it live for real
+latency numbers.
+"""
+
+import argparse
+import json
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List
+
+import llm_replay
+from conversation_summary import SUMMARY_ROUTER
+from intent_router import wait_for_intent_classifier
+from llm_provider import CHAT_ROUTER, RAG_ROUTER, reset_breakers
+from master_agent import run_unified_agent
+from session_manager import WELCOME_MESSAGE
+
+# Same scripts as test_full_conversation.py / test_unified_flow.py, plus
+# Hindi/Hinglish and conditional-review paths
+CONVERSATIONS = [
+    ["Hi", "I need a business loan for 5 lakhs", "My number is 9998887776", "Yes, proceed"],
+    ["Hello", "I want a personal loan", "9876543210", "10 lakh chahiye", "EMI kitni hogi?"],
+    ["Namaste", "मुझे लोन चाहिए", "मेरा नंबर 9876543210 है", "20 लाख चाहिए", "सैलरी स्लिप कैसे भेजूं?"],
+    ["Hi", "what documents do I need for a loan?", "ok my number is 9998887776",
+     "can I prepay later?", "3 lakh for 3 years", "thanks"],
+]
+
+STATE_KEYS = ('phone', 'customer_name', 'credit_score', 'pre_approved_limit', 'income',
+              'requested_amount', 'tenure_months', 'eligibility_path', 'verified', 'turn_count')
+
+
+def run_conversation(turns: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+    """
+    Play one scripted conversation; returns per-turn timings.
+
+    With strict (replay), raises RuntimeError as soon as a turn makes an LLM
+    request the cassette has no recording for.
+    """
+    state: Dict[str, Any] = {}
+    # Same history app.py keeps: greeting first, user message appended before the agent runs
+    messages: List[Dict[str, str]] = [{'role': 'assistant', 'content': WELCOME_MESSAGE}]
+    timings = []
+    for user_input in turns:
+        misses = llm_replay.cassette().misses if strict else 0
+        messages.append({'role': 'user', 'content': user_input})
+        start = time.perf_counter()
+        result = run_unified_agent(user_input, state, messages)
+        timings.append({'ms': (time.perf_counter() - start) * 1000,
+                        'served_by': result.get('served_by', 'error'),
+                        'message': result['message']})
+
+        messages.append({'role': 'assistant', 'content': result['message']})
+        state['conversation_stage'] = result.get('conversation_stage')
+        state.update({k: result[k] for k in STATE_KEYS if result.get(k)})
+        state['offers_shown'] = bool(result.get('offers_shown'))
+
+        # Background summary updates feed the next prompt; wait so runs are repeatable
+        summary = state.get('conversation_summary')
+        if summary is not None:
+            summary.wait(timeout=30)
+        if strict and llm_replay.cassette().misses > misses:
+            raise RuntimeError(f"No recording for an LLM request at turn {user_input!r}; "
+                               f"re-record the cassette")
+    return timings
+
+
+def _synthetic_complete(prompt: str, max_tokens: int, timeout: float, json_mode: bool = False) -> str:
+    """Scripted stand-in for a provider: reply and latency derived from the prompt."""
+    ref = zlib.crc32(prompt.encode('utf-8'))
+    time.sleep(min(timeout, 0.2 + (ref % 500) / 1000.0))
+    text = f"[synthetic reply {ref % 10000:04d}] Happy to help with your personal loan."
+    return json.dumps({'reply': text}) if json_mode else text
+
+
+def use_synthetic_providers():
+    """Point every router's providers at _synthetic_complete (record without API keys)."""
+    for router in (CHAT_ROUTER, RAG_ROUTER, SUMMARY_ROUTER):
+        for provider in router.providers:
+            provider.is_available = lambda: True
+            provider._complete = _synthetic_complete
+            provider.limiter = None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def main(mode: str, cassette_path: str, latency: float, repeat: int, synthetic: bool = False):
+    llm_replay.configure(mode, cassette_path, latency_scale=latency)
+    if mode == 'replay' and not len(llm_replay.cassette()):
+        raise SystemExit(f"Cassette {cassette_path} is empty or missing; record it first with --mode record")
+    if synthetic:
+        use_synthetic_providers()
+    # Intent turns should not fall to the LLM just because the classifier is still training
+    wait_for_intent_classifier()
+    timings = []
+    for _ in range(repeat):
+        if mode == 'replay':
+            llm_replay.cassette().rewind()
+        for turns in CONVERSATIONS:
+            reset_breakers()
+            timings.extend(run_conversation(turns, strict=(mode == 'replay')))
+
+    latencies = [t['ms'] for t in timings]
+    served = Counter(t['served_by'] for t in timings)
+    print(f"Mode: {mode} (cassette {cassette_path}, latency x{latency})")
+    print(f"Turns: {len(timings)}  p50 {percentile(latencies, 50):.1f}ms  "
+          f"p95 {percentile(latencies, 95):.1f}ms  max {max(latencies):.1f}ms")
+    print(f"Served by: {dict(served)}")
+    if mode != 'live':
+        cassette = llm_replay.cassette()
+        print(f"Cassette: {len(cassette)} recordings, {cassette.hits} replayed, {cassette.misses} missing")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=llm_replay.MODES, default='replay')
+    parser.add_argument('--cassette', default=llm_replay.DEFAULT_CASSETTE)
+    parser.add_argument('--latency', type=float, default=1.0, help='scale for recorded latencies in replay')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--synthetic', action='store_true',
+                        help='record scripted replies instead of calling providers (no API keys)')
+    args = parser.parse_args()
+    if args.synthetic and args.mode != 'record':
+        parser.error('--synthetic only applies to --mode record')
+    main(args.mode, args.cassette, args.latency, args.repeat, synthetic=args.synthetic)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+bench_crm.py - Benchmark the large-CRM backends at scale
+
+Generates a synthetic CRM export (JSONL or CSV), bulk imports it into
+SQLite and reports import throughput, lookup latency percentiles (single
+thread and across threads), the database size, and how the phone Bloom
+filter handles unknown numbers. The same records are
+then written as a columnar snapshot (crm_snapshot.py) and compared with
+an in-memory dict of dicts for size per record and lookup latency.
+
+Usage:
+    python bench_crm.py [--records 1000000] [--format jsonl|csv] [--lookups 100000] [--threads 4]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from crm_snapshot import CRMSnapshot, build_snapshot
+from crm_store import IMPORT_BATCH_SIZE, SQLiteCRM, bulk_import
+
+FIRST_NAMES = ('Amit', 'Neha', 'Ravi', 'Priya', 'Arjun', 'Sneha', 'Vikram', 'Anjali')
+LAST_NAMES = ('Kumar', 'Singh', 'Sharma', 'Patel', 'Gupta', 'Reddy', 'Iyer', 'Das')
+
+
+def synthetic_record(i: int, rng: random.Random):
+    income = rng.randrange(15000, 250000, 1000)
+    return {
+        'phone': str(6000000000 + i),
+        'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'credit_score': rng.randint(550, 850),
+        'income': income,
+        'blacklisted': rng.random() < 0.02,
+        'approved_amount': income * rng.randint(5, 20)
+    }
+
+
+def write_export(path: str, records: int, fmt: str, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=['phone', 'name', 'credit_score', 'income',
+                                                   'blacklisted', 'approved_amount'])
+            writer.writeheader()
+            for i in range(records):
+                writer.writerow(synthetic_record(i, rng))
+        else:
+            for i in range(records):
+                f.write(json.dumps(synthetic_record(i, rng)) + '\n')
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def lookup_latencies(crm: SQLiteCRM, phones):
+    latencies = []
+    for phone in phones:
+        start = time.perf_counter()
+        crm.get(phone)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def dict_bytes(records) -> int:
+    """Rough heap size of a dict of dicts (containers, keys and values)."""
+    total = sys.getsizeof(records)
+    for phone, record in records.items():
+        total += sys.getsizeof(phone) + sys.getsizeof(record)
+        total += sum(sys.getsizeof(v) for v in record.values())
+    return total
+
+
+def threaded_rate(crm: SQLiteCRM, phones, threads: int) -> float:
+    chunks = [phones[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        for phone in chunk:
+            crm.get(phone)
+        crm.close()
+
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return len(phones) / (time.perf_counter() - start)
+
+
+def main(records: int, fmt: str, lookups: int, threads: int, batch_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, f'crm.{fmt}')
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+
+        start = time.perf_counter()
+        write_export(source, records, fmt)
+        print(f"Export: {records:,} records ({fmt}, {os.path.getsize(source) / 1e6:.0f} MB) "
+              f"written in {time.perf_counter() - start:.1f}s")
+
+        stats = bulk_import(source, db_path, batch_size)
+        print(f"Import: {stats['records']:,} records in {stats['elapsed_s']:.1f}s "
+              f"({stats['records_per_s']:,.0f} records/s, batch {batch_size:,}), "
+              f"db {os.path.getsize(db_path) / 1e6:.0f} MB")
+
+        crm = SQLiteCRM(db_path)
+        rng = random.Random(11)
+        # 90% hits, 10% unknown numbers
+        phones = [str(6000000000 + rng.randrange(records)) if rng.random() < 0.9
+                  else str(9000000000 + rng.randrange(records)) for _ in range(lookups)]
+
+        latencies = lookup_latencies(crm, phones)
+        print(f"Lookup (1 thread): {lookups:,} lookups  p50 {percentile(latencies, 50):.1f}µs  "
+              f"p99 {percentile(latencies, 99):.1f}µs  max {max(latencies):.1f}µs")
+        print(f"Lookup ({threads} threads): {threaded_rate(crm, phones, threads):,.0f} lookups/s")
+
+        unknown = [p for p in phones if p.startswith('9')]
+        latencies = lookup_latencies(crm, unknown)
+        bloom = crm.phone_filter.stats()
+        print(f"Unknown numbers: p50 {percentile(latencies, 50):.1f}µs  "
+              f"filter fp rate measured {bloom['measured_fp_rate']:.3%} "
+              f"(expected {bloom['expected_fp_rate']:.3%}, {bloom['bits'] / 8e6:.1f} MB)")
+
+        snapshot_dir = os.path.join(tmp, 'crm_snapshot')
+        built = build_snapshot(crm.items(), snapshot_dir)
+        crm.close()
+        snapshot = CRMSnapshot(snapshot_dir)
+        latencies = lookup_latencies(snapshot, phones)
+        print(f"Snapshot: built in {built['elapsed_s']:.1f}s, {built['bytes'] / records:.0f} bytes/record  "
+              f"p50 {percentile(latencies, 50):.1f}µs  p99 {percentile(latencies, 99):.1f}µs")
+
+        sample = min(records, 100000)
+        as_dict = dict(s for _, s in zip(range(sample), snapshot.items()))
+        latencies = lookup_latencies(as_dict, phones)
+        print(f"Dict of dicts: ~{dict_bytes(as_dict) / sample:.0f} bytes/record  "
+              f"p50 {percentile(latencies, 50):.2f}µs")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1000000)
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    main(args.records, args.format, args.lookups, args.threads, args.batch_size)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_extraction.py - Benchmark slot extraction over eval/utterances.jsonl
+
+Compares the compiled multilingual extractor with the legacy ad-hoc regexes
+that used to live in master_agent._extract_information (accuracy and
+throughput). Accuracy is also reported on eval/utterances_heldout.jsonl,
+cases written after the extractor was tuned (compound amounts, amounts
+below the loan minimum, tenures that are not offered).
+
+Usage:
+    python bench_extraction.py [--corpus eval/utterances.jsonl]
+                               [--heldout eval/utterances_heldout.jsonl] [--repeat 200]
+"""
+
+import argparse
+import json
+import re
+import time
+
+from extraction import extract_all, extract_batch
+
+SLOTS = ('phone', 'requested_amount', 'tenure_months', 'income')
+
+HELDOUT_CORPUS = "eval/utterances_heldout.jsonl"
+
+
+def load_corpus(path: str = "eval/utterances.jsonl"):
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows
+
+
+def legacy_extract(user_input: str):
+    """The pre-compiled-module extractor: ASCII digits plus lakh/lac/crore only."""
+    out = {'phone': None, 'requested_amount': None, 'tenure_months': None, 'income': None}
+    phone_matches = re.findall(r'\b\d{10}\b', user_input)
+    if phone_matches:
+        out['phone'] = phone_matches[0]
+    user_lower = user_input.lower()
+    lakh_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:lakh|lac)', user_lower)
+    if lakh_match:
+        out['requested_amount'] = int(float(lakh_match.group(1)) * 100000)
+    crore_match = re.search(r'(\d+(?:\.\d+)?)\s*crore', user_lower)
+    if crore_match and out['requested_amount'] is None:
+        out['requested_amount'] = int(float(crore_match.group(1)) * 10000000)
+    if out['requested_amount'] is None:
+        for num_str in re.findall(r'\b(\d{6,7})\b', user_input):
+            if 100000 <= int(num_str) <= 100000000:
+                out['requested_amount'] = int(num_str)
+                break
+    return out
+
+
+def accuracy(extract, corpus):
+    checked = correct = 0
+    for row in corpus:
+        result = extract(row['text'])
+        for slot in SLOTS:
+            if slot in row:
+                checked += 1
+                correct += result[slot] == row[slot]
+    return correct / checked if checked else 0.0
+
+
+def throughput(extract, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            extract(text)
+    elapsed = time.perf_counter() - start
+    return repeat * len(texts) / elapsed
+
+
+def main(corpus_path: str, heldout_path: str, repeat: int):
+    corpus = load_corpus(corpus_path)
+    heldout = load_corpus(heldout_path)
+    texts = [row['text'] for row in corpus]
+
+    print(f"Corpus: {len(corpus)} utterances from {corpus_path}, {len(heldout)} held out in {heldout_path}")
+    print(f"{'extractor':<12} {'accuracy':>9} {'held-out':>9} {'utt/sec':>12}")
+    for name, extract in (('legacy', legacy_extract), ('compiled', extract_all)):
+        print(f"{name:<12} {accuracy(extract, corpus):>9.1%} {accuracy(extract, heldout):>9.1%} "
+              f"{throughput(extract, texts, repeat):>12,.0f}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract_batch(texts)
+    rate = repeat * len(texts) / (time.perf_counter() - start)
+    print(f"{'batch':<12} {'':>9} {'':>9} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default='eval/utterances.jsonl')
+    parser.add_argument('--heldout', default=HELDOUT_CORPUS)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    main(args.corpus, args.heldout, args.repeat)
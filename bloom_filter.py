@@ -0,0 +1,180 @@
+"""
+bloom_filter.py - Persisted Bloom filter for "definitely not a customer" answers
+Most numbers typed into the chat that miss the CRM are typos or new
+prospects. A Bloom filter over the CRM phones answers those without
+touching the backend: a miss is certain, a hit may be a false positive and
+falls through to the real lookup.
+
+The filter counts its own traffic, so the false-positive rate seen in
+production (hits that the backend then missed) is reported next to the
+rate expected from its fill.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+DEFAULT_FP_RATE = 0.01
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(x: int) -> int:
+    """splitmix64 finaliser: a well-spread 64-bit hash of an integer."""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _hash_pair(key: str):
+    # Phone numbers are hashed as integers, much cheaper than a digest; the
+    # two halves of one 64-bit hash drive the double hashing
+    if key.isdigit() and len(key) <= 18:
+        h = _mix64(int(key))
+        return h & 0xFFFFFFFF, (h >> 32) | 1
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    """Bit array with k double-hashed probes, sized for `capacity` keys at `fp_rate`."""
+
+    def __init__(self, capacity: int, fp_rate: float = DEFAULT_FP_RATE):
+        self.capacity = max(1, int(capacity))
+        self.fp_rate = fp_rate
+        self.num_bits = max(64, int(math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._set_bits(bytearray((self.num_bits + 7) // 8))
+        self.count = 0
+        self.meta: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.probes = 0
+        self.negatives = 0
+        self.false_positives = 0
+
+    def _set_bits(self, raw: bytearray):
+        # One buffer, two views: bytearray for single-key probes (no numpy
+        # scalar overhead), ndarray for vectorised bulk inserts
+        self._raw = raw
+        self.bits = np.frombuffer(raw, dtype=np.uint8)
+
+    def _positions(self, key: str):
+        h1, h2 = _hash_pair(key)
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key: str):
+        raw = self._raw
+        for pos in self._positions(key):
+            raw[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def add_many(self, keys: Iterable[str]):
+        positions = [pos for key in keys for pos in self._positions(key)]
+        if not positions:
+            return
+        pos = np.array(positions, dtype=np.uint64)
+        np.bitwise_or.at(self.bits, (pos >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+        self.count += len(positions) // self.num_hashes
+
+    def __contains__(self, key: str) -> bool:
+        raw = self._raw
+        m = self.num_bits
+        h1, h2 = _hash_pair(key)
+        for _ in range(self.num_hashes):
+            pos = h1 % m
+            if not raw[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h1 += h2
+        return True
+
+    def check(self, key: str) -> bool:
+        """Membership test that also counts the probe; False means definitely absent."""
+        present = key in self
+        with self._lock:
+            self.probes += 1
+            if not present:
+                self.negatives += 1
+        return present
+
+    def record_false_positive(self):
+        """The backend missed a key this filter passed."""
+        with self._lock:
+            self.false_positives += 1
+
+    @property
+    def over_capacity(self) -> bool:
+        return self.count > self.capacity
+
+    def fill_ratio(self) -> float:
+        return float(np.unpackbits(self.bits).sum()) / (len(self.bits) * 8)
+
+    def expected_fp_rate(self) -> float:
+        """False-positive rate implied by the current fill."""
+        return self.fill_ratio() ** self.num_hashes
+
+    def stats(self) -> Dict[str, Any]:
+        """Sizing plus the measured rate: false positives / all absent keys probed."""
+        with self._lock:
+            absent = self.negatives + self.false_positives
+            measured = self.false_positives / absent if absent else 0.0
+            return {
+                'keys': self.count,
+                'capacity': self.capacity,
+                'bits': self.num_bits,
+                'hashes': self.num_hashes,
+                'expected_fp_rate': self.expected_fp_rate(),
+                'probes': self.probes,
+                'negatives': self.negatives,
+                'false_positives': self.false_positives,
+                'measured_fp_rate': measured
+            }
+
+    def save(self, path: str):
+        """Write atomically (tmp file + rename); concurrent writers use separate tmp files."""
+        header = dict(self.meta, capacity=self.capacity, fp_rate=self.fp_rate, count=self.count)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, bits=self.bits, header=np.array(json.dumps(header)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        with np.load(path) as data:
+            header = json.loads(str(data['header']))
+            bloom = cls(header.pop('capacity'), header.pop('fp_rate'))
+            bloom.count = header.pop('count')
+            bloom.meta = header
+            bloom._set_bits(bytearray(data['bits'].tobytes()))
+        return bloom
+
+    @classmethod
+    def build(cls, keys: Iterable[str], capacity: int, fp_rate: float = DEFAULT_FP_RATE,
+              chunk_size: int = 100000) -> 'BloomFilter':
+        bloom = cls(capacity, fp_rate)
+        chunk = []
+        for key in keys:
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                bloom.add_many(chunk)
+                chunk = []
+        bloom.add_many(chunk)
+        return bloom
+
+
+def load_or_none(path: str):
+    """The persisted filter at path, or None when there is none yet."""
+    if not Path(path).exists():
+        return None
+    try:
+        return BloomFilter.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable phone filter {path}: {e}")
+        return None
@@ -0,0 +1,191 @@
+"""
+conversation_summary.py - Rolling per-session conversation summary
+Older turns are folded into a bounded summary in a background thread; the
+prompt carries that summary plus the recent raw messages, so its size stays
+flat however long the conversation runs.
+
+Folding is batched: it runs once FOLD_EVERY_MESSAGES messages (or
+FOLD_TOKEN_BUDGET tokens) have left the raw window, not on every turn.
+The default fold summarises with SUMMARY_ROUTER, whose providers have
+breakers of their own so a failing summary call never opens the circuit for
+customer turns. The extractive fold (no LLM call, oldest text dropped first)
+is only the fallback when no provider answers, or SUMMARY_FOLD=extractive.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from llm_provider import CircuitBreaker, GeminiProvider, GroqProvider, ProviderRouter
+from logger import PerformanceMonitor
+from rate_limiter import PRIORITY_BATCH
+from utils import estimate_tokens
+
+# Raw messages kept verbatim at the end of the history block
+RAW_MESSAGES = int(os.getenv('SUMMARY_RAW_MESSAGES', '4'))
+RAW_MESSAGE_MAX_CHARS = 300
+
+# Upper bound on the folded summary
+SUMMARY_MAX_CHARS = int(os.getenv('SUMMARY_MAX_CHARS', '600'))
+
+# Fold once this many messages (or tokens) are waiting beyond the raw window
+FOLD_EVERY_MESSAGES = int(os.getenv('SUMMARY_FOLD_EVERY', '6'))
+FOLD_TOKEN_BUDGET = int(os.getenv('SUMMARY_FOLD_TOKENS', '400'))
+
+# 'llm' (default) or 'extractive'
+SUMMARY_FOLD = os.getenv('SUMMARY_FOLD', 'llm')
+
+SUMMARY_PROMPT = """You maintain a running summary of a personal loan conversation between a customer and BankGPT.
+Update the summary with the new messages. Keep every fact the customer stated (loan purpose,
+amounts, tenure, income, employer, documents, objections) and every offer or decision BankGPT made.
+Write plain sentences, at most {max_chars} characters, no preamble.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:"""
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='summary')
+
+
+def _summary_router() -> ProviderRouter:
+    """
+    Chat providers behind their own breakers, so background failures stay out
+    of the chat's circuit; Groq calls wait in the batch lane of its quota.
+    """
+    providers = [GroqProvider(priority=PRIORITY_BATCH), GeminiProvider('gemini-2.5-flash')]
+    for provider in providers:
+        provider.breaker = CircuitBreaker()
+    return ProviderRouter(providers, max_retries=0)
+
+
+SUMMARY_ROUTER = _summary_router()
+
+
+def _format_messages(messages: List[Dict[str, str]], max_chars: int = RAW_MESSAGE_MAX_CHARS) -> str:
+    lines = []
+    for msg in messages:
+        role = "Customer" if msg['role'] == 'user' else "BankGPT"
+        content = ' '.join(msg['content'].split())
+        if len(content) > max_chars:
+            content = content[:max_chars - 3] + '...'
+        lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+def _clip(text: str, max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Keep the most recent max_chars of a summary, cut at a sentence or word boundary."""
+    text = ' '.join(text.split())
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    for sep in ('. ', ' '):
+        cut = tail.find(sep)
+        if 0 <= cut < max_chars // 2:
+            return tail[cut + len(sep):]
+    return tail
+
+
+def extractive_fold(summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold messages into the summary without an LLM (compact transcript, oldest dropped first)."""
+    new_text = ' '.join(_format_messages(messages, max_chars=120).splitlines())
+    return _clip(f"{summary} {new_text}".strip())
+
+
+def llm_fold(summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold messages into the summary with SUMMARY_ROUTER; extractive if no provider answers."""
+    prompt = SUMMARY_PROMPT.format(
+        max_chars=SUMMARY_MAX_CHARS,
+        summary=summary or "(empty)",
+        messages=_format_messages(messages)
+    )
+    result = SUMMARY_ROUTER.generate(prompt, max_tokens=200)
+    if not result or not result.strip():
+        return extractive_fold(summary, messages)
+    return _clip(result.strip())
+
+
+class ConversationSummary:
+    """
+    Rolling summary stored in the session state.
+
+    `text` covers history[:upto]; messages after that are sent verbatim
+    (at most raw_messages + fold_every of them). Updates run in the
+    background and are picked up by the next turn.
+    """
+
+    def __init__(self, fold_fn: Optional[Callable[[str, List[Dict[str, str]]], str]] = None,
+                 raw_messages: int = RAW_MESSAGES, fold_every: int = FOLD_EVERY_MESSAGES,
+                 fold_token_budget: int = FOLD_TOKEN_BUDGET):
+        self.text = ''
+        self.upto = 0
+        self.raw_messages = raw_messages
+        self.fold_every = fold_every
+        self.fold_token_budget = fold_token_budget
+        self._fold = fold_fn or (extractive_fold if SUMMARY_FOLD == 'extractive' else llm_fold)
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+
+    def context(self, conversation_history: list) -> str:
+        """Summary plus the last raw messages, for the prompt's history block."""
+        if not conversation_history:
+            return "No previous conversation yet."
+
+        with self._lock:
+            summary, upto = self.text, self.upto
+        # Unfolded messages stay verbatim until the next fold catches up
+        start = max(upto, len(conversation_history) - self.raw_messages - self.fold_every)
+
+        parts = []
+        if summary:
+            parts.append(f"Summary of earlier conversation: {summary}")
+        recent = conversation_history[start:]
+        if recent:
+            parts.append(_format_messages(recent))
+        return "\n".join(parts)
+
+    def schedule_update(self, conversation_history: list) -> Optional[Future]:
+        """
+        Fold messages that have left the raw window once there are enough of
+        them (fold_every messages or fold_token_budget tokens); no-op while an
+        update is running.
+        """
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return None
+            end = len(conversation_history) - self.raw_messages
+            if end <= self.upto:
+                return None
+            pending = [dict(m) for m in conversation_history[self.upto:end]]
+            if (len(pending) < self.fold_every
+                    and estimate_tokens(_format_messages(pending)) < self.fold_token_budget):
+                return None
+            summary = self.text
+            self._future = _EXECUTOR.submit(self._update, summary, pending, end)
+            return self._future
+
+    def _update(self, summary: str, messages: List[Dict[str, str]], end: int):
+        start = time.perf_counter()
+        try:
+            folded = self._fold(summary, messages)
+        except Exception as e:
+            print(f"Summary update failed: {e}")
+            folded = extractive_fold(summary, messages)
+        with self._lock:
+            self.text = _clip(folded)
+            self.upto = end
+        PerformanceMonitor.record('summary_update', (time.perf_counter() - start) * 1000, {
+            'messages_folded': len(messages),
+            'summary_chars': len(self.text)
+        })
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the pending update (if any) has finished."""
+        future = self._future
+        if future is not None:
+            future.result(timeout=timeout)
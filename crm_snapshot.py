@@ -0,0 +1,235 @@
+"""
+crm_snapshot.py - Read-only columnar CRM snapshot for very large CRMs
+A dict of dicts costs hundreds of bytes per customer; this format stores
+one fixed-width column per field instead:
+
+    phones.npy          int64, sorted (lookups are a searchsorted probe)
+    credit_score.npy    int32   (-1 = missing)
+    income.npy          int64   (-1 = missing)
+    approved_amount.npy int64   (-1 = missing)
+    blacklist.npy       uint8 bitset (np.packbits)
+    name_offsets.npy    int64, n + 1 offsets into name_blob.npy
+    name_blob.npy       uint8, UTF-8 names back to back
+    phones.bloom.npz    Bloom filter over the phones (bloom_filter.py)
+    meta.json           record count and build time
+
+Columns are opened with mmap_mode='r', so every Streamlit worker on the
+host shares the same page-cache copy and opening costs nothing up front.
+Only the fields verification_agent reads are kept; phones must be numeric.
+
+The snapshot path is a symlink to a generation directory next to it
+(<name>.gen-*). A rebuild writes a new generation and atomically replaces
+the symlink, so the path always names one complete snapshot.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from bloom_filter import BloomFilter, load_or_none
+
+CRM_SNAPSHOT_PATH = os.getenv('CRM_SNAPSHOT_PATH', 'data/crm_snapshot')
+
+MISSING = -1
+
+_INT_COLUMNS = (('credit_score', np.int32), ('income', np.int64), ('approved_amount', np.int64))
+
+
+def _int_or_missing(value) -> int:
+    if value is None or value == '':
+        return MISSING
+    return int(float(value))
+
+
+def _is_blacklisted(value) -> bool:
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def build_snapshot(items: Iterable[Tuple[str, Dict[str, Any]]], out_dir: str = CRM_SNAPSHOT_PATH) -> Dict[str, Any]:
+    """
+    Write a snapshot from (phone, record) pairs (a CRM dict's .items(), SQLiteCRM.items(), ...).
+
+    The new snapshot is built in a generation directory next to out_dir and
+    published by atomically replacing the out_dir symlink. Processes that
+    already mapped the old files keep reading them; the previous generation
+    is kept for readers still opening it, older ones are removed.
+    """
+    start = time.perf_counter()
+    phones = []
+    columns = {name: [] for name, _ in _INT_COLUMNS}
+    blacklisted = []
+    names = []
+    skipped = 0
+    for phone, record in items:
+        phone = str(phone)
+        if not phone.isdigit():
+            skipped += 1
+            continue
+        phones.append(int(phone))
+        for name, _ in _INT_COLUMNS:
+            columns[name].append(_int_or_missing(record.get(name)))
+        blacklisted.append(_is_blacklisted(record.get('blacklisted', False)))
+        names.append((record.get('name') or '').encode('utf-8'))
+    if skipped:
+        print(f"CRM snapshot: skipped {skipped} non-numeric phone numbers")
+
+    phone_arr = np.array(phones, dtype=np.int64)
+    order = np.argsort(phone_arr, kind='stable')
+    phone_arr = phone_arr[order]
+
+    out = Path(out_dir)
+    tmp = out.with_name(f"{out.name}.gen-{time.time_ns()}-{os.getpid()}")
+    tmp.mkdir(parents=True)
+
+    np.save(tmp / 'phones.npy', phone_arr)
+    for name, dtype in _INT_COLUMNS:
+        np.save(tmp / f'{name}.npy', np.array(columns[name], dtype=dtype)[order])
+    np.save(tmp / 'blacklist.npy', np.packbits(np.array(blacklisted, dtype=bool)[order]))
+
+    sorted_names = [names[i] for i in order]
+    lengths = np.fromiter((len(n) for n in sorted_names), dtype=np.int64, count=len(sorted_names))
+    offsets = np.zeros(len(sorted_names) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    np.save(tmp / 'name_offsets.npy', offsets)
+    np.save(tmp / 'name_blob.npy', np.frombuffer(b''.join(sorted_names), dtype=np.uint8))
+
+    BloomFilter.build((str(p) for p in phone_arr.tolist()), len(phone_arr)).save(str(tmp / 'phones.bloom.npz'))
+
+    meta = {'records': int(len(phone_arr)), 'built_at': time.time()}
+    with open(tmp / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    previous = os.path.basename(os.readlink(out)) if out.is_symlink() else None
+    if out.exists() and not out.is_symlink():
+        # Plain directory from before generations: moved aside once
+        old = out.with_name(out.name + '.old')
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(out, old)
+    link = out.with_name(f"{out.name}.{os.getpid()}.link")
+    if link.is_symlink():
+        link.unlink()
+    os.symlink(tmp.name, link)
+    os.replace(link, out)
+
+    for stale in out.parent.glob(f"{out.name}.gen-*"):
+        if stale.name not in (tmp.name, previous):
+            shutil.rmtree(stale, ignore_errors=True)
+    shutil.rmtree(out.with_name(out.name + '.old'), ignore_errors=True)
+
+    size = sum(p.stat().st_size for p in tmp.iterdir())
+    return {'records': meta['records'], 'skipped': skipped, 'bytes': size,
+            'elapsed_s': time.perf_counter() - start}
+
+
+class CRMSnapshot:
+    """Memory-mapped snapshot with the `db.get(phone)` contract of the other CRM backends."""
+
+    def __init__(self, path: str = CRM_SNAPSHOT_PATH):
+        # Resolve the symlink once so every column comes from the same generation
+        self.path = Path(os.path.realpath(path))
+        with open(self.path / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.phones = self._load('phones')
+        self.columns = {name: self._load(name) for name, _ in _INT_COLUMNS}
+        self.blacklist = self._load('blacklist')
+        self.name_offsets = self._load('name_offsets')
+        self.name_blob = self._load('name_blob')
+        self.phone_filter = load_or_none(str(self.path / 'phones.bloom.npz'))
+
+    def _load(self, name: str) -> np.ndarray:
+        # Plain ndarray view over the mapping: same shared pages, without the
+        # per-access overhead of the np.memmap subclass
+        return np.load(self.path / f'{name}.npy', mmap_mode='r').view(np.ndarray)
+
+    def __len__(self) -> int:
+        return len(self.phones)
+
+    def index_of(self, phones: np.ndarray) -> np.ndarray:
+        """Row index for each int64 phone, -1 where the phone is not a customer."""
+        phones = np.asarray(phones, dtype=np.int64)
+        idx = np.searchsorted(self.phones, phones)
+        idx = np.minimum(idx, len(self.phones) - 1) if len(self.phones) else np.zeros_like(idx)
+        found = self.phones[idx] == phones if len(self.phones) else np.zeros(phones.shape, dtype=bool)
+        return np.where(found, idx, -1)
+
+    def is_blacklisted(self, idx) -> np.ndarray:
+        """Blacklist bits for row indices."""
+        idx = np.asarray(idx, dtype=np.int64)
+        return ((self.blacklist[idx >> 3] >> (7 - (idx & 7))) & 1).astype(bool)
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        start, end = int(self.name_offsets[i]), int(self.name_offsets[i + 1])
+        record = {'name': self.name_blob[start:end].tobytes().decode('utf-8')}
+        for name, _ in _INT_COLUMNS:
+            value = int(self.columns[name][i])
+            record[name] = None if value == MISSING else value
+        record['blacklisted'] = bool((int(self.blacklist[i >> 3]) >> (7 - (i & 7))) & 1)
+        return record
+
+    def get(self, phone: str) -> Optional[Dict[str, Any]]:
+        """Record for a phone number, or None."""
+        if not isinstance(phone, str) or not phone.isdigit() or len(phone) > 18:
+            return None
+        bloom = self.phone_filter
+        if bloom is not None and not bloom.check(phone):
+            return None
+        key = int(phone)
+        i = int(self.phones.searchsorted(key))
+        if i < len(self.phones) and int(self.phones[i]) == key:
+            return self._record(i)
+        if bloom is not None:
+            bloom.record_false_positive()
+        return None
+
+    def __contains__(self, phone: str) -> bool:
+        return self.get(phone) is not None
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every (phone, record) pair in phone order."""
+        for i in range(len(self.phones)):
+            yield str(int(self.phones[i])), self._record(i)
+
+
+_SNAPSHOTS: Dict[str, Tuple[Tuple[int, int], CRMSnapshot]] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_crm_snapshot(path: Optional[str] = None) -> CRMSnapshot:
+    """
+    Process-wide snapshot for a directory, reopened when it is rebuilt.
+
+    If the new snapshot cannot be opened (e.g. a generation removed by a
+    second rebuild while this one was opening it) the cached one keeps serving.
+    """
+    key = str(path or CRM_SNAPSHOT_PATH)
+    with _SNAPSHOTS_LOCK:
+        cached = _SNAPSHOTS.get(key)
+        try:
+            stat = os.stat(Path(key) / 'meta.json')
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, CRMSnapshot(key))
+                _SNAPSHOTS[key] = cached
+        except OSError as e:
+            if cached is None:
+                raise
+            print(f"CRM snapshot reopen failed, keeping previous snapshot: {e}")
+        return cached[1]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from crm_store import iter_source
+
+    parser = argparse.ArgumentParser(description='Build a columnar CRM snapshot')
+    parser.add_argument('source', help='JSON (keyed by phone), JSONL or CSV export')
+    parser.add_argument('--out', default=CRM_SNAPSHOT_PATH)
+    args = parser.parse_args()
+    print(build_snapshot(iter_source(args.source), args.out))
@@ -0,0 +1,425 @@
+"""
+crm_store.py - CRM backends shared by every lookup
+Three backends behind the `db.get(phone)` contract used by verification_agent:
+
+- CRMStore (CRM_BACKEND=json, default): loads data/mock_db.json once,
+  indexed by phone. The file is re-checked at most every CRM_RELOAD_CHECK_S
+  seconds; when its mtime/size change and the content hash differs, a new
+  index is swapped in with one reference assignment. A file that fails to
+  parse keeps the previous index.
+- SQLiteCRM (CRM_BACKEND=sqlite): a phone-keyed SQLite table in WAL mode with
+  one connection per thread, for CRMs far too large to hold as a JSON dict.
+  bulk_import() streams JSON / JSONL / CSV into it in large transactions.
+  A persisted Bloom filter over the phones (<db>.bloom.npz) answers unknown
+  numbers without a query and is extended as records are added.
+- CRMSnapshot (CRM_BACKEND=snapshot): read-only memory-mapped columns, see
+  crm_snapshot.py.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from bloom_filter import BloomFilter, load_or_none
+from crm_snapshot import get_crm_snapshot
+
+CRM_PATH = os.getenv('CRM_PATH', 'data/mock_db.json')
+RELOAD_CHECK_S = float(os.getenv('CRM_RELOAD_CHECK_S', '0.5'))
+
+CRM_BACKEND = os.getenv('CRM_BACKEND', 'json')
+CRM_SQLITE_PATH = os.getenv('CRM_SQLITE_PATH', 'data/crm.sqlite3')
+
+IMPORT_BATCH_SIZE = 50000
+
+# Phone filter is sized for twice the current records so it can grow in place
+FILTER_MIN_CAPACITY = 10000
+FILTER_HEADROOM = 2
+
+_EMPTY: Mapping[str, Dict[str, Any]] = MappingProxyType({})
+
+
+class CRMStore:
+    """Phone-indexed CRM records with change-detected reload."""
+
+    def __init__(self, path: str = CRM_PATH, check_interval_s: float = RELOAD_CHECK_S):
+        self.path = Path(path)
+        self.check_interval_s = check_interval_s
+        self._records: Mapping[str, Dict[str, Any]] = _EMPTY
+        self._stamp = None
+        self._hash: Optional[str] = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_errors = 0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_s:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval_s:
+                return
+            self._checked_at = now
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._records, self._stamp, self._hash = _EMPTY, None, None
+                return
+
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._stamp:
+                return
+
+            raw = self.path.read_bytes()
+            digest = hashlib.sha1(raw).hexdigest()
+            if digest != self._hash:
+                try:
+                    data = json.loads(raw.decode('utf-8'))
+                except ValueError as e:
+                    # Mid-write or corrupt: keep serving the last good index
+                    self.load_errors += 1
+                    print(f"CRM reload failed, keeping previous data: {e}")
+                    return
+                self._records = MappingProxyType({str(phone): record for phone, record in data.items()})
+                self._hash = digest
+                self.loads += 1
+            self._stamp = stamp
+
+    def get(self, phone: str) -> Optional[Dict[str, Any]]:
+        """Record for a phone number, or None."""
+        self._refresh()
+        return self._records.get(phone)
+
+    def snapshot(self) -> Mapping[str, Dict[str, Any]]:
+        """Read-only view of every record (consistent for as long as it is held)."""
+        self._refresh()
+        return self._records
+
+    def __len__(self) -> int:
+        return len(self.snapshot())
+
+    def stats(self) -> Dict[str, Any]:
+        return {'records': len(self._records), 'loads': self.loads,
+                'load_errors': self.load_errors, 'content_hash': self._hash}
+
+
+_STORES: Dict[str, CRMStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_crm_store(path: Optional[str] = None) -> CRMStore:
+    """Process-wide store for a CRM file (data/mock_db.json by default)."""
+    key = str(path or CRM_PATH)
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = CRMStore(key)
+        return _STORES[key]
+
+
+# Columns stored natively; any other record fields go to the JSON `extra` column
+CRM_COLUMNS = ('name', 'credit_score', 'income', 'approved_amount', 'blacklisted')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    phone TEXT PRIMARY KEY,
+    name TEXT,
+    credit_score INTEGER,
+    income INTEGER,
+    approved_amount INTEGER,
+    blacklisted INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+) WITHOUT ROWID
+"""
+
+_SELECT_BY_PHONE = ("SELECT name, credit_score, income, approved_amount, blacklisted, extra "
+                    "FROM customers WHERE phone = ?")
+_UPSERT = ("INSERT OR REPLACE INTO customers (phone, name, credit_score, income, approved_amount, blacklisted, extra) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def _to_record(row: Tuple) -> Dict[str, Any]:
+    name, credit_score, income, approved_amount, blacklisted, extra = row
+    record = {
+        'name': name,
+        'credit_score': credit_score,
+        'income': income,
+        'blacklisted': bool(blacklisted),
+        'approved_amount': approved_amount,
+    }
+    if extra:
+        record.update(json.loads(extra))
+    return record
+
+
+def _to_row(phone: str, record: Dict[str, Any]) -> Tuple:
+    extra = {k: v for k, v in record.items() if k not in CRM_COLUMNS and k != 'phone'}
+    return (
+        str(phone),
+        record.get('name'),
+        _as_int(record.get('credit_score')),
+        _as_int(record.get('income')),
+        _as_int(record.get('approved_amount')),
+        1 if str(record.get('blacklisted', '')).lower() in ('1', 'true', 'yes') else 0,
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
+
+
+def _as_int(value) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    return int(float(value))
+
+
+class SQLiteCRM:
+    """
+    Phone-indexed CRM in SQLite.
+
+    Each thread gets its own connection (sqlite3 connections must not be
+    shared across threads); statements are reused from the connection's
+    statement cache, so a lookup is one primary-key B-tree probe.
+
+    phone_filter (a BloomFilter) is consulted first. It is loaded from disk
+    when its recorded row count matches the table, rebuilt otherwise, and
+    reloaded when another process (e.g. the importer) saves a newer one.
+    While the table holds more rows than the filter was built from (another
+    connection is mid-import), its negatives are checked against SQLite.
+    """
+
+    def __init__(self, path: str = CRM_SQLITE_PATH, check_interval_s: float = RELOAD_CHECK_S):
+        self.path = path
+        self.bloom_path = f'{path}.bloom.npz'
+        self.check_interval_s = check_interval_s
+        self._local = threading.local()
+        self._filter_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+        self.phone_filter = self._open_filter()
+        self._bloom_mtime = os.stat(self.bloom_path).st_mtime_ns
+        self._filter_checked_at = time.monotonic()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, cached_statements=64)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _open_filter(self) -> BloomFilter:
+        records = len(self)
+        bloom = load_or_none(self.bloom_path)
+        if bloom is None or bloom.meta.get('source_records') != records:
+            bloom = self._build_filter(records)
+        return bloom
+
+    def _build_filter(self, records: int) -> BloomFilter:
+        phones = (phone for (phone,) in self.conn.execute('SELECT phone FROM customers'))
+        bloom = BloomFilter.build(phones, max(FILTER_MIN_CAPACITY, FILTER_HEADROOM * records))
+        bloom.meta['source_records'] = records
+        bloom.save(self.bloom_path)
+        return bloom
+
+    def rebuild_filter(self):
+        """Build the phone filter from the table at a size fitting its current row count."""
+        with self._filter_lock:
+            self.phone_filter = self._build_filter(len(self))
+            self._bloom_mtime = os.stat(self.bloom_path).st_mtime_ns
+
+    def _save_filter(self):
+        """Persist after writes; a filter grown past its capacity is rebuilt at the new size."""
+        with self._filter_lock:
+            records = len(self)
+            if self.phone_filter.over_capacity:
+                self.phone_filter = self._build_filter(records)
+            else:
+                self.phone_filter.meta['source_records'] = records
+                self.phone_filter.save(self.bloom_path)
+            self._bloom_mtime = os.stat(self.bloom_path).st_mtime_ns
+
+    def _refresh_filter(self):
+        now = time.monotonic()
+        if now - self._filter_checked_at < self.check_interval_s:
+            return
+        self._filter_checked_at = now
+        try:
+            mtime = os.stat(self.bloom_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._bloom_mtime:
+            with self._filter_lock:
+                bloom = load_or_none(self.bloom_path)
+                if bloom is not None:
+                    old = self.phone_filter
+                    bloom.probes, bloom.negatives, bloom.false_positives = \
+                        old.probes, old.negatives, old.false_positives
+                    self.phone_filter = bloom
+                self._bloom_mtime = mtime
+
+    def _filter_behind(self, bloom: BloomFilter) -> bool:
+        """
+        True while the table has rows the filter was not built from.
+
+        Re-counted only when PRAGMA data_version says another connection
+        committed since this thread last looked, or the filter was reloaded.
+        """
+        local = self._local
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        checked = getattr(local, 'filter_checked', None)
+        if checked is None or checked[0] != version or checked[1] is not bloom:
+            local.filter_behind = len(self) > bloom.meta.get('source_records', 0)
+            local.filter_checked = (version, bloom)
+        return local.filter_behind
+
+    def get(self, phone: str) -> Optional[Dict[str, Any]]:
+        """Record for a phone number, or None."""
+        self._refresh_filter()
+        bloom = self.phone_filter
+        if not bloom.check(phone) and not self._filter_behind(bloom):
+            return None
+        row = self.conn.execute(_SELECT_BY_PHONE, (phone,)).fetchone()
+        if row is None:
+            bloom.record_false_positive()
+            return None
+        return _to_record(row)
+
+    def __contains__(self, phone: str) -> bool:
+        return self.get(phone) is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream every (phone, record) pair in phone order."""
+        cursor = self.conn.execute(
+            'SELECT phone, name, credit_score, income, approved_amount, blacklisted, extra '
+            'FROM customers ORDER BY phone'
+        )
+        for row in cursor:
+            yield row[0], _to_record(row[1:])
+
+    def upsert_many(self, rows: Iterable[Tuple[str, Dict[str, Any]]], batch_size: int = IMPORT_BATCH_SIZE,
+                    update_filter: bool = True) -> int:
+        """
+        Insert or replace records, one transaction per batch.
+
+        With update_filter=False the phone filter is rebuilt once at the end
+        instead of extended per batch (bulk loads nobody reads concurrently).
+        """
+        conn = self.conn
+        count = 0
+        batch = []
+
+        def flush():
+            # Phones enter the filter before their rows commit, so a
+            # concurrent reader never gets a false "not a customer"
+            if update_filter:
+                self.phone_filter.add_many(row[0] for row in batch)
+            with conn:
+                conn.executemany(_UPSERT, batch)
+
+        for phone, record in rows:
+            batch.append(_to_row(phone, record))
+            if len(batch) >= batch_size:
+                flush()
+                count += len(batch)
+                batch = []
+        if batch:
+            flush()
+            count += len(batch)
+        if update_filter:
+            self._save_filter()
+        else:
+            self.rebuild_filter()
+        return count
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def iter_source(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream (phone, record) pairs from a CRM export.
+
+    .jsonl and .csv are read row by row (a 'phone' column/field is required);
+    .json must be an object keyed by phone, like data/mock_db.json.
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if suffix == '.csv':
+            for row in csv.DictReader(f):
+                yield row.pop('phone'), row
+        elif suffix == '.jsonl':
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    yield str(record.pop('phone')), record
+        else:
+            for phone, record in json.load(f).items():
+                yield phone, record
+
+
+def bulk_import(source_path: str, db_path: str = CRM_SQLITE_PATH,
+                batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """Load a JSON/JSONL/CSV export into the SQLite CRM; returns count and throughput."""
+    crm = SQLiteCRM(db_path)
+    conn = crm.conn
+    conn.execute('PRAGMA synchronous=OFF')  # bulk load: the source file is the backup
+    start = time.perf_counter()
+    try:
+        count = crm.upsert_many(iter_source(source_path), batch_size, update_filter=False)
+    finally:
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    elapsed = time.perf_counter() - start
+    return {'records': count, 'elapsed_s': elapsed, 'records_per_s': count / elapsed if elapsed else 0.0}
+
+
+_SQLITE_STORES: Dict[str, SQLiteCRM] = {}
+
+
+def get_sqlite_crm(path: Optional[str] = None) -> SQLiteCRM:
+    """Process-wide SQLite CRM for a database file."""
+    key = str(path or CRM_SQLITE_PATH)
+    with _STORES_LOCK:
+        if key not in _SQLITE_STORES:
+            _SQLITE_STORES[key] = SQLiteCRM(key)
+        return _SQLITE_STORES[key]
+
+
+def get_crm_db(json_path: Optional[str] = None):
+    """The configured CRM backend as a phone-keyed mapping (anything with .get(phone))."""
+    if CRM_BACKEND == 'sqlite':
+        return get_sqlite_crm()
+    if CRM_BACKEND == 'snapshot':
+        return get_crm_snapshot()
+    return get_crm_store(json_path).snapshot()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Bulk import a CRM export into SQLite')
+    parser.add_argument('source', help='JSON (keyed by phone), JSONL or CSV export')
+    parser.add_argument('--db', default=CRM_SQLITE_PATH)
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    print(bulk_import(args.source, args.db, args.batch_size))
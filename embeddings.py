@@ -0,0 +1,23 @@
+"""
+embeddings.py - Shared sentence-embedding model
+The RAG engine and the intent router embed with the same SentenceTransformer;
+get_embedder() loads it once per process so they share one copy in memory.
+"""
+
+import threading
+from typing import Dict
+
+DEFAULT_EMBED_MODEL = 'all-MiniLM-L6-v2'
+
+_MODELS: Dict[str, object] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def get_embedder(model_name: str = DEFAULT_EMBED_MODEL):
+    """Process-wide SentenceTransformer for a model name, loaded on first use."""
+    with _MODELS_LOCK:
+        if model_name not in _MODELS:
+            from sentence_transformers import SentenceTransformer
+
+            _MODELS[model_name] = SentenceTransformer(model_name)
+        return _MODELS[model_name]
@@ -0,0 +1,401 @@
+"""
+extraction.py - Compiled multilingual slot extraction
+Extracts phone, loan amount, tenure and monthly income from English, Hindi
+and Hinglish utterances, and which of a numbered list of offers the
+customer picked. All patterns are compiled once at import.
+
+Understands:
+- Devanagari numerals ("५ लाख") and Indian digit grouping ("₹ 5,00,000")
+- Units: lakh/lac/लाख, crore/cr/करोड़, thousand/hazaar/हज़ार, "15k", "5L", "12 LPA",
+  and compound amounts ("5 lakh 50 thousand", "1 crore 20 lakh")
+- Spelled-out numbers in English ("five lakh"), Hinglish ("paanch lakh",
+  "saade paanch lakh", "dedh lakh") and Hindi ("पाँच लाख")
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Accepted loan amounts, with or without a unit ("15k" or "50000" is not a loan request)
+MIN_LOAN_AMOUNT = 100000
+MAX_LOAN_AMOUNT = 100000000
+# Tenures on offer (offer_optimiser.OFFER_TENURES); a tenure outside them is
+# reported as tenure_out_of_range so the agent can ask again
+MIN_TENURE_MONTHS = 12
+MAX_TENURE_MONTHS = 60
+
+
+def _nfc(text: str) -> str:
+    return unicodedata.normalize('NFC', text)
+
+
+_DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+
+# Number words (value) - converted only when followed by a unit word, so
+# ordinary words like "do" or "ek baar" are left alone
+_NUMBER_WORDS = {
+    # English
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13,
+    'fourteen': 14, 'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18,
+    'nineteen': 19, 'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50,
+    'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90,
+    # Hinglish
+    'ek': 1, 'do': 2, 'teen': 3, 'char': 4, 'chaar': 4, 'paanch': 5, 'panch': 5,
+    'pach': 5, 'chhe': 6, 'chhah': 6, 'cheh': 6, 'saat': 7, 'aath': 8, 'nau': 9,
+    'das': 10, 'dus': 10, 'gyarah': 11, 'barah': 12, 'baarah': 12, 'terah': 13,
+    'chaudah': 14, 'pandrah': 15, 'solah': 16, 'satrah': 17, 'atharah': 18,
+    'unnis': 19, 'bees': 20, 'pachees': 25, 'pachchis': 25, 'tees': 30,
+    'chalis': 40, 'chaalis': 40, 'pachas': 50, 'pachaas': 50, 'sattar': 70,
+    'assi': 80, 'nabbe': 90,
+    # Hindi
+    'एक': 1, 'दो': 2, 'तीन': 3, 'चार': 4, 'पाँच': 5, 'पांच': 5, 'छह': 6, 'छः': 6,
+    'सात': 7, 'आठ': 8, 'नौ': 9, 'दस': 10, 'ग्यारह': 11, 'बारह': 12, 'पंद्रह': 15,
+    'बीस': 20, 'पच्चीस': 25, 'तीस': 30, 'चालीस': 40, 'पचास': 50, 'साठ': 60,
+    'सत्तर': 70, 'अस्सी': 80, 'नब्बे': 90,
+}
+_HUNDRED_WORDS = {'hundred', 'sau', 'सौ'}
+# Standalone fractional numbers
+_FRACTION_WORDS = {'dedh': 1.5, 'dhai': 2.5, 'dhaai': 2.5, 'डेढ़': 1.5, 'ढाई': 2.5}
+# Prefixes that adjust the number that follows ("saade paanch" = 5.5)
+_FRACTION_PREFIXES = {'saade': 0.5, 'sade': 0.5, 'साढ़े': 0.5, 'sava': 0.25, 'सवा': 0.25,
+                      'paune': -0.25, 'पौने': -0.25}
+# "a"/"an" counts as 1 only before these ("a lakh"), never in "a year" or "a month"
+_MONEY_UNIT_WORDS = {
+    'lakh', 'lakhs', 'lac', 'lacs', 'लाख', 'crore', 'crores', 'cr', 'करोड़', 'करोड',
+    'thousand', 'hazaar', 'hazar', 'हज़ार', 'हजार',
+}
+_UNIT_WORDS = _MONEY_UNIT_WORDS | {
+    'rupees', 'rupaye', 'रुपये', 'lpa', 'year', 'years', 'yrs', 'yr', 'saal', 'साल', 'वर्ष',
+    'month', 'months', 'mahine', 'mahina', 'महीने', 'महीना',
+}
+
+_NUMBER_WORDS = {_nfc(k): v for k, v in _NUMBER_WORDS.items()}
+_FRACTION_WORDS = {_nfc(k): v for k, v in _FRACTION_WORDS.items()}
+_FRACTION_PREFIXES = {_nfc(k): v for k, v in _FRACTION_PREFIXES.items()}
+_MONEY_UNIT_WORDS = {_nfc(k) for k in _MONEY_UNIT_WORDS}
+_UNIT_WORDS = {_nfc(k) for k in _UNIT_WORDS}
+
+_STRIP_CHARS = '.,!?;:()"\''
+
+# Picking from a numbered list: "2", "option 1", "2nd", "the second one", "doosra wala".
+# A plain digit only counts as the whole message; otherwise the pick must be
+# explicit (an ordinal, or a number after a choice word), with nothing but
+# filler words around it
+_ORDINAL_WORDS = {
+    'first': 1, 'second': 2, 'third': 3,
+    'pehla': 1, 'pehli': 1, 'pahla': 1, 'pahli': 1, 'doosra': 2, 'doosri': 2, 'dusra': 2,
+    'dusri': 2, 'teesra': 3, 'teesri': 3, 'tisra': 3, 'tisri': 3,
+    'पहला': 1, 'पहली': 1, 'दूसरा': 2, 'दूसरी': 2, 'तीसरा': 3, 'तीसरी': 3,
+}
+_ORDINAL_WORDS = {_nfc(k): v for k, v in _ORDINAL_WORDS.items()}
+_CHOICE_DIGIT = re.compile(r'[1-9]')
+_CHOICE_ORDINAL = re.compile(r'#([1-9])|([1-9])(?:st|nd|rd|th)')
+_CHOICE_KEYWORDS = {'option', 'offer', 'choice', 'number', 'plan', 'विकल्प', 'ऑफर', 'नंबर'}
+_CHOICE_FILLER = {
+    'the', 'one', 'i', 'ill', "i'll", 'will', 'take', 'choose', 'pick', 'select', 'want', 'go', 'with',
+    'please', 'pls', 'ok', 'okay', 'lets', "let's", 'is', 'fine', 'good',
+    'wala', 'wali', 'vala', 'vali', 'le', 'lunga', 'lungi', 'chahiye', 'haan', 'ji', 'theek', 'hai',
+    'वाला', 'वाली', 'लूंगा', 'लूंगी', 'चाहिए', 'हाँ', 'जी', 'ठीक', 'है', 'कृपया',
+}
+_CHOICE_KEYWORDS = {_nfc(k) for k in _CHOICE_KEYWORDS}
+_CHOICE_FILLER = {_nfc(k) for k in _CHOICE_FILLER}
+MAX_CHOICE_WORDS = 6
+
+_NUM = r'(\d+(?:\.\d+)?)'
+_NOT_LETTER = r'(?![a-zऀ-ॿ])'
+
+_DIGIT_GROUP_COMMA = re.compile(r'(?<=\d),(?=\d)')
+_PHONE = re.compile(r'(?<!\d)(?:\+?91[\s-]?|0)?(\d{5})[\s-]?(\d{5})(?!\d)')
+_TENURE = re.compile(
+    _NUM + r'\s*(years?|yrs?|saal|साल|वर्ष|months?|mahine|mahina|महीने|महीना)' + _NOT_LETTER
+    + r'(?!\s*old)'
+)
+_CRORE = _nfc('crores?|cr|करोड़|करोड')
+_LAKH = _nfc('lakhs?|lacs?|लाख')
+_THOUSAND = _nfc('thousand|hazaa?r|हज़ार|हजार')
+_UNIT_AMOUNT = re.compile(
+    r'(?<![\d.])' + _NUM + r'\s*(' + _CRORE + '|' + _LAKH + '|' + _THOUSAND + ')' + _NOT_LETTER
+)
+_SHORT_AMOUNT = re.compile(r'(?<![\d.])' + _NUM + r'(k|l|lpa)' + _NOT_LETTER)
+_LPA_AMOUNT = re.compile(r'(?<![\d.])' + _NUM + r'\s*lpa' + _NOT_LETTER)
+_CURRENCY_AMOUNT = re.compile(r'(?:₹|\brs\.?|\binr)\s*' + _NUM)
+# Between the groups of a compound amount ("5 lakh [and] 50 thousand")
+_AMOUNT_JOIN = re.compile(_nfc(r'\s*(?:(?:and|aur|और)\s+)?'))
+_SUFFIX_AMOUNT = re.compile(_NUM + r'\s*(?:rupees|rupaye|रुपये|/-)')
+_BARE_AMOUNT = re.compile(r'(?<![\d.])(\d{6,9})(?![\d.])')
+_BARE_INCOME = re.compile(r'(?<![\d.])(\d{4,7})(?![\d.])')
+_INCOME_KEYWORD = re.compile(
+    _nfc(r'(salary|income|earn\w*|kamata\w*|kamati\w*|kamaa\w*|तनख्वाह|वेतन|आय|सैलरी|कमाता|कमाती)')
+)
+# Annual cue directly after an income amount ("6 lakh a year", "720000 p.a.")
+_ANNUAL = re.compile(_nfc(
+    r'\s*(?:rupees|rupaye|रुपये|/-)?\s*(?:per annum|p\.?\s?a\.?' + _NOT_LETTER
+    + r'|annual(?:ly)?|yearly|a year|per year|every year|saala?na|सालाना|प्रति वर्ष|(?:saal|साल) (?:ka|ki|का|की))'
+))
+
+_UNIT_MULTIPLIERS = [
+    (re.compile('^(?:' + _CRORE + ')$'), 10000000),
+    (re.compile('^(?:' + _LAKH + '|l)$'), 100000),
+    (re.compile('^(?:' + _THOUSAND + '|k)$'), 1000),
+]
+
+
+def normalize(text: str) -> str:
+    """Lowercase, NFC, ASCII digits, no digit-group commas, spelled numbers as digits."""
+    text = _nfc(text or '').lower().translate(_DEVANAGARI_DIGITS)
+    text = _DIGIT_GROUP_COMMA.sub('', text)
+    return _words_to_numbers(text)
+
+
+def _words_to_numbers(text: str) -> str:
+    tokens = text.split()
+    out = []
+    i = 0
+    while i < len(tokens):
+        value, consumed = _parse_number_phrase(tokens, i)
+        if consumed:
+            next_core = tokens[i + consumed].strip(_STRIP_CHARS) if i + consumed < len(tokens) else ''
+            if next_core in _UNIT_WORDS:
+                out.append(f"{value:g}")
+                i += consumed
+                continue
+        out.append(tokens[i])
+        i += 1
+    return ' '.join(out)
+
+
+def _parse_number_phrase(tokens: List[str], start: int) -> Tuple[float, int]:
+    """Parse spelled-out number words from tokens[start:]; returns (value, tokens consumed)."""
+    total = 0.0
+    current = 0.0
+    adjust = 0.0
+    seen = False
+    i = start
+    while i < len(tokens):
+        core = tokens[i].strip(_STRIP_CHARS)
+        if core in _FRACTION_PREFIXES and not seen:
+            adjust = _FRACTION_PREFIXES[core]
+        elif core in _FRACTION_WORDS and not seen:
+            current = _FRACTION_WORDS[core]
+            seen = True
+        elif core in _NUMBER_WORDS:
+            current += _NUMBER_WORDS[core]
+            seen = True
+        elif core in _HUNDRED_WORDS and seen:
+            current = (current or 1) * 100
+        elif core in ('a', 'an') and not seen and i + 1 < len(tokens) \
+                and tokens[i + 1].strip(_STRIP_CHARS) in _MONEY_UNIT_WORDS | _HUNDRED_WORDS:
+            current = 1
+            seen = True
+        elif core == 'and' and seen and i + 1 < len(tokens) \
+                and tokens[i + 1].strip(_STRIP_CHARS) in _NUMBER_WORDS:
+            pass
+        else:
+            break
+        i += 1
+    if not seen:
+        return 0.0, 0
+    total += current
+    if adjust and total:
+        total += adjust
+    return total, i - start
+
+
+def _unit_multiplier(unit: str) -> int:
+    for pattern, multiplier in _UNIT_MULTIPLIERS:
+        if pattern.match(unit):
+            return multiplier
+    return 1
+
+
+def _unit_value(number: str, unit: str) -> float:
+    return float(number) * _unit_multiplier(unit)
+
+
+def _cut(text: str, span: Tuple[int, int]) -> str:
+    return text[:span[0]] + ' ' + text[span[1]:]
+
+
+def _find_phone(norm: str) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    match = _PHONE.search(norm)
+    if not match:
+        return None, None
+    return match.group(1) + match.group(2), match.span()
+
+
+def _find_tenure(norm: str) -> Tuple[Optional[int], Optional[Tuple[int, int]]]:
+    """First stated tenure in months (even outside the offered range) and its span."""
+    for match in _TENURE.finditer(norm):
+        value = float(match.group(1))
+        months = value * 12 if match.group(2)[0] in 'ys' or match.group(2) in ('साल', 'वर्ष') else value
+        if months > 0:
+            return int(round(months)), match.span()
+    return None, None
+
+
+def _tenure_on_offer(months: Optional[int]) -> bool:
+    return months is not None and MIN_TENURE_MONTHS <= months <= MAX_TENURE_MONTHS
+
+
+def _find_income(norm: str) -> Tuple[Optional[int], Optional[Tuple[int, int]]]:
+    keyword = _INCOME_KEYWORD.search(norm)
+    if not keyword:
+        return None, None
+    start = keyword.end()
+    window = norm[start:start + 60]
+
+    lpa = _LPA_AMOUNT.search(window)
+    candidates = [
+        (m, _unit_value(m.group(1), m.group(2))) for m in [_UNIT_AMOUNT.search(window)] if m
+    ] + [
+        (m, _unit_value(m.group(1), m.group(2))) for m in [_SHORT_AMOUNT.search(window)] if m
+    ] + [
+        (m, float(m.group(1))) for m in [_CURRENCY_AMOUNT.search(window), _BARE_INCOME.search(window)] if m
+    ]
+    if lpa:
+        return int(round(float(lpa.group(1)) * 100000 / 12)), (keyword.start(), start + lpa.end())
+    if not candidates:
+        return None, None
+
+    match, value = min(candidates, key=lambda c: c[0].start())
+    end = match.end()
+    annual = _ANNUAL.match(window, end)
+    if annual:
+        value /= 12
+        end = annual.end()
+    return int(round(value)), (keyword.start(), start + end)
+
+
+def _find_amount(norm: str) -> Optional[int]:
+    unit_matches = sorted(
+        (m for pattern in (_UNIT_AMOUNT, _SHORT_AMOUNT) for m in pattern.finditer(norm) if m.group(2) != 'lpa'),
+        key=lambda m: m.start()
+    )
+    # Adjacent groups with falling units add up: "5 lakh 50 thousand", "1 crore 20 lakh"
+    i = 0
+    while i < len(unit_matches):
+        first = unit_matches[i]
+        value = _unit_value(first.group(1), first.group(2))
+        multiplier, end = _unit_multiplier(first.group(2)), first.end()
+        i += 1
+        while i < len(unit_matches):
+            match = unit_matches[i]
+            next_multiplier = _unit_multiplier(match.group(2))
+            if next_multiplier >= multiplier or not _AMOUNT_JOIN.fullmatch(norm, end, match.start()):
+                break
+            value += _unit_value(match.group(1), match.group(2))
+            multiplier, end = next_multiplier, match.end()
+            i += 1
+        if MIN_LOAN_AMOUNT <= value <= MAX_LOAN_AMOUNT:
+            return int(round(value))
+
+    for pattern in (_CURRENCY_AMOUNT, _SUFFIX_AMOUNT):
+        match = pattern.search(norm)
+        if match:
+            value = float(match.group(1))
+            if MIN_LOAN_AMOUNT <= value <= MAX_LOAN_AMOUNT:
+                return int(round(value))
+
+    for match in _BARE_AMOUNT.finditer(norm):
+        value = int(match.group(1))
+        if MIN_LOAN_AMOUNT <= value <= MAX_LOAN_AMOUNT:
+            return value
+    return None
+
+
+def extract_all(text: str) -> Dict[str, Any]:
+    """
+    Extract every slot from one utterance.
+
+    Phone, income and tenure spans are removed before the amount is searched,
+    so a phone number or "5 years" is never read as a loan amount. Income is
+    read before tenure so "6 lakh a year" is an annual salary, not a tenure.
+
+    Returns:
+        Dict with phone (str), requested_amount, tenure_months and income
+        (monthly, int); missing slots are None. A stated tenure outside
+        MIN_TENURE_MONTHS..MAX_TENURE_MONTHS is not a tenure_months but is
+        returned as tenure_out_of_range (months)
+    """
+    norm = normalize(text)
+
+    phone, span = _find_phone(norm)
+    if span:
+        norm = _cut(norm, span)
+
+    income, span = _find_income(norm)
+    if span:
+        norm = _cut(norm, span)
+
+    tenure, span = _find_tenure(norm)
+    if span:
+        norm = _cut(norm, span)
+
+    on_offer = _tenure_on_offer(tenure)
+    return {
+        'phone': phone,
+        'requested_amount': _find_amount(norm),
+        'tenure_months': tenure if on_offer else None,
+        'income': income,
+        'tenure_out_of_range': tenure if tenure and not on_offer else None,
+    }
+
+
+def extract_batch(texts: Iterable[str]) -> List[Dict[str, Any]]:
+    """Extract slots from many utterances (e.g. a transcript or an eval corpus)."""
+    return [extract_all(text) for text in texts]
+
+
+def extract_phone(text: str) -> Optional[str]:
+    """10-digit phone number (accepts +91/0 prefixes, spaces, dashes, Devanagari digits)."""
+    return _find_phone(normalize(text))[0]
+
+
+def extract_amount(text: str) -> Optional[int]:
+    """Requested loan amount in rupees."""
+    return extract_all(text)['requested_amount']
+
+
+def extract_tenure_months(text: str) -> Optional[int]:
+    """Loan tenure in months ("5 years", "60 months", "paanch saal"), if it is on offer."""
+    months = _find_tenure(normalize(text))[0]
+    return months if _tenure_on_offer(months) else None
+
+
+def extract_choice(text: str) -> Optional[int]:
+    """
+    1-based pick from a numbered list: a bare number as the whole message
+    ("2"), or an explicit pick ("option 1", "2nd", "#3", "the second one",
+    "doosra wala") among filler words. None for anything else: "give me 2
+    minutes", "upload in 2 days", or a message carrying an amount or tenure.
+    """
+    norm = normalize(text)
+    words = [w for w in (w.strip(_STRIP_CHARS) for w in norm.split()) if w]
+    if not words or len(words) > MAX_CHOICE_WORDS or _find_tenure(norm)[0] or _find_amount(norm):
+        return None
+    if len(words) == 1 and _CHOICE_DIGIT.fullmatch(words[0]):
+        return int(words[0])
+
+    choice = None
+    for i, word in enumerate(words):
+        ordinal = _CHOICE_ORDINAL.fullmatch(word)
+        if word in _ORDINAL_WORDS:
+            pick = _ORDINAL_WORDS[word]
+        elif ordinal:
+            pick = int(ordinal.group(1) or ordinal.group(2))
+        elif _CHOICE_DIGIT.fullmatch(word) and i and words[i - 1] in _CHOICE_KEYWORDS:
+            pick = int(word)
+        elif word in _CHOICE_FILLER or (word in _CHOICE_KEYWORDS and i + 1 < len(words)):
+            continue
+        else:
+            return None
+        if choice is not None:
+            return None
+        choice = pick
+    return choice
+
+
+def extract_income(text: str) -> Optional[int]:
+    """Monthly income in rupees ("salary 65k", "income 12 LPA")."""
+    return extract_all(text)['income']
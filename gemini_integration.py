@@ -3,22 +3,27 @@ gemini_integration.py - Google Gemini API integration for dynamic responses
 Generates contextual loan offers and conversation based on applicant profile
 """
 
+import json
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Iterator, List
 import google.generativeai as genai
+import httpx
 from dotenv import load_dotenv
+from logger import PerformanceMonitor
+from llm_clients import ClientManager
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Gemini API
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    # Use gemini-2.5-flash (latest stable model with best performance/cost ratio)
-    MODEL = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    MODEL = None
+# Use gemini-2.5-flash (latest stable model with best performance/cost ratio)
+# The model handle is created once and shared through ClientManager
+MODEL = ClientManager.gemini_model('gemini-2.5-flash', GEMINI_API_KEY)
+
+# REST endpoint used for streaming; override to point at a local fake server in tests
+GEMINI_API_BASE = os.getenv('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com')
 
 
 class GeminiClient:
@@ -29,6 +34,18 @@ class GeminiClient:
         """Check if Gemini API is configured."""
         return MODEL is not None
     
+    @staticmethod
+    def _generate(prompt: str):
+        """Call the shared model and record latency for ClientManager stats."""
+        start = time.perf_counter()
+        try:
+            response = MODEL.generate_content(prompt)
+        except Exception:
+            ClientManager.record('gemini', (time.perf_counter() - start) * 1000, ok=False)
+            raise
+        ClientManager.record('gemini', (time.perf_counter() - start) * 1000)
+        return response
+    
     @staticmethod
     def generate_sales_pitch(
         applicant_name: str,
@@ -60,7 +77,7 @@ class GeminiClient:
         """
         
         try:
-            response = MODEL.generate_content(prompt)
+            response = GeminiClient._generate(prompt)
             return response.text
         except Exception as e:
             print(f"Gemini API error: {e}")
@@ -97,7 +114,7 @@ class GeminiClient:
         """
         
         try:
-            response = MODEL.generate_content(prompt)
+            response = GeminiClient._generate(prompt)
             return response.text
         except Exception as e:
             print(f"Gemini API error: {e}")
@@ -132,7 +149,7 @@ class GeminiClient:
         """
         
         try:
-            response = MODEL.generate_content(prompt)
+            response = GeminiClient._generate(prompt)
             return response.text
         except Exception as e:
             print(f"Gemini API error: {e}")
@@ -165,7 +182,7 @@ class GeminiClient:
         """
         
         try:
-            response = MODEL.generate_content(prompt)
+            response = GeminiClient._generate(prompt)
             return response.text
         except Exception as e:
             print(f"Gemini API error: {e}")
@@ -173,6 +190,74 @@ class GeminiClient:
                 applicant_name, fraud_status, loan_amount
             )
     
+    @staticmethod
+    def stream_text(
+        prompt: str,
+        model: str = 'gemini-flash-latest',
+        temperature: float = 0.1,
+        max_output_tokens: int = 800,
+        api_key: Optional[str] = None,
+        api_base: Optional[str] = None,
+        timeout: float = 60.0
+    ) -> Iterator[str]:
+        """
+        Stream text deltas from Gemini as they are generated.
+        
+        Uses the REST ``streamGenerateContent`` endpoint with server-sent events,
+        so the first words reach the user long before the full answer is done.
+        
+        Args:
+            prompt: The full prompt to send
+            model: Gemini model name
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens in the response
+            api_key: Overrides GEMINI_API_KEY
+            api_base: Overrides GEMINI_API_BASE (e.g. a local fake endpoint)
+            timeout: Network timeout in seconds
+            
+        Yields:
+            Text deltas in generation order
+        """
+        key = api_key or GEMINI_API_KEY
+        if not key:
+            raise EnvironmentError('Set GEMINI_API_KEY in environment to use Gemini.')
+        
+        url = f"{(api_base or GEMINI_API_BASE).rstrip('/')}/v1beta/models/{model}:streamGenerateContent"
+        payload = {
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+            'generationConfig': {
+                'temperature': temperature,
+                'maxOutputTokens': max_output_tokens
+            }
+        }
+        
+        http = ClientManager.http_client('gemini')
+        start = time.perf_counter()
+        ok = False
+        try:
+            with http.stream('POST', url, params={'alt': 'sse', 'key': key},
+                             json=payload, timeout=timeout) as response:
+                response.raise_for_status()
+                yield from GeminiClient._iter_sse_text(response)
+            ok = True
+        finally:
+            ClientManager.record('gemini', (time.perf_counter() - start) * 1000, ok=ok)
+    
+    @staticmethod
+    def _iter_sse_text(response: httpx.Response) -> Iterator[str]:
+        """Yield the text parts of each server-sent event in a streamed response."""
+        for line in response.iter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if not data:
+                continue
+            chunk = json.loads(data)
+            for candidate in chunk.get('candidates', [])[:1]:
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        yield part['text']
+    
     # Fallback messages when Gemini is not available
     @staticmethod
     def _fallback_sales_pitch() -> str:
@@ -224,3 +309,43 @@ class GeminiClient:
                 f"⚠️ We need to verify your document further.\n\n"
                 f"A specialist will contact you within 24 hours. Thank you for your patience!"
             )
+
+
+class GeminiStream:
+    """
+    Iterable over the text deltas of a streamed Gemini response.
+    
+    ``text``, ``sources`` and ``ttft_ms`` (time-to-first-token) are filled in
+    as the stream is consumed, so callers can render deltas immediately and
+    read the assembled answer afterwards.
+    """
+    
+    def __init__(self, deltas: Iterator[str], sources: Optional[List[str]] = None,
+                 event_name: str = 'gemini_stream'):
+        self._deltas = deltas
+        self._pending_sources = list(dict.fromkeys(sources or []))
+        self.event_name = event_name
+        self.sources: List[str] = []
+        self.text = ''
+        self.ttft_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self.done = False
+    
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        parts = []
+        for delta in self._deltas:
+            if self.ttft_ms is None:
+                self.ttft_ms = (time.perf_counter() - start) * 1000
+                PerformanceMonitor.record(f'{self.event_name}_ttft', self.ttft_ms)
+            parts.append(delta)
+            yield delta
+        
+        self.total_ms = (time.perf_counter() - start) * 1000
+        self.text = ''.join(parts)
+        self.sources = self._pending_sources
+        self.done = True
+        PerformanceMonitor.record(self.event_name, self.total_ms, {
+            'ttft_ms': self.ttft_ms,
+            'chars': len(self.text)
+        })
@@ -4,20 +4,33 @@ Groq API integration for fast, high-quality LLM responses.
 Using Groq's Mixtral-8x7b model for loan conversation.
 """
 
+import asyncio
+import itertools
 import os
-from typing import Optional
-from groq import Groq
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
 from dotenv import load_dotenv
+from llm_clients import ClientManager
+from rate_limiter import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimiter, is_rate_limited, retry_after
+from utils import estimate_tokens
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Groq client
+# The Groq client itself is created once and pooled by ClientManager
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
-if GROQ_API_KEY:
-    CLIENT = Groq(api_key=GROQ_API_KEY)
-else:
-    CLIENT = None
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+# Account quotas and local concurrency for AsyncGroqClient
+GROQ_RPM = float(os.getenv('GROQ_RPM', '30'))
+GROQ_TPM = float(os.getenv('GROQ_TPM', '6000'))
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', '8'))
+GROQ_MAX_RATE_LIMIT_RETRIES = 2
+
+# The account's quota, shared by every Groq caller in the process:
+# llm_provider.GroqProvider (chat turns, summaries) and AsyncGroqClient (batch jobs)
+GROQ_LIMITER = RateLimiter(GROQ_RPM, GROQ_TPM)
 
 
 class GroqClient:
@@ -26,7 +39,7 @@ class GroqClient:
     @staticmethod
     def is_available() -> bool:
         """Check if Groq API is configured."""
-        return CLIENT is not None
+        return ClientManager.groq() is not None
     
     @staticmethod
     def generate_text(prompt: str, max_tokens: int = 500) -> Optional[str]:
@@ -40,22 +53,180 @@ class GroqClient:
         Returns:
             Generated text or None if error
         """
-        if not GroqClient.is_available():
+        client = ClientManager.groq()
+        if client is None:
             return None
         
+        GROQ_LIMITER.acquire_blocking(estimate_tokens(prompt) + max_tokens)
+        start = time.perf_counter()
         try:
-            message = CLIENT.chat.completions.create(
+            message = client.chat.completions.create(
                 messages=[
                     {
                         "role": "user",
                         "content": prompt,
                     }
                 ],
-                model="llama-3.3-70b-versatile",  # Current active model
+                model=GROQ_MODEL,  # Current active model
                 max_tokens=max_tokens,
                 temperature=0.7,
             )
+            ClientManager.record('groq', (time.perf_counter() - start) * 1000)
             return message.choices[0].message.content
         except Exception as e:
+            ClientManager.record('groq', (time.perf_counter() - start) * 1000, ok=False)
+            if is_rate_limited(e):
+                GROQ_LIMITER.penalize(retry_after(e))
             print(f"Groq API error: {e}")
             return None
+
+
+class AsyncGroqClient:
+    """
+    asyncio Groq client shared by many sessions.
+    
+    - A RateLimiter (RPM + TPM token buckets) admits a request only when both
+      quotas have room; a 429 backs the buckets off by its Retry-After. By
+      default this is GROQ_LIMITER, the quota shared with the chat's
+      GroqProvider, so batch requests queue behind interactive turns there too.
+    - A priority queue puts interactive turns ahead of batch jobs.
+    - Identical in-flight prompts are coalesced into one provider call.
+    
+    complete_fn(prompt, max_tokens, temperature) can replace the SDK call.
+    Create and use one instance per event loop (the limiter is shared anyway).
+    """
+    
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_concurrency: int = GROQ_MAX_CONCURRENCY, model: str = GROQ_MODEL,
+                 complete_fn: Optional[Callable[[str, int, float], Awaitable[Optional[str]]]] = None,
+                 limiter: Optional[RateLimiter] = None):
+        if limiter is None:
+            # Explicit quotas get a limiter of their own (tests, separate accounts)
+            limiter = GROQ_LIMITER if rpm is None and tpm is None else \
+                RateLimiter(rpm or GROQ_RPM, tpm or GROQ_TPM)
+        self.limiter = limiter
+        self.max_concurrency = max_concurrency
+        self.model = model
+        self._complete_fn = complete_fn
+        self._sdk = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[Tuple[str, int, float], asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._seq = itertools.count()
+        self.calls = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+    
+    def is_available(self) -> bool:
+        return self._complete_fn is not None or bool(os.getenv('GROQ_API_KEY'))
+    
+    async def generate(self, prompt: str, max_tokens: int = 500, temperature: float = 0.7,
+                       priority: int = PRIORITY_INTERACTIVE) -> Optional[str]:
+        """
+        Queue a completion and wait for it; None on error or when Groq is not
+        configured. Raises RuntimeError if the client is closed first.
+        """
+        if not self.is_available():
+            return None
+        self._ensure_started()
+        
+        key = (prompt, max_tokens, temperature)
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await asyncio.shield(shared)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        await self._queue.put((priority, next(self._seq), key, future, 0))
+        return await asyncio.shield(future)
+    
+    def _ensure_started(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._queue = asyncio.PriorityQueue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+    
+    async def _dispatch(self):
+        """Admit queued requests in priority order as concurrency and quota allow."""
+        while True:
+            await self._slots.acquire()
+            priority, seq, key, future, attempt = await self._queue.get()
+            prompt, max_tokens, _ = key
+            await self.limiter.acquire(estimate_tokens(prompt) + max_tokens, priority)
+            task = asyncio.get_running_loop().create_task(self._run(priority, seq, key, future, attempt))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, priority: int, seq: int, key: Tuple[str, int, float],
+                   future: asyncio.Future, attempt: int):
+        prompt, max_tokens, temperature = key
+        start = time.perf_counter()
+        try:
+            self.calls += 1
+            result = await self._complete(prompt, max_tokens, temperature)
+            ClientManager.record('groq_async', (time.perf_counter() - start) * 1000)
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            ClientManager.record('groq_async', (time.perf_counter() - start) * 1000, ok=False)
+            if is_rate_limited(e) and attempt < GROQ_MAX_RATE_LIMIT_RETRIES:
+                self.rate_limited += 1
+                self.limiter.penalize(retry_after(e))
+                await self._queue.put((priority, seq, key, future, attempt + 1))
+            else:
+                print(f"Groq API error: {e}")
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            self._slots.release()
+    
+    async def _complete(self, prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
+        if self._complete_fn is not None:
+            return await self._complete_fn(prompt, max_tokens, temperature)
+        if self._sdk is None:
+            from groq import AsyncGroq
+            # Retries are handled here, against the shared rate limiter
+            self._sdk = AsyncGroq(api_key=os.getenv('GROQ_API_KEY'), max_retries=0)
+        message = await self._sdk.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return message.choices[0].message.content
+    
+    async def close(self):
+        """Stop the dispatcher, fail every unfinished request and close the SDK's connections."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        running = list(self._tasks)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+        # Queued requests (and the one the dispatcher held) would otherwise wait forever
+        for future in list(self._in_flight.values()):
+            if not future.done():
+                future.set_exception(RuntimeError("Groq client closed"))
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        if self._sdk is not None:
+            await self._sdk.close()
+            self._sdk = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'in_flight': len(self._in_flight),
+            **self.limiter.snapshot()
+        }
+
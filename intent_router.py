@@ -0,0 +1,188 @@
+"""
+intent_router.py - Embedding-based intent classifier for user turns
+Nearest-centroid classification over sentence embeddings from the project's
+SentenceTransformer (the instance rag_engine uses, see embeddings.py),
+trained from the labelled examples in data/intents.jsonl. Training runs in
+a background thread; until it finishes turns go to the LLM as before.
+
+Short turns like "yes", "nahi", "haan" or "what is my EMI?" are classified in
+a few milliseconds on CPU, so they can drive stage transitions and template
+replies without a round-trip to the 70B model.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import DEFAULT_EMBED_MODEL, get_embedder
+from logger import PerformanceMonitor
+
+INTENTS_PATH = Path('data/intents.jsonl')
+
+# Below this cosine similarity (or margin over the runner-up) a turn is 'other'
+MIN_SIMILARITY = float(os.getenv('INTENT_MIN_SIMILARITY', '0.5'))
+MIN_MARGIN = float(os.getenv('INTENT_MIN_MARGIN', '0.05'))
+
+INTENT_ROUTER_ENABLED = os.getenv('BANKGPT_INTENT_ROUTER', '1') == '1'
+
+
+def load_labelled_intents(path: Path = INTENTS_PATH) -> List[Tuple[str, str]]:
+    """Read (text, intent) pairs from a JSONL file."""
+    examples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                examples.append((row['text'], row['intent']))
+    return examples
+
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over L2-normalised sentence embeddings."""
+
+    def __init__(self, examples: List[Tuple[str, str]],
+                 embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 model_name: str = DEFAULT_EMBED_MODEL,
+                 min_similarity: float = MIN_SIMILARITY, min_margin: float = MIN_MARGIN):
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        if embed_fn is None:
+            model = get_embedder(model_name)
+
+            def embed_fn(texts: List[str]) -> np.ndarray:
+                return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+        self._embed = embed_fn
+        self.labels = sorted({intent for _, intent in examples})
+
+        vectors = self._normalise(self._embed([text.lower() for text, _ in examples]))
+        label_index = np.array([self.labels.index(intent) for _, intent in examples])
+        centroids = np.stack([vectors[label_index == i].mean(axis=0) for i in range(len(self.labels))])
+        self.centroids = self._normalise(centroids).astype(np.float32)
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Classify many turns; returns (intent, similarity) with 'other' below threshold."""
+        if not texts:
+            return []
+        scores = self._normalise(self._embed([t.lower() for t in texts])) @ self.centroids.T
+        results = []
+        for row in scores:
+            order = np.argsort(row)[::-1]
+            best = float(row[order[0]])
+            runner_up = float(row[order[1]]) if len(order) > 1 else -1.0
+            if best < self.min_similarity or best - runner_up < self.min_margin:
+                results.append(('other', best))
+            else:
+                results.append((self.labels[order[0]], best))
+        return results
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Classify one user turn."""
+        start = time.perf_counter()
+        result = self.classify_batch([text])[0]
+        PerformanceMonitor.record('intent_classify', (time.perf_counter() - start) * 1000, {
+            'intent': result[0]
+        })
+        return result
+
+
+_CLASSIFIER: Optional[IntentClassifier] = None
+_CLASSIFIER_FAILED = False
+_LOADER: Optional[threading.Thread] = None
+_CLASSIFIER_LOCK = threading.Lock()
+
+
+def warm_intent_classifier():
+    """Start training the shared classifier in a background thread (once)."""
+    global _LOADER
+    if not INTENT_ROUTER_ENABLED:
+        return
+    with _CLASSIFIER_LOCK:
+        if _CLASSIFIER is not None or _CLASSIFIER_FAILED or _LOADER is not None:
+            return
+        _LOADER = threading.Thread(target=_load_classifier, name='intent-warmup', daemon=True)
+        _LOADER.start()
+
+
+def wait_for_intent_classifier(timeout: Optional[float] = None) -> Optional[IntentClassifier]:
+    """Warm the classifier if needed and block until it is trained (or failed); for benchmarks and scripts."""
+    warm_intent_classifier()
+    loader = _LOADER
+    if loader is not None:
+        loader.join(timeout)
+    return _CLASSIFIER
+
+
+def _load_classifier():
+    global _CLASSIFIER, _CLASSIFIER_FAILED, _LOADER
+    start = time.perf_counter()
+    try:
+        classifier = IntentClassifier(load_labelled_intents())
+    except Exception as e:
+        print(f"Intent router unavailable: {e}")
+        classifier = None
+    with _CLASSIFIER_LOCK:
+        if classifier is None:
+            _CLASSIFIER_FAILED = True
+        elif _CLASSIFIER is None:
+            _CLASSIFIER = classifier
+        _LOADER = None
+    if classifier is not None:
+        PerformanceMonitor.record('intent_warmup', (time.perf_counter() - start) * 1000, {})
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """
+    Shared classifier, or None while it is still warming up in the background.
+
+    Also None when disabled (BANKGPT_INTENT_ROUTER=0) or when the embedding
+    model cannot be loaded; callers then fall back to the LLM. The first call
+    starts the warm-up if warm_intent_classifier() was not called at startup.
+    """
+    if _CLASSIFIER is None and not _CLASSIFIER_FAILED:
+        warm_intent_classifier()
+    return _CLASSIFIER
+
+
+def set_intent_classifier(classifier: Optional[IntentClassifier]):
+    """Install a pre-built classifier (e.g. with a custom embedder)."""
+    global _CLASSIFIER, _CLASSIFIER_FAILED
+    _CLASSIFIER = classifier
+    _CLASSIFIER_FAILED = False
+
+
+def route_intent(intent: str, stage: str, state: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], str]]:
+    """
+    Map a classified intent in a given stage to a template reply.
+
+    Returns:
+        (template message type, template kwargs, next stage) or None to use the LLM
+    """
+    amount = state.get('requested_amount')
+
+    if intent == 'ask_rate':
+        return 'rate_info', {}, stage
+
+    if intent == 'ask_emi' and amount:
+        return 'emi_info', {'amount': amount, 'tenure_months': state.get('tenure_months')}, stage
+
+    if stage in ('approved', 'eligibility_check', 'amount_provided') \
+            and state.get('eligibility_path') == 'FAST_TRACK':
+        if intent == 'affirm':
+            return 'affirm_approved', {}, 'completed'
+        if intent == 'deny':
+            return 'deny', {}, stage
+
+    return None
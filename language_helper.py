@@ -59,35 +59,62 @@ PHASE_2_TEMPLATES = {
         'verify_prompt': "To check your best offer and pre-approved limit, may I have your 10-digit mobile number?",
         'invalid_phone': "⚠️ I didn't get a valid 10-digit number. Could you please repeat your phone number?",
         'phone_not_found': "I searched our system but didn't find a record for this number. Could you verify it?",
-        'profile_found': "🎉 Great! I found your profile, {name}!\n\n**Your Profile:**\n• Credit Score: {credit_score} ✅\n• Monthly Income: ₹{income:,}\n• Pre-approved Limit: ₹{pre_approved_limit:,}\n\nNow, **how much amount do you need for your loan?**",
+        'profile_found': "🎉 Great! I found your profile, {name}!\n\n**Your Profile:**\n• Credit Score: {credit_score} ✅\n• Monthly Income: ₹{income:,}\n• Pre-approved Limit: ₹{pre_approved_limit:,}\n\n{offer_details}Now, **how much amount do you need for your loan?**",
+        'eligibility_fast': "✅ Instant approval up to ₹{amount:,}\n",
+        'eligibility_conditional': "📄 Up to ₹{amount:,} with a salary slip\n",
+        'emi_table_header': "\n**EMI on ₹{amount:,} at {rate:g}%:**\n",
+        'emi_table_line': "• {tenure_months} months: ₹{emi:,}/month\n",
+        'offer_pitch': "\n🚀 No branch visit, no waiting - your loan can be approved in minutes.\n\n",
     },
     'hindi': {
         'verify_prompt': "आपका सबसे अच्छा ऑफर देखने के लिए, कृपया अपना 10-अंकीय मोबाइल नंबर दीजिए।",
         'invalid_phone': "⚠️ मुझे सही 10-अंकीय नंबर नहीं मिला। कृपया फिर से दीजिए।",
         'phone_not_found': "मुझे यह नंबर हमारे सिस्टम में नहीं मिला। कृपया वेरिफाई करें।",
-        'profile_found': "🎉 बढ़िया! मुझे आपकी प्रोफाइल मिल गई, {name}!\n\n**आपकी प्रोफाइल:**\n• क्रेडिट स्कोर: {credit_score} ✅\n• मासिक आय: ₹{income:,}\n• पूर्व-अनुमोदित सीमा: ₹{pre_approved_limit:,}\n\nअब, **आपको कितनी रकम चाहिए?**",
+        'profile_found': "🎉 बढ़िया! मुझे आपकी प्रोफाइल मिल गई, {name}!\n\n**आपकी प्रोफाइल:**\n• क्रेडिट स्कोर: {credit_score} ✅\n• मासिक आय: ₹{income:,}\n• पूर्व-अनुमोदित सीमा: ₹{pre_approved_limit:,}\n\n{offer_details}अब, **आपको कितनी रकम चाहिए?**",
+        'eligibility_fast': "✅ ₹{amount:,} तक तुरंत मंज़ूरी\n",
+        'eligibility_conditional': "📄 सैलरी स्लिप के साथ ₹{amount:,} तक\n",
+        'emi_table_header': "\n**₹{amount:,} पर {rate:g}% की दर से EMI:**\n",
+        'emi_table_line': "• {tenure_months} महीने: ₹{emi:,}/माह\n",
+        'offer_pitch': "\n🚀 ब्रांच जाने की ज़रूरत नहीं - आपका लोन मिनटों में मंज़ूर हो सकता है।\n\n",
     },
     'hinglish': {
         'verify_prompt': "Aapka best offer dekhne ke liye, apna 10-digit mobile number dije.",
         'invalid_phone': "⚠️ Mujhe sahi 10-digit number nahi mila. Dobara dije.",
         'phone_not_found': "Yeh number hamara system mein nahi mila. Verify kar lijiye.",
-        'profile_found': "🎉 Badhiya! Aapki profile mil gyi, {name}!\n\n**Aapki Profile:**\n• Credit Score: {credit_score} ✅\n• Monthly Income: ₹{income:,}\n• Pre-approved Limit: ₹{pre_approved_limit:,}\n\nAb, **aapko kitni raqam chahiye?**",
+        'profile_found': "🎉 Badhiya! Aapki profile mil gyi, {name}!\n\n**Aapki Profile:**\n• Credit Score: {credit_score} ✅\n• Monthly Income: ₹{income:,}\n• Pre-approved Limit: ₹{pre_approved_limit:,}\n\n{offer_details}Ab, **aapko kitni raqam chahiye?**",
+        'eligibility_fast': "✅ ₹{amount:,} tak turant approval\n",
+        'eligibility_conditional': "📄 Salary slip ke saath ₹{amount:,} tak\n",
+        'emi_table_header': "\n**₹{amount:,} par {rate:g}% rate pe EMI:**\n",
+        'emi_table_line': "• {tenure_months} mahine: ₹{emi:,}/month\n",
+        'offer_pitch': "\n🚀 Branch jaane ki zaroorat nahi - aapka loan minutes mein approve ho sakta hai.\n\n",
     }
 }
 
 # Phase 2b: Eligibility Decision Templates
 PHASE_2B_TEMPLATES = {
     'english': {
-        'fast_track': "✅ Perfect! Your loan amount of ₹{amount:,} is within your pre-approved limit.\n\nYour loan is **APPROVED** at **11% interest rate**.\n\n• Monthly EMI: ₹{emi:,} (for 5 years)\n• Total Interest: ₹{total_interest:,.0f}\n\n🎉 Your sanction letter is ready! You can download it now.",
+        'fast_track': "✅ Perfect! Your loan amount of ₹{amount:,} is within your pre-approved limit.\n\nYour loan is **APPROVED** at **11% interest rate**.\n\n• Monthly EMI: ₹{emi:,} (for {tenure_months} months)\n• Total Interest: ₹{total_interest:,.0f}\n\n🎉 Your sanction letter is ready! You can download it now.",
         'conditional': "⚠️ Your requested amount of ₹{amount:,} exceeds your pre-approved limit of ₹{limit:,}.\n\nNo worries! We can still process your request with additional verification.\n\n📄 **Please upload your latest Salary Slip** for quick verification.",
+        'foir_breach': "\n\n⚠️ Note: an EMI of ₹{emi:,} would take {foir:.1f}% of your monthly income.",
+        'counter_offers': "\n\n💡 **Or choose one of these offers you already qualify for** (reply with its number):\n{offers}",
+        'counter_offer_line': "{index}. ₹{amount:,} for {tenure_months} months at {rate:g}% (EMI ₹{emi:,}/month){note}",
+        'counter_offer_documents': " - salary slip needed",
     },
     'hindi': {
-        'fast_track': "✅ बिल्कुल! आपकी ₹{amount:,} की लोन राशि आपकी पूर्व-अनुमोदित सीमा के अंदर है।\n\nआपका लोन **अनुमोदित** है **11% ब्याज दर** पर।\n\n• मासिक EMI: ₹{emi:,} (5 साल के लिए)\n• कुल ब्याज: ₹{total_interest:,.0f}\n\n🎉 आपका स्वीकृति पत्र तैयार है! अब डाउनलोड कर सकते हैं।",
+        'fast_track': "✅ बिल्कुल! आपकी ₹{amount:,} की लोन राशि आपकी पूर्व-अनुमोदित सीमा के अंदर है।\n\nआपका लोन **अनुमोदित** है **11% ब्याज दर** पर।\n\n• मासिक EMI: ₹{emi:,} ({tenure_months} महीने के लिए)\n• कुल ब्याज: ₹{total_interest:,.0f}\n\n🎉 आपका स्वीकृति पत्र तैयार है! अब डाउनलोड कर सकते हैं।",
         'conditional': "⚠️ आपकी ₹{amount:,} की मांग आपकी ₹{limit:,} की सीमा से अधिक है।\n\nचिंता न करें! हम अतिरिक्त वेरिफिकेशन के साथ आपका अनुरोध प्रोसेस कर सकते हैं।\n\n📄 **अपनी नवीनतम सैलरी स्लिप अपलोड करें** तेजी से वेरिफिकेशन के लिए।",
+        'foir_breach': "\n\n⚠️ ध्यान दें: ₹{emi:,} की EMI आपकी मासिक आय का {foir:.1f}% होगी।",
+        'counter_offers': "\n\n💡 **या इनमें से कोई ऑफर चुनें, जिनके लिए आप पहले से योग्य हैं** (उसका नंबर लिखें):\n{offers}",
+        'counter_offer_line': "{index}. ₹{amount:,}, {tenure_months} महीने, {rate:g}% ब्याज (EMI ₹{emi:,}/माह){note}",
+        'counter_offer_documents': " - सैलरी स्लिप ज़रूरी",
     },
     'hinglish': {
-        'fast_track': "✅ Bilkul! Aapki ₹{amount:,} ki loan amount aapki pre-approved limit ke andar hai.\n\nAapka loan **APPROVED** hai **11% interest rate** par.\n\n• Monthly EMI: ₹{emi:,} (5 saal ke liye)\n• Total Interest: ₹{total_interest:,.0f}\n\n🎉 Aapka sanction letter ready hai! Download kar sakte ho ab.",
+        'fast_track': "✅ Bilkul! Aapki ₹{amount:,} ki loan amount aapki pre-approved limit ke andar hai.\n\nAapka loan **APPROVED** hai **11% interest rate** par.\n\n• Monthly EMI: ₹{emi:,} ({tenure_months} months ke liye)\n• Total Interest: ₹{total_interest:,.0f}\n\n🎉 Aapka sanction letter ready hai! Download kar sakte ho ab.",
         'conditional': "⚠️ Aapki ₹{amount:,} ki maang aapki ₹{limit:,} ki limit se zyada hai.\n\nFikr mat karo! Hum additional verification se aapka request process kar sakte hain.\n\n📄 **Apni latest Salary Slip upload karo** jaldi verification ke liye.",
+        'foir_breach': "\n\n⚠️ Dhyan dein: ₹{emi:,} ki EMI aapki monthly income ka {foir:.1f}% hogi.",
+        'counter_offers': "\n\n💡 **Ya inme se koi offer chun lijiye, jiske liye aap already eligible ho** (uska number likhiye):\n{offers}",
+        'counter_offer_line': "{index}. ₹{amount:,}, {tenure_months} months, {rate:g}% interest (EMI ₹{emi:,}/month){note}",
+        'counter_offer_documents': " - salary slip chahiye",
     }
 }
 
@@ -107,6 +134,44 @@ PHASE_3_TEMPLATES = {
     }
 }
 
+# Intent replies: short answers to classified turns ("what is my EMI?", "yes")
+INTENT_TEMPLATES = {
+    'english': {
+        'emi_info': "📊 For ₹{amount:,} at **11% per annum** over {tenure_months} months, your EMI is **₹{emi:,}/month** (total interest ₹{total_interest:,.0f}).\n\nShall I go ahead with this?",
+        'rate_info': "💡 Our Personal Loan is offered at **11% per annum** with tenures up to 5 years and no hidden charges.",
+        'affirm_approved': "🎉 Wonderful! Your loan is confirmed. You can download your sanction letter from the sidebar.\n\nIs there anything else I can help you with?",
+        'deny': "No problem at all! Would you like to try a different amount or tenure instead?",
+        'tenure_out_of_range': "⏳ We can't offer a tenure of {months} months. Personal loans run from {min_months} to {max_months} months - which tenure would you like?",
+    },
+    'hindi': {
+        'emi_info': "📊 ₹{amount:,} के लिए **11% प्रति वर्ष** पर {tenure_months} महीने में आपकी EMI **₹{emi:,}/माह** होगी (कुल ब्याज ₹{total_interest:,.0f})।\n\nक्या मैं आगे बढ़ूँ?",
+        'rate_info': "💡 हमारा पर्सनल लोन **11% प्रति वर्ष** पर है, 5 साल तक की अवधि के साथ और कोई छुपा शुल्क नहीं।",
+        'affirm_approved': "🎉 बहुत बढ़िया! आपका लोन पक्का हो गया है। साइडबार से अपना स्वीकृति पत्र डाउनलोड करें।\n\nक्या मैं और कोई मदद कर सकता हूँ?",
+        'deny': "कोई बात नहीं! क्या आप कोई दूसरी राशि या अवधि आज़माना चाहेंगे?",
+        'tenure_out_of_range': "⏳ {months} महीने की अवधि उपलब्ध नहीं है। पर्सनल लोन {min_months} से {max_months} महीने के लिए मिलता है - आप कौन सी अवधि चाहेंगे?",
+    },
+    'hinglish': {
+        'emi_info': "📊 ₹{amount:,} ke liye **11% per annum** par {tenure_months} months mein aapki EMI **₹{emi:,}/month** hogi (total interest ₹{total_interest:,.0f}).\n\nKya main aage badhun?",
+        'rate_info': "💡 Hamara Personal Loan **11% per annum** par hai, 5 saal tak ki tenure ke saath aur koi hidden charges nahi.",
+        'affirm_approved': "🎉 Bahut badhiya! Aapka loan confirm ho gaya hai. Sidebar se apna sanction letter download kar lijiye.\n\nAur kuch madad chahiye?",
+        'deny': "Koi baat nahi! Kya aap koi doosri amount ya tenure try karna chahenge?",
+        'tenure_out_of_range': "⏳ {months} months ki tenure available nahi hai. Personal loan {min_months} se {max_months} months ke liye milta hai - aapko kaunsi tenure chahiye?",
+    }
+}
+
+FALLBACK_TEMPLATES = {
+    'english': {
+        'still_working': "🙏 Thanks for your patience! I'm still checking that for you. Meanwhile, is there anything else about your loan I can help with?",
+    },
+    'hindi': {
+        'still_working': "🙏 धैर्य के लिए धन्यवाद! मैं अभी इसकी जांच कर रहा हूँ। तब तक, क्या लोन के बारे में कोई और मदद कर सकता हूँ?",
+    },
+    'hinglish': {
+        'still_working': "🙏 Patience ke liye shukriya! Main abhi check kar raha hoon. Tab tak, loan ke baare mein aur kuch madad chahiye?",
+    }
+}
+
+
 def get_response_template(phase: int, message_type: str, language: str, **kwargs) -> str:
     """
     Get template-based response for faster, consistent answers
@@ -116,6 +181,8 @@ def get_response_template(phase: int, message_type: str, language: str, **kwargs
         2: PHASE_2_TEMPLATES,
         2.5: PHASE_2B_TEMPLATES,
         3: PHASE_3_TEMPLATES,
+        'intent': INTENT_TEMPLATES,
+        'fallback': FALLBACK_TEMPLATES,
     }
     
     if phase not in templates_map:
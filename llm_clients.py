@@ -0,0 +1,194 @@
+"""
+llm_clients.py - Shared, pooled LLM client handles
+Creates each provider client once per process and reuses its HTTP connections
+(keep-alive, bounded pool) instead of re-configuring on every request.
+Tracks per-provider request, connection and latency stats.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Pool sizing (per provider)
+MAX_CONNECTIONS = int(os.getenv('LLM_POOL_MAX_CONNECTIONS', '20'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_POOL_MAX_KEEPALIVE', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('LLM_POOL_KEEPALIVE_EXPIRY', '60'))
+DEFAULT_TIMEOUT = float(os.getenv('LLM_HTTP_TIMEOUT', '60'))
+
+# Number of recent latencies kept per provider for percentiles
+LATENCY_WINDOW = 500
+
+
+class ProviderStats:
+    """Request, connection and latency counters for one provider."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clients_created = 0
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.latencies_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def record_request(self, latency_ms: float, ok: bool = True):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.latencies_ms.append(latency_ms)
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile (0-100) over the recent window, None if no samples."""
+        with self._lock:
+            samples = sorted(self.latencies_ms)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self.latencies_ms)
+            requests = self.requests
+            connections = self.connections_opened
+            data = {
+                'clients_created': self.clients_created,
+                'requests': requests,
+                'errors': self.errors,
+                'connections_opened': connections,
+            }
+        data['connection_reuse_ratio'] = (1 - connections / requests) if requests else None
+        data['avg_latency_ms'] = sum(samples) / len(samples) if samples else None
+        data['p50_latency_ms'] = self.percentile(50)
+        data['p95_latency_ms'] = self.percentile(95)
+        return data
+
+
+class ClientManager:
+    """
+    Process-wide registry of provider clients.
+
+    Every provider gets one httpx.Client with a bounded keep-alive pool; SDK
+    clients (Groq, Gemini) are built on top of it once and then reused.
+    """
+
+    _lock = threading.Lock()
+    _http_clients: Dict[str, httpx.Client] = {}
+    _groq_client = None
+    _gemini_models: Dict[str, Any] = {}
+    _gemini_configured_key: Optional[str] = None
+    _stats: Dict[str, ProviderStats] = {}
+
+    @staticmethod
+    def stats_for(provider: str) -> ProviderStats:
+        """Get (or create) the stats object for a provider."""
+        with ClientManager._lock:
+            if provider not in ClientManager._stats:
+                ClientManager._stats[provider] = ProviderStats()
+            return ClientManager._stats[provider]
+
+    @staticmethod
+    def http_client(provider: str) -> httpx.Client:
+        """Pooled keep-alive HTTP client for a provider, created on first use."""
+        client = ClientManager._http_clients.get(provider)
+        if client is not None:
+            return client
+
+        stats = ClientManager.stats_for(provider)
+        with ClientManager._lock:
+            client = ClientManager._http_clients.get(provider)
+            if client is None:
+                def _trace(event_name: str, info: Dict[str, Any]):
+                    # httpcore emits this once per new TCP connection; reused ones skip it
+                    if event_name == 'connection.connect_tcp.complete':
+                        stats.record_connection()
+
+                def _attach_trace(request: httpx.Request):
+                    request.extensions['trace'] = _trace
+
+                client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=DEFAULT_TIMEOUT,
+                    event_hooks={'request': [_attach_trace]},
+                )
+                ClientManager._http_clients[provider] = client
+        return client
+
+    @staticmethod
+    def groq():
+        """Shared Groq SDK client, or None if GROQ_API_KEY is not set."""
+        if ClientManager._groq_client is not None:
+            return ClientManager._groq_client
+
+        api_key = os.getenv('GROQ_API_KEY')
+        if not api_key:
+            return None
+
+        from groq import Groq
+
+        http_client = ClientManager.http_client('groq')
+        with ClientManager._lock:
+            if ClientManager._groq_client is None:
+                ClientManager._groq_client = Groq(api_key=api_key, http_client=http_client)
+                ClientManager._stats['groq'].clients_created += 1
+        return ClientManager._groq_client
+
+    @staticmethod
+    def gemini_model(model_name: str, api_key: Optional[str] = None):
+        """Shared GenerativeModel per model name, or None if GEMINI_API_KEY is not set."""
+        key = api_key or os.getenv('GEMINI_API_KEY')
+        if not key:
+            return None
+
+        import google.generativeai as genai
+
+        stats = ClientManager.stats_for('gemini')
+        with ClientManager._lock:
+            if ClientManager._gemini_configured_key != key:
+                genai.configure(api_key=key)
+                ClientManager._gemini_configured_key = key
+                ClientManager._gemini_models.clear()
+            model = ClientManager._gemini_models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                ClientManager._gemini_models[model_name] = model
+                stats.clients_created += 1
+        return model
+
+    @staticmethod
+    def record(provider: str, latency_ms: float, ok: bool = True):
+        """Record one provider call."""
+        ClientManager.stats_for(provider).record_request(latency_ms, ok)
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, Any]]:
+        """Per-provider connection and latency stats."""
+        with ClientManager._lock:
+            providers = list(ClientManager._stats.items())
+        return {name: stats.snapshot() for name, stats in providers}
+
+    @staticmethod
+    def close():
+        """Close pooled connections (e.g. on shutdown or in tests)."""
+        with ClientManager._lock:
+            for client in ClientManager._http_clients.values():
+                client.close()
+            ClientManager._http_clients.clear()
+            ClientManager._groq_client = None
+            ClientManager._gemini_models.clear()
+            ClientManager._gemini_configured_key = None
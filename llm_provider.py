@@ -0,0 +1,393 @@
+"""
+llm_provider.py - Unified LLM provider layer with latency-aware failover
+One interface over Groq and Gemini with:
+- Per-call deadlines (a hung provider can never hang the Streamlit turn),
+  with a shorter per-attempt timeout so a hung primary still leaves time
+  to fail over
+- Retries with jittered exponential backoff
+- A circuit breaker per provider
+- Optional hedged requests: fire the secondary provider if the primary
+  has not answered within its observed p95 latency
+- Groq calls wait for the process-wide GROQ_LIMITER quota in their
+  provider's priority lane (interactive unless built for background work)
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional
+
+import llm_replay
+from groq_integration import GROQ_LIMITER
+from llm_clients import ClientManager
+from rate_limiter import PRIORITY_INTERACTIVE, RateLimiter, is_rate_limited, retry_after
+from utils import estimate_tokens
+
+DEFAULT_DEADLINE_S = float(os.getenv('LLM_DEADLINE_S', '8'))
+DEFAULT_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '1'))
+HEDGE_ENABLED = os.getenv('LLM_HEDGE', '0') == '1'
+
+# Share of the deadline one provider may use while another is still queued behind it
+PRIMARY_SHARE = float(os.getenv('LLM_PRIMARY_SHARE', '0.5'))
+
+# Hedge delay used until a provider has enough latency samples for a p95
+DEFAULT_HEDGE_DELAY_S = 1.5
+MIN_SAMPLES_FOR_P95 = 20
+
+# Shared worker pool; calls run here so the caller can stop waiting at the deadline
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='llm')
+
+
+class ProviderError(Exception):
+    """Raised by a provider when a call fails or returns nothing usable."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failures in a row;
+    open -> half_open after `reset_timeout` seconds (one trial call);
+    half_open -> closed on success, back to open on failure.
+
+    While the trial is in flight every other caller is refused; a trial that
+    never reports back is given up after another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.trial_at = 0.0
+        self._lock = threading.Lock()
+
+    def _permits(self, now: float) -> bool:
+        # Caller holds the lock
+        if self.state == 'closed':
+            return True
+        if self.state == 'open':
+            return now - self.opened_at >= self.reset_timeout
+        return now - self.trial_at >= self.reset_timeout
+
+    def available(self) -> bool:
+        """Whether allow() would let a call through, without taking the trial."""
+        with self._lock:
+            return self._permits(time.monotonic())
+
+    def allow(self) -> bool:
+        """Take permission for one call; past an open circuit only one caller gets the trial."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._permits(now):
+                return False
+            if self.state != 'closed':
+                self.state = 'half_open'
+                self.trial_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker_for(provider_name: str) -> CircuitBreaker:
+    """One shared breaker per provider, whichever router is calling it."""
+    with _BREAKERS_LOCK:
+        if provider_name not in _BREAKERS:
+            _BREAKERS[provider_name] = CircuitBreaker()
+        return _BREAKERS[provider_name]
+
+
+def reset_breakers():
+    """Close every breaker (between benchmark runs or tests)."""
+    with _BREAKERS_LOCK:
+        for breaker in _BREAKERS.values():
+            breaker.record_success()
+
+
+class LLMProvider:
+    """Base class: one text-completion backend."""
+
+    name = 'base'
+
+    # Account quota to wait for before a live call, and the lane to wait in
+    limiter: Optional[RateLimiter] = None
+    priority = PRIORITY_INTERACTIVE
+
+    def __init__(self):
+        self.breaker = breaker_for(self.name)
+
+    def is_available(self) -> bool:
+        raise NotImplementedError
+
+    def _complete(self, prompt: str, max_tokens: int, timeout: float,
+                  json_mode: bool = False) -> Optional[str]:
+        raise NotImplementedError
+
+    def usable(self) -> bool:
+        """Configured; when replaying, whether the cassette has calls to this provider."""
+        if llm_replay.is_replaying():
+            return llm_replay.has_recordings(self.name)
+        return self.is_available()
+
+    def complete(self, prompt: str, max_tokens: int, timeout: float, json_mode: bool = False) -> str:
+        """Run one call, record latency, and raise ProviderError on any failure."""
+        mode = llm_replay.mode()
+        model = getattr(self, 'model', '')
+        key = llm_replay.request_key(self.name, model, prompt, max_tokens, json_mode,
+                                     getattr(self, 'temperature', None)) if mode != 'live' else None
+        
+        if mode != 'replay' and self.limiter is not None:
+            queued = time.perf_counter()
+            if not self.limiter.acquire_blocking(estimate_tokens(prompt) + max_tokens, self.priority, timeout):
+                raise ProviderError(f"{self.name}: no rate-limit quota within {timeout:.1f}s")
+            timeout = max(0.1, timeout - (time.perf_counter() - queued))
+
+        start = time.perf_counter()
+        try:
+            if mode == 'replay':
+                text = llm_replay.replay_call(key, timeout)
+            else:
+                text = self._complete(prompt, max_tokens, timeout, json_mode=json_mode)
+        except Exception as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            ClientManager.record(self.name, latency_ms, ok=False)
+            if self.limiter is not None and is_rate_limited(e):
+                self.limiter.penalize(retry_after(e))
+            if mode == 'record':
+                llm_replay.cassette().record(key, self.name, model, prompt, None, latency_ms, error=str(e))
+            raise ProviderError(f"{self.name}: {e}") from e
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        if mode == 'record':
+            llm_replay.cassette().record(key, self.name, model, prompt, text, latency_ms)
+        ok = bool(text and text.strip())
+        ClientManager.record(self.name, latency_ms, ok=ok)
+        if not ok:
+            raise ProviderError(f"{self.name}: empty response")
+        return text
+
+    def p95_seconds(self) -> Optional[float]:
+        """Observed p95 latency, or None until enough samples exist."""
+        stats = ClientManager.stats_for(self.name)
+        if len(stats.latencies_ms) < MIN_SAMPLES_FOR_P95:
+            return None
+        return stats.percentile(95) / 1000.0
+
+
+class GroqProvider(LLMProvider):
+    """Groq chat completions through the pooled ClientManager client."""
+
+    name = 'groq'
+    limiter = GROQ_LIMITER
+
+    def __init__(self, model: str = 'llama-3.3-70b-versatile', temperature: float = 0.7,
+                 priority: int = PRIORITY_INTERACTIVE):
+        super().__init__()
+        self.model = model
+        self.temperature = temperature
+        self.priority = priority
+
+    def is_available(self) -> bool:
+        return ClientManager.groq() is not None
+
+    def _complete(self, prompt: str, max_tokens: int, timeout: float,
+                  json_mode: bool = False) -> Optional[str]:
+        client = ClientManager.groq().with_options(timeout=timeout, max_retries=0)
+        extra = {'response_format': {'type': 'json_object'}} if json_mode else {}
+        message = client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=self.temperature,
+            **extra
+        )
+        return message.choices[0].message.content
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini generate_content through the shared ClientManager model."""
+
+    name = 'gemini'
+
+    def __init__(self, model: str = 'gemini-2.5-flash', temperature: float = 0.7):
+        super().__init__()
+        self.model = model
+        self.temperature = temperature
+
+    def is_available(self) -> bool:
+        return ClientManager.gemini_model(self.model) is not None
+
+    def _complete(self, prompt: str, max_tokens: int, timeout: float,
+                  json_mode: bool = False) -> Optional[str]:
+        import google.generativeai as genai
+
+        model = ClientManager.gemini_model(self.model)
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=self.temperature,
+                max_output_tokens=max_tokens,
+                response_mime_type='application/json' if json_mode else None
+            ),
+            request_options={'timeout': timeout}
+        )
+        return response.text
+
+
+class ProviderRouter:
+    """
+    Ordered failover across providers within a single deadline.
+
+    Returns None (like GroqClient.generate_text) when no provider answers in
+    time, so callers keep their existing fallback handling.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        deadline_s: float = DEFAULT_DEADLINE_S,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base_s: float = 0.2,
+        backoff_cap_s: float = 2.0,
+        hedge: bool = HEDGE_ENABLED,
+        attempt_timeout_s: Optional[float] = None
+    ):
+        self.providers = providers
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_cap_s = backoff_cap_s
+        self.hedge = hedge
+        self.attempt_timeout_s = attempt_timeout_s
+
+    def is_available(self) -> bool:
+        return any(p.usable() for p in self.providers)
+
+    def generate(self, prompt: str, max_tokens: int = 500, deadline_s: Optional[float] = None,
+                 json_mode: bool = False) -> Optional[str]:
+        """
+        Generate text from the first provider that answers before the deadline.
+
+        Args:
+            prompt: The prompt to send
+            max_tokens: Maximum tokens in response
+            deadline_s: Overrides the router's per-call deadline
+            json_mode: Ask the provider for a JSON object response
+
+        Returns:
+            Generated text or None if every provider failed or timed out
+        """
+        budget = deadline_s if deadline_s is not None else self.deadline_s
+        deadline_at = time.monotonic() + budget
+        attempt_s = self.attempt_timeout_s if self.attempt_timeout_s is not None else budget * PRIMARY_SHARE
+        # Breakers are only peeked here; each attempt takes its own permission
+        candidates = [p for p in self.providers if p.usable() and p.breaker.available()]
+
+        if self.hedge and len(candidates) >= 2:
+            text = self._hedged(candidates[0], candidates[1], prompt, max_tokens, deadline_at, json_mode)
+            if text is not None:
+                return text
+            candidates = candidates[2:]
+
+        for i, provider in enumerate(candidates):
+            # Every provider but the last stops early enough to leave the next one time
+            limit_s = attempt_s if i < len(candidates) - 1 else None
+            text = self._with_retries(provider, prompt, max_tokens, deadline_at, json_mode, limit_s)
+            if text is not None:
+                return text
+        return None
+
+    def _with_retries(self, provider: LLMProvider, prompt: str, max_tokens: int,
+                      deadline_at: float, json_mode: bool = False,
+                      attempt_s: Optional[float] = None) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0 or not provider.breaker.allow():
+                return None
+            if attempt_s is not None:
+                remaining = min(remaining, attempt_s)
+
+            future = _EXECUTOR.submit(provider.complete, prompt, max_tokens, remaining, json_mode)
+            done, _ = wait([future], timeout=remaining)
+            if future in done and future.exception() is None:
+                provider.breaker.record_success()
+                return future.result()
+
+            provider.breaker.record_failure()
+            if future not in done:
+                # Attempt timed out: stop waiting, the worker finishes on its own
+                print(f"LLM provider {provider.name} timed out")
+                return None
+            print(f"LLM provider error: {future.exception()}")
+
+            if attempt < self.max_retries:
+                backoff = random.uniform(0, min(self.backoff_cap_s, self.backoff_base_s * 2 ** attempt))
+                time.sleep(max(0.0, min(backoff, deadline_at - time.monotonic())))
+        return None
+
+    def _hedged(self, primary: LLMProvider, secondary: LLMProvider, prompt: str,
+                max_tokens: int, deadline_at: float, json_mode: bool = False) -> Optional[str]:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        if not primary.breaker.allow():
+            return self._with_retries(secondary, prompt, max_tokens, deadline_at, json_mode)
+
+        owners = {}
+        primary_future = _EXECUTOR.submit(primary.complete, prompt, max_tokens, remaining, json_mode)
+        owners[primary_future] = primary
+
+        hedge_delay = primary.p95_seconds() or DEFAULT_HEDGE_DELAY_S
+        done, _ = wait([primary_future], timeout=min(hedge_delay, remaining))
+        if primary_future in done and primary_future.exception() is None:
+            primary.breaker.record_success()
+            return primary_future.result()
+
+        # Primary is slow (or already failed): race the secondary against it
+        remaining = deadline_at - time.monotonic()
+        if remaining > 0 and secondary.breaker.allow():
+            secondary_future = _EXECUTOR.submit(secondary.complete, prompt, max_tokens, remaining, json_mode)
+            owners[secondary_future] = secondary
+
+        pending = set(owners)
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = owners[future]
+                if future.exception() is None:
+                    provider.breaker.record_success()
+                    return future.result()
+                provider.breaker.record_failure()
+                print(f"LLM provider error: {future.exception()}")
+
+        for future in pending:
+            owners[future].breaker.record_failure()
+        return None
+
+
+# Default routers: Groq first for the chat agent, Gemini first for RAG answers
+CHAT_ROUTER = ProviderRouter([GroqProvider(), GeminiProvider('gemini-2.5-flash')])
+RAG_ROUTER = ProviderRouter([
+    GeminiProvider('gemini-flash-latest', temperature=0.1),
+    GroqProvider(temperature=0.1)
+])
@@ -0,0 +1,169 @@
+"""
+llm_replay.py - Record/replay of LLM calls for offline, repeatable runs
+Sits under every LLMProvider (so the chat agent, RAG answers and summaries
+are all covered):
+
+- live:   call the providers (default)
+- record: call the providers and append every request -> response (or
+          error) with its latency to a JSONL cassette
+- replay: serve responses from the cassette without any network, optionally
+          sleeping the recorded latency (scaled) to benchmark the pipeline
+
+Configure with BANKGPT_LLM_MODE, BANKGPT_LLM_CASSETTE and
+BANKGPT_REPLAY_LATENCY (0 = no delay, 1 = recorded latency, 0.5 = half, ...).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MODES = ('live', 'record', 'replay')
+
+DEFAULT_CASSETTE = 'eval/llm_cassette.jsonl'
+
+
+def request_key(provider: str, model: str, prompt: str, max_tokens: int,
+                json_mode: bool = False, temperature: Optional[float] = None) -> str:
+    """Stable identity of one completion request."""
+    payload = json.dumps([provider, model, prompt, max_tokens, bool(json_mode), temperature],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded calls in a JSONL file.
+
+    The same request recorded several times is replayed in recording order
+    (cycling), so repeated identical prompts stay deterministic.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self.providers = set()
+        self.hits = 0
+        self.misses = 0
+        if Path(path).exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        self._entries[entry['key']].append(entry)
+                        self.providers.add(entry['provider'])
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, key: str, provider: str, model: str, prompt: str, response: Optional[str],
+               latency_ms: float, error: Optional[str] = None):
+        entry = {
+            'key': key,
+            'provider': provider,
+            'model': model,
+            'prompt_preview': prompt[-200:],
+            'response': response,
+            'error': error,
+            'latency_ms': round(latency_ms, 1)
+        }
+        with self._lock:
+            self._entries[key].append(entry)
+            self.providers.add(provider)
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def replay(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            entry = entries[self._cursor[key] % len(entries)]
+            self._cursor[key] += 1
+            self.hits += 1
+            return entry
+
+    def rewind(self):
+        """Start replaying every request from its first recording again."""
+        with self._lock:
+            self._cursor.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_MODE = os.getenv('BANKGPT_LLM_MODE', 'live')
+_LATENCY_SCALE = float(os.getenv('BANKGPT_REPLAY_LATENCY', '0'))
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_PATH = os.getenv('BANKGPT_LLM_CASSETTE', DEFAULT_CASSETTE)
+_CASSETTE_LOCK = threading.Lock()
+
+
+def configure(mode: str, cassette_path: Optional[str] = None, latency_scale: Optional[float] = None):
+    """Switch mode at runtime (benchmarks, tests)."""
+    global _MODE, _CASSETTE, _CASSETTE_PATH, _LATENCY_SCALE
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM mode {mode!r}, expected one of {MODES}")
+    with _CASSETTE_LOCK:
+        _MODE = mode
+        if cassette_path is not None and cassette_path != _CASSETTE_PATH:
+            _CASSETTE_PATH = cassette_path
+            _CASSETTE = None
+        if latency_scale is not None:
+            _LATENCY_SCALE = latency_scale
+
+
+def mode() -> str:
+    return _MODE
+
+
+def is_replaying() -> bool:
+    return _MODE == 'replay'
+
+
+def has_recordings(provider: str) -> bool:
+    """Whether the cassette holds any call to this provider (replay availability)."""
+    return provider in cassette().providers
+
+
+def latency_scale() -> float:
+    return _LATENCY_SCALE
+
+
+def cassette() -> Cassette:
+    """The active cassette, loaded on first use."""
+    global _CASSETTE
+    with _CASSETTE_LOCK:
+        if _CASSETTE is None:
+            _CASSETTE = Cassette(_CASSETTE_PATH)
+        return _CASSETTE
+
+
+def replay_call(key: str, timeout: float) -> Optional[str]:
+    """
+    Serve one recorded call, sleeping the scaled recorded latency.
+
+    Raises RuntimeError for a recorded failure, a missing recording, or a
+    recorded latency that exceeds the caller's timeout.
+    """
+    entry = cassette().replay(key)
+    if entry is None:
+        raise RuntimeError("no recording for this request")
+
+    delay = entry['latency_ms'] / 1000.0 * _LATENCY_SCALE
+    if delay > timeout:
+        time.sleep(timeout)
+        raise RuntimeError("replayed call exceeded its timeout")
+    if delay > 0:
+        time.sleep(delay)
+    if entry.get('error'):
+        raise RuntimeError(entry['error'])
+    return entry['response']
@@ -0,0 +1,116 @@
+"""
+loan_math.py - Vectorised loan arithmetic: EMI, FOIR, interest, amortisation
+Array versions of utils.compute_emi and utils.compute_foir for whole
+portfolios. Every function broadcasts its arguments (scalars and arrays mix
+freely) and evaluates the same expressions in the same order as the scalar
+functions, so results match them bit for bit.
+
+The one exception is the growth factor (1 + r) ** n: NumPy's SIMD pow can
+differ from Python's in the last bit, so it is evaluated with Python's pow
+once per distinct (rate, tenure) pair and gathered. Portfolios use a handful
+of rates and tenures; past MAX_EXACT_TERMS pairs NumPy's pow is used
+instead (within one ulp).
+
+Rates are annual percentages and tenures are in months, as in utils.
+"""
+
+from typing import Dict, Iterator
+
+import numpy as np
+
+INCOME_MISSING_FOIR = 999.0
+MAX_EXACT_TERMS = 65536
+
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+
+def _growth(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """(1 + r) ** n, computed as Python computes it (see module docstring)."""
+    r, n = np.broadcast_arrays(r, n)
+    rates, rate_idx = np.unique(r, return_inverse=True)
+    terms, term_idx = np.unique(n, return_inverse=True)
+    if len(rates) * len(terms) > MAX_EXACT_TERMS:
+        return (1 + r) ** n
+    table = np.array([[(1 + rate) ** term for term in terms.tolist()] for rate in rates.tolist()])
+    return table.reshape(len(rates), len(terms))[rate_idx.reshape(r.shape), term_idx.reshape(n.shape)]
+
+
+def emi(principal, annual_rate_percent, tenure_months) -> np.ndarray:
+    """Monthly instalment per loan (utils.compute_emi over arrays)."""
+    rate = np.asarray(annual_rate_percent, dtype=np.float64)
+    n = np.asarray(tenure_months, dtype=np.float64)
+    growth = _growth(rate / 100.0 / 12.0, n)
+    principal, rate, n, growth = _arrays(principal, rate, n, growth)
+    r = rate / 100.0 / 12.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortising = principal * r * growth / (growth - 1)
+        return np.where(r == 0, principal / n, amortising)
+
+
+def foir(monthly_income, existing_emis_total, new_emi) -> np.ndarray:
+    """Fixed obligations as a percentage of income (utils.compute_foir over arrays)."""
+    income, existing, new = _arrays(monthly_income, existing_emis_total, new_emi)
+    fixed_obligations = existing + new
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(income == 0, INCOME_MISSING_FOIR, (fixed_obligations / income) * 100.0)
+
+
+def total_interest(principal, annual_rate_percent, tenure_months) -> np.ndarray:
+    """Interest paid over the life of each loan at its EMI."""
+    principal, rate, n = _arrays(principal, annual_rate_percent, tenure_months)
+    return emi(principal, rate, n) * n - principal
+
+
+def amortisation_schedule(principal, annual_rate_percent, tenure_months) -> Dict[str, np.ndarray]:
+    """
+    Month-by-month schedule for every loan.
+
+    Months run down the columns, one row per loan, up to the longest tenure;
+    months after a loan's own tenure are zero. Each month charges interest
+    on the opening balance and the rest of the EMI repays principal; the
+    final month repays whatever balance remains, so every loan closes at 0.
+
+    Args:
+        principal, annual_rate_percent, tenure_months: Scalars or arrays
+
+    Returns:
+        'month' (1..longest tenure) and (loans x months) arrays 'payment',
+        'interest', 'principal' and 'balance' (closing balance)
+    """
+    principal, rate, n = (a.ravel() for a in _arrays(principal, annual_rate_percent, tenure_months))
+    loans = len(principal)
+    months = int(n.max()) if loans else 0
+    r = rate / 100.0 / 12.0
+    instalment = emi(principal, rate, n)
+
+    schedule = {key: np.zeros((loans, months)) for key in ('payment', 'interest', 'principal', 'balance')}
+    schedule['month'] = np.arange(1, months + 1)
+    balance = principal.copy()
+    for m in range(months):
+        active = m < n
+        last = m == n - 1
+        interest = balance * r
+        repaid = np.where(last, balance, instalment - interest)
+        schedule['interest'][:, m] = np.where(active, interest, 0.0)
+        schedule['principal'][:, m] = np.where(active, repaid, 0.0)
+        schedule['payment'][:, m] = np.where(active, interest + repaid, 0.0)
+        balance = np.where(active, balance - repaid, 0.0)
+        schedule['balance'][:, m] = balance
+    return schedule
+
+
+def iter_schedules(principal, annual_rate_percent, tenure_months,
+                   chunk_size: int = 10000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    amortisation_schedule in chunks of loans, for portfolios whose full
+    schedules would not fit in memory (1M loans x 360 months is ~11 GB).
+    Each chunk also carries 'start', the index of its first loan.
+    """
+    principal, rate, n = (a.ravel() for a in _arrays(principal, annual_rate_percent, tenure_months))
+    for start in range(0, len(principal), chunk_size):
+        end = start + chunk_size
+        chunk = amortisation_schedule(principal[start:end], rate[start:end], n[start:end])
+        chunk['start'] = start
+        yield chunk
@@ -178,7 +178,11 @@ class PerformanceMonitor:
         
         start_time = PerformanceMonitor._timers.pop(event_name)
         duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-        
+        PerformanceMonitor.record(event_name, duration_ms, metadata)
+    
+    @staticmethod
+    def record(event_name: str, duration_ms: float, metadata: Optional[Dict] = None):
+        """Log an already-measured duration (e.g. time-to-first-token)."""
         entry = {
             'timestamp': datetime.now().isoformat(),
             'event': event_name,
@@ -196,6 +200,46 @@ class PerformanceMonitor:
             logger.warning(f"{event_name} took {duration_ms:.0f}ms (slow)")
 
 
+class ConversationMetrics:
+    """Track how many turns conversations need to reach an eligibility decision."""
+    
+    _decisions = {}
+    
+    @staticmethod
+    def record_decision(turns: int, mode: str = 'default', metadata: Optional[Dict] = None):
+        """Record that a conversation reached a decision after `turns` user turns."""
+        count, total = ConversationMetrics._decisions.get(mode, (0, 0))
+        ConversationMetrics._decisions[mode] = (count + 1, total + turns)
+        
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'event': 'TURNS_TO_DECISION',
+            'mode': mode,
+            'turns': turns,
+            'metadata': metadata or {}
+        }
+        try:
+            with open(PerformanceMonitor.METRICS_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        except Exception as e:
+            logger.error(f"Failed to write metric: {e}")
+    
+    @staticmethod
+    def average_turns_to_decision(mode: Optional[str] = None) -> Optional[float]:
+        """Average turns to decision for one mode, or across all modes."""
+        if mode is not None:
+            buckets = [ConversationMetrics._decisions.get(mode, (0, 0))]
+        else:
+            buckets = list(ConversationMetrics._decisions.values())
+        count = sum(c for c, _ in buckets)
+        total = sum(t for _, t in buckets)
+        return (total / count) if count else None
+    
+    @staticmethod
+    def reset():
+        ConversationMetrics._decisions = {}
+
+
 # Helper functions for common logging patterns
 def log_conversation_start(phone: Optional[str] = None):
     """Log start of new conversation."""
@@ -13,21 +13,52 @@ Smart context tracking to avoid duplicate questions
 """
 
 import json
-from pathlib import Path
-from typing import Dict, Any, Optional
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from agents import load_db, verification_agent, fraud_agent, underwriting_agent, sanction_agent
 from language_helper import detect_language
-from groq_integration import GroqClient
+from llm_provider import CHAT_ROUTER
+from logger import ConversationMetrics, PerformanceMonitor
+from template_router import TemplateRouter
+from utils import compute_emi, estimate_tokens
+from extraction import extract_all, extract_choice, normalize
+from intent_router import get_intent_classifier, route_intent
+from conversation_summary import ConversationSummary
+from offer_cache import OfferCache
+from policy_engine import decide, get_policy
 
-DATA_PATH = Path('data/mock_db.json')
+# One LLM call returns the reply and the extracted slots as JSON
+STRUCTURED_OUTPUT = os.getenv('BANKGPT_STRUCTURED_OUTPUT', '0') == '1'
+
+STRUCTURED_INTENTS = ('provide_phone', 'provide_amount', 'affirm', 'deny', 'question', 'other')
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """
+
+OUTPUT FORMAT:
+Respond with ONLY a JSON object with these keys:
+{"reply": "<your response to the customer>",
+ "phone": "<10-digit phone number from the customer's latest message, or null>",
+ "requested_amount": <loan amount in rupees as an integer, e.g. "paanch lakh" -> 500000, or null>,
+ "intent": "<one of: provide_phone, provide_amount, affirm, deny, question, other>"}"""
+
+# Per-turn latency budget: past it the stage template is served and the LLM
+# answer is only logged when it arrives
+TURN_SLO_S = float(os.getenv('BANKGPT_TURN_SLO_S', '2.0'))
+
+_TURN_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='turn')
+
+# Accepted loan amounts (same range as the regex extractor)
+MIN_LOAN_AMOUNT = 100000
+MAX_LOAN_AMOUNT = 100000000
 
 
 def load_mock_db():
-    """Load mock CRM database."""
-    if DATA_PATH.exists():
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    """Mock CRM database, served from the shared in-memory store."""
+    return load_db()
 
 
 def run_unified_agent(user_input: str, state: Dict[str, Any], conversation_history: list) -> Dict[str, Any]:
@@ -74,68 +105,111 @@ def run_unified_agent(user_input: str, state: Dict[str, Any], conversation_histo
     # FIRST TURN: Show greeting
     if not conversation_history:
         greeting = _get_greeting(detected_language)
+        TemplateRouter.record_turn(served_by_template=True)
         return {
             'message': greeting,
             'detected_language': detected_language,
-            'conversation_stage': 'phone_asked'  # Next stage: ask for phone
+            'conversation_stage': 'phone_asked',  # Next stage: ask for phone
+            'served_by': 'template'
         }
     
-    # SUBSEQUENT TURNS: Use LLM to drive conversation naturally
+    # SUBSEQUENT TURNS: Templates for scripted stages, LLM for free-form turns
     try:
-        client = GroqClient()
+        turn_start = time.perf_counter()
+        summary = _session_summary(state)
         
-        # Build conversation context from history
-        history_context = _build_history_context(conversation_history, detected_language)
+        # Extract structured information from user input and state
+        extracted_info = _extract_information(user_input, state, conversation_history, detected_language)
         
-        # Build current state context with stage awareness
-        state_context = _build_state_context_with_stage(state, current_stage, detected_language)
+        # Determine next stage
+        next_stage = _determine_next_stage(current_stage, extracted_info, state)
         
-        # System prompt that guides the conversation based on stage
-        system_prompt = _get_stage_aware_system_prompt(detected_language, state, current_stage)
+        # Deterministic turns (profile found, approval with EMI, salary slip
+        # request, phone prompts) are answered without an LLM round-trip
+        response = TemplateRouter.route(user_input, current_stage, extracted_info, state, detected_language)
+        served_by = 'template'
+        prompt_tokens = 0
+        prefix_tokens = 0
         
-        # Build the full prompt
-        full_prompt = f"""{system_prompt}
-
-CONVERSATION STAGE: {current_stage.upper()}
-
-CONVERSATION HISTORY:
-{history_context}
-
-CURRENT STATE:
-{state_context}
-
-Customer's latest message: "{user_input}"
-
-Based on the conversation stage, history, and current state, generate the next response.
-
-STAGE-SPECIFIC INSTRUCTIONS for stage '{current_stage}':
-{_get_stage_instructions(current_stage)}
-
-Your response should:
-1. Be natural and conversational
-2. Acknowledge the customer's input
-3. Move to the next stage appropriately
-4. Keep responses under 150 words
-5. Be warm and professional
-
-Generate only the bot's response, no explanations or meta-commentary."""
+        # Short classified turns ("yes", "nahi", "what is my EMI?") next
+        intent = None
+        if response is None:
+            response, next_stage, intent = _intent_reply(
+                user_input, current_stage, next_stage, {**state, **extracted_info}, detected_language
+            )
+            if response is not None:
+                served_by = 'intent'
         
-        # Generate response with Groq LLM
-        response = GroqClient.generate_text(full_prompt, max_tokens=300)
+        if response is None:
+            served_by = 'llm'
+            full_prompt = _build_full_prompt(user_input, state, conversation_history,
+                                             current_stage, detected_language, summary=summary)
+            if STRUCTURED_OUTPUT:
+                full_prompt += STRUCTURED_OUTPUT_INSTRUCTIONS
+            prompt_tokens = estimate_tokens(full_prompt)
+            prefix_tokens = estimate_tokens(_get_static_system_prompt(detected_language))
+            
+            # Generate response (Groq first, Gemini failover), bounded by the turn SLO
+            llm_future = _TURN_EXECUTOR.submit(CHAT_ROUTER.generate, full_prompt, 300, None, STRUCTURED_OUTPUT)
+            try:
+                response = llm_future.result(timeout=max(0.0, TURN_SLO_S - (time.perf_counter() - turn_start)))
+            except FuturesTimeout:
+                served_by = 'degraded'
+                response = TemplateRouter.stage_reply(next_stage, {**state, **extracted_info}, detected_language)
+                _record_degraded_turn(llm_future, turn_start, current_stage, prompt_tokens)
+            
+            if STRUCTURED_OUTPUT and served_by == 'llm':
+                structured = _parse_structured_reply(response)
+                if structured is None:
+                    # Not valid JSON: keep plain text replies, drop malformed JSON
+                    if response and response.lstrip().startswith('{'):
+                        response = None
+                else:
+                    response = structured['reply']
+                    llm_slots = {k: structured[k] for k in ('phone', 'requested_amount') if structured.get(k)}
+                    if llm_slots:
+                        extracted_info = _extract_information(user_input, state, conversation_history,
+                                                              detected_language, llm_slots=llm_slots)
+                        next_stage = _determine_next_stage(current_stage, extracted_info, state)
+                        # Slots the regexes missed can make the turn deterministic after all
+                        response = TemplateRouter.route(user_input, current_stage, extracted_info,
+                                                         state, detected_language) or response
+            
+            if not response or len(response.strip()) < 5:
+                # No provider answered: a canned apology, not an LLM turn
+                served_by = 'llm_failed'
+                response = "I'm having trouble processing that. Could you please rephrase?"
         
-        if not response or len(response.strip()) < 5:
-            response = "I'm having trouble processing that. Could you please rephrase?"
+        turn_count = state.get('turn_count', 0) + 1
+        if extracted_info.get('eligibility_path') and not state.get('eligibility_path'):
+            ConversationMetrics.record_decision(
+                turn_count,
+                mode='structured' if STRUCTURED_OUTPUT else 'regex',
+                metadata={'eligibility_path': extracted_info['eligibility_path']}
+            )
         
-        # Extract structured information from user input and state
-        extracted_info = _extract_information(user_input, state, conversation_history, detected_language)
+        # Fold turns that left the raw window into the summary for the next turn
+        summary.schedule_update(conversation_history)
         
-        # Determine next stage
-        next_stage = _determine_next_stage(current_stage, extracted_info, state)
+        TemplateRouter.record_turn(served_by_template=served_by not in ('llm', 'llm_failed'),
+                                   llm_failed=served_by == 'llm_failed')
+        PerformanceMonitor.record('agent_turn', (time.perf_counter() - turn_start) * 1000, {
+            'stage': current_stage,
+            'served_by': served_by,
+            'prompt_tokens': prompt_tokens,
+            'static_prefix_tokens': prefix_tokens
+        })
         
         return {
             'message': response.strip(),
             'detected_language': detected_language,
             'conversation_stage': next_stage,
+            'served_by': served_by,
+            # Only a reply that listed counter-offers lets the next turn pick one
+            'offers_shown': TemplateRouter.lists_offers(response, {**state, **extracted_info}, detected_language),
+            'prompt_tokens': prompt_tokens,
+            'turn_count': turn_count,
+            'intent': intent,
             **extracted_info  # Include phone, amount, eligibility_path, etc.
         }
     
@@ -149,6 +223,91 @@ Generate only the bot's response, no explanations or meta-commentary."""
         }
 
 
+def _record_degraded_turn(llm_future, turn_start: float, stage: str, prompt_tokens: int):
+    """Record a turn that missed the SLO and log the LLM answer once it finishes."""
+    PerformanceMonitor.record('degraded_turn', (time.perf_counter() - turn_start) * 1000, {
+        'stage': stage,
+        'slo_ms': TURN_SLO_S * 1000,
+        'prompt_tokens': prompt_tokens
+    })
+    
+    def _log_late_answer(future):
+        answer = None if future.exception() else future.result()
+        PerformanceMonitor.record('degraded_turn_llm_answer', (time.perf_counter() - turn_start) * 1000, {
+            'stage': stage,
+            'answered': bool(answer),
+            'answer': (answer or '')[:200]
+        })
+    
+    llm_future.add_done_callback(_log_late_answer)
+
+
+def _build_full_prompt(user_input: str, state: Dict[str, Any], conversation_history: list,
+                       current_stage: str, language: str,
+                       summary: Optional[ConversationSummary] = None) -> str:
+    """
+    Assemble the LLM prompt for a free-form turn.
+    
+    Layout is ordered from most to least stable so provider-side prompt
+    caching can reuse the prefix:
+    1. Static system prompt - byte-identical for every turn in a language
+    2. Stage block - memoised per (language, stage)
+    3. Dynamic history (rolling summary + last raw messages), state and the
+       customer's latest message
+    """
+    
+    # Build conversation context from history
+    history_context = _build_history_context(conversation_history, language, summary)
+    
+    # Build current state context with stage awareness
+    state_context = _build_state_context_with_stage(state, current_stage, language)
+    
+    return f"""{_get_prompt_prefix(language, current_stage)}
+
+CONVERSATION HISTORY:
+{history_context}
+
+CURRENT STATE:
+{state_context}
+
+Customer's latest message: "{user_input}"
+
+Generate the next response now."""
+
+
+@lru_cache(maxsize=None)
+def _get_prompt_prefix(language: str, stage: str) -> str:
+    """Static system prompt followed by the stage block, memoised per (language, stage)."""
+    return f"""{_get_static_system_prompt(language)}
+
+CONVERSATION STAGE: {stage.upper()}
+
+STAGE-SPECIFIC INSTRUCTIONS for stage '{stage}':
+{_get_stage_instructions(stage)}"""
+
+
+def _intent_reply(user_input: str, stage: str, next_stage: str, merged_state: Dict[str, Any],
+                  language: str) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Classify the turn with the embedding intent router and answer it from a
+    template when the (intent, stage) pair is deterministic.
+    
+    Returns:
+        (reply or None, next stage, intent or None)
+    """
+    classifier = get_intent_classifier()
+    if classifier is None:
+        return None, next_stage, None
+    
+    intent, _score = classifier.classify(user_input)
+    routed = route_intent(intent, stage, merged_state)
+    if routed is None:
+        return None, next_stage, intent
+    
+    message_type, kwargs, routed_stage = routed
+    return TemplateRouter.intent_reply(message_type, language, **kwargs), routed_stage, intent
+
+
 def _get_greeting(language: str) -> str:
     """Get language-specific greeting."""
     greetings = {
@@ -210,13 +369,17 @@ def _determine_next_stage(current_stage: str, extracted_info: Dict[str, Any], st
     has_new_phone = bool(extracted_info.get('phone'))
     has_new_amount = bool(extracted_info.get('requested_amount'))
     
+    # An accepted counter-offer replaces the request
+    if extracted_info.get('accepted_offer'):
+        return 'approved' if extracted_info.get('eligibility_path') == 'FAST_TRACK' else 'document_needed'
+    
     stage_flow = {
         'greeting': 'phone_asked',
         'phone_asked': 'phone_provided' if has_new_phone else 'phone_asked',
         'phone_provided': 'amount_asked' if state.get('verified') else 'phone_provided',
         'amount_asked': 'amount_provided' if has_new_amount else 'amount_asked',
         'amount_provided': 'eligibility_check',
-        'eligibility_check': 'approved' if (state.get('requested_amount', 0) <= state.get('pre_approved_limit', 0)) else 'document_needed',
+        'eligibility_check': 'approved' if _eligibility_path(state.get('requested_amount', 0), state.get('pre_approved_limit', 0)) == 'FAST_TRACK' else 'document_needed',
         'approved': 'completed',
         'document_needed': 'document_uploaded',
         'document_uploaded': 'completed',
@@ -295,17 +458,19 @@ def _build_state_context_with_stage(state: Dict[str, Any], stage: str, language:
 
 
 
-def _build_history_context(conversation_history: list, language: str) -> str:
-    """Build conversation history for LLM context."""
-    if not conversation_history:
-        return "No previous conversation yet."
-    
-    lines = []
-    for msg in conversation_history[-6:]:  # Last 6 messages for context
-        role = "Customer" if msg['role'] == 'user' else "BankGPT"
-        lines.append(f"{role}: {msg['content'][:100]}")
-    
-    return "\n".join(lines)
+def _build_history_context(conversation_history: list, language: str,
+                           summary: Optional[ConversationSummary] = None) -> str:
+    """Build conversation history for LLM context: bounded summary plus the last raw messages."""
+    return (summary or ConversationSummary()).context(conversation_history)
+
+
+def _session_summary(state: Dict[str, Any]) -> ConversationSummary:
+    """Rolling summary kept in the session state (created on the first agent turn)."""
+    summary = state.get('conversation_summary')
+    if not isinstance(summary, ConversationSummary):
+        summary = ConversationSummary()
+        state['conversation_summary'] = summary
+    return summary
 
 
 def _build_state_context(state: Dict[str, Any], language: str) -> str:
@@ -339,11 +504,17 @@ def _build_state_context(state: Dict[str, Any], language: str) -> str:
     return "\n".join(lines)
 
 
-def _get_stage_aware_system_prompt(language: str, state: Dict[str, Any], stage: str) -> str:
-    """Get language-specific system prompt with stage awareness."""
+@lru_cache(maxsize=None)
+def _get_static_system_prompt(language: str) -> str:
+    """
+    Get language-specific system prompt.
+    
+    Contains no per-turn or per-stage values so it forms a stable prefix;
+    the current stage is given in the stage block that follows it.
+    """
     
-    base_prompt = f"""You are BankGPT, a professional and friendly loan officer at Tata Capital.
-Your current task: You are in the '{stage}' stage of the loan application process.
+    base_prompt = """You are BankGPT, a professional and friendly loan officer at Tata Capital.
+Your current task: handle the stage of the loan application process given in CONVERSATION STAGE below.
 
 CRITICAL RULES:
 1. Only ask for information that is NOT yet in the VERIFIED INFORMATION section
@@ -369,10 +540,19 @@ IMPORTANT:
 - BE CONVERSATIONAL but PRECISE
 - Acknowledge customer's current message but act based on current stage
 
-When in '{stage}' stage:
+In the current stage:
 - Do NOT ask about information from earlier stages
 - Focus ONLY on what this stage needs
-- Use the stage instructions provided separately"""
+- Use the stage instructions provided separately
+
+Your response should:
+1. Be natural and conversational
+2. Acknowledge the customer's input
+3. Move to the next stage appropriately
+4. Keep responses under 150 words
+5. Be warm and professional
+
+Generate only the bot's response, no explanations or meta-commentary."""
     
     if language == 'hindi':
         return f"""{base_prompt}
@@ -397,83 +577,128 @@ Say amounts like "5 lakhs" or "500,000 rupees"."""
 
 
 def _extract_information(user_input: str, state: Dict[str, Any], 
-                         conversation_history: list, language: str) -> Dict[str, Any]:
+                         conversation_history: list, language: str,
+                         llm_slots: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Extract structured information from user input.
     Updates state with phone, amount, and other details.
+    
+    llm_slots are already-validated slots from a structured LLM reply. The
+    LLM's amount takes precedence over the regex extractor's; its phone is
+    only a fallback, and only when those digits were actually typed.
     """
-    import re
     extracted = {}
+    llm_slots = llm_slots or {}
+    
+    # One pass of the precompiled multilingual extractor (phone, amount,
+    # tenure, income); phone and tenure spans never count as amounts
+    slots = extract_all(user_input)
     
     # Extract phone number (10 digits) - but only if we haven't already got it
     if not state.get('phone'):
-        # Look for 10 consecutive digits (phone number pattern)
-        phone_matches = re.findall(r'\b\d{10}\b', user_input)
+        phone = slots['phone']
+        if not phone and llm_slots.get('phone') \
+                and llm_slots['phone'] in re.sub(r'\D', '', normalize(user_input)):
+            phone = llm_slots['phone']
         
-        if phone_matches:
-            phone = phone_matches[0]  # Take first 10-digit match
-            
+        if phone:
             # Verify phone in database
             db = load_mock_db()
             ver_status, record = verification_agent(phone, db)
             
             if record:
+                defaults = get_policy().crm_defaults
                 extracted['phone'] = phone
                 extracted['customer_name'] = record.get('name', '')
-                extracted['credit_score'] = record.get('credit_score', 700)
-                extracted['pre_approved_limit'] = record.get('approved_amount', 500000)
-                extracted['income'] = record.get('income', 50000)
+                extracted['credit_score'] = record.get('credit_score', defaults['credit_score'])
+                extracted['pre_approved_limit'] = record.get('approved_amount', defaults['approved_amount'])
+                extracted['income'] = record.get('income', defaults['income'])
+                extracted['blacklisted'] = bool(record.get('blacklisted', False))
                 extracted['verified'] = True
+                
+                # Precomputed offer bundle (EMI table, eligibility, texts), if fresh
+                offer = OfferCache.lookup(phone, record)
+                if offer:
+                    extracted['offer'] = offer
     
     # Extract loan amount - only if we haven't already got it
     if not state.get('requested_amount'):
-        user_lower = user_input.lower()
-        
-        # Pattern 1: "X lakhs" or "X lakh" or "X lac"
-        lakh_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:lakh|lac)', user_lower)
-        if lakh_match:
-            amount_value = float(lakh_match.group(1))
-            extracted['requested_amount'] = int(amount_value * 100000)
-        
-        # Pattern 2: "X crore" (if mentioned)
-        crore_match = re.search(r'(\d+(?:\.\d+)?)\s*crore', user_lower)
-        if crore_match and 'requested_amount' not in extracted:
-            amount_value = float(crore_match.group(1))
-            extracted['requested_amount'] = int(amount_value * 10000000)
-        
-        # Pattern 3: Large 6-7 digit numbers (like 500000 for 5 lakhs)
-        if 'requested_amount' not in extracted:
-            large_numbers = re.findall(r'\b(\d{6,7})\b', user_input)
-            
-            # Filter to reasonable loan amounts (10K to 1 Crore)
-            for num_str in large_numbers:
-                num = int(num_str)
-                if 100000 <= num <= 100000000:  # Between 1 lakh and 1 crore
-                    extracted['requested_amount'] = num
-                    break
+        amount = llm_slots.get('requested_amount') or slots['requested_amount']
+        if amount:
+            extracted['requested_amount'] = amount
+    
+    # Tenure the customer asked for; EMI quotes use it instead of the default
+    if slots['tenure_months'] and not state.get('tenure_months'):
+        extracted['tenure_months'] = slots['tenure_months']
+    elif slots['tenure_out_of_range']:
+        # A tenure we do not offer ("10 years"): the template router asks again
+        extracted['tenure_out_of_range'] = slots['tenure_out_of_range']
+    
+    # A counter-offer picked from the numbered list shown last turn ("2", "option 1", "doosra wala")
+    offer = TemplateRouter.picked_offer(extract_choice(user_input), state)
+    if offer:
+        extracted['requested_amount'] = offer['amount']
+        extracted['tenure_months'] = offer['tenure_months']
+        extracted['accepted_offer'] = offer
     
     # Determine eligibility path if we have both phone and amount
 
-    if state.get('phone') and extracted.get('requested_amount'):
-        pre_approved = state.get('pre_approved_limit', extracted.get('pre_approved_limit', 0))
-        requested = extracted['requested_amount']
-        
-        if requested <= pre_approved:
-            extracted['eligibility_path'] = 'FAST_TRACK'
-        else:
-            extracted['eligibility_path'] = 'CONDITIONAL_REVIEW'
+    if (state.get('phone') or extracted.get('phone')) and extracted.get('requested_amount'):
+        pre_approved = extracted.get('pre_approved_limit', state.get('pre_approved_limit', 0))
+        extracted['eligibility_path'] = _eligibility_path(extracted['requested_amount'], pre_approved)
     
     return extracted
 
 
+def _eligibility_path(requested: float, pre_approved: float) -> str:
+    """FAST_TRACK within the pre-approved limit, CONDITIONAL_REVIEW above it (policy table 'chat_path')."""
+    return decide('chat_path', amount=requested, limit=pre_approved)['path']
+
+
+def _parse_structured_reply(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Validate a structured-mode LLM response locally.
+    
+    Returns the cleaned {reply, phone, requested_amount, intent} dict, or None
+    if the response is not a usable JSON object. Invalid slot values are
+    dropped (set to None) rather than trusted.
+    """
+    if not text:
+        return None
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    
+    reply = data.get('reply')
+    if not isinstance(reply, str) or not reply.strip():
+        return None
+    
+    phone = data.get('phone')
+    phone = str(phone).strip() if phone is not None else None
+    if phone is not None and not re.fullmatch(r'\d{10}', phone):
+        phone = None
+    
+    amount = data.get('requested_amount')
+    try:
+        amount = int(float(str(amount).replace(',', ''))) if amount is not None else None
+    except (ValueError, OverflowError):
+        amount = None
+    if amount is not None and not (MIN_LOAN_AMOUNT <= amount <= MAX_LOAN_AMOUNT):
+        amount = None
+    
+    intent = data.get('intent')
+    if intent not in STRUCTURED_INTENTS:
+        intent = 'other'
+    
+    return {'reply': reply.strip(), 'phone': phone, 'requested_amount': amount, 'intent': intent}
+
+
 def calculate_emi(principal: float, rate: float, tenure_months: int) -> float:
-    """Simple EMI calculation."""
-    r = rate / 100.0 / 12.0
-    n = tenure_months
-    if r == 0:
-        return principal / n
-    emi = principal * r * (1 + r) ** n / ((1 + r) ** n - 1)
-    return emi
+    """Simple EMI calculation (utils.compute_emi; loan_math.emi for arrays)."""
+    return compute_emi(principal, rate, tenure_months)
 
 
 # Deprecated phase functions - kept for backward compatibility
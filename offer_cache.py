@@ -0,0 +1,209 @@
+"""
+offer_cache.py - Precomputed offer bundles keyed by phone
+A precompute job builds one bundle per CRM record, holding what the chat
+shows at phone verification (TemplateRouter.verified_offer: profile, how far
+each eligibility path goes, the EMI at the limit for every offer tenure and
+the pitch in every language), and stores them in a dbm key-value file. At
+verification the bundle is a single keyed read, rendered straight into the
+reply.
+
+Each bundle carries a hash of the CRM record it was built from; a lookup
+against a changed record is treated as a miss, and re-running the job only
+rebuilds bundles whose record changed.
+
+The output path is a directory: every run writes a new generation
+directory and then atomically replaces the CURRENT pointer file naming it,
+so readers switch from one complete store to the next.
+
+Usage:
+    python offer_cache.py --crm data/mock_db.json --out data/offers
+"""
+
+import argparse
+import dbm
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from policy_engine import get_policy
+from template_router import TemplateRouter
+
+OFFER_CACHE_PATH = os.getenv('OFFER_CACHE_PATH', 'data/offers')
+
+BUNDLE_VERSION = 3
+
+# Pointer file naming the live generation, and the dbm file inside each generation
+CURRENT_FILE = 'CURRENT'
+STORE_NAME = 'offers'
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Stable hash of a CRM record and the credit policy; a change to either invalidates its bundle."""
+    payload = json.dumps({'v': BUNDLE_VERSION, 'policy': get_policy().fingerprint, 'record': record},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def build_bundle(phone: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """The verification offer for an applicant, stamped with the record it was built from."""
+    defaults = get_policy().crm_defaults
+    offer = TemplateRouter.verified_offer(
+        record.get('name', ''),
+        record.get('credit_score', defaults['credit_score']),
+        record.get('income', defaults['income']),
+        record.get('approved_amount', defaults['approved_amount'])
+    )
+    return {'phone': phone, 'record_hash': record_hash(record), 'built_at': time.time(), **offer}
+
+
+def precompute(crm: Dict[str, Dict[str, Any]], out_path: str = OFFER_CACHE_PATH) -> Dict[str, int]:
+    """
+    Build bundles for every CRM record, reusing unchanged ones.
+
+    The store is built in a new generation directory under out_path and
+    published by atomically replacing the CURRENT pointer file, so readers
+    never see a half-written or half-swapped store. The previous generation
+    is kept for readers still opening it; older ones are removed.
+    """
+    stats = {'records': 0, 'built': 0, 'reused': 0}
+    _remove_store(out_path)  # single-file store from before generations
+    previous = _current_generation(out_path)
+    generation = f"gen-{time.time_ns()}-{os.getpid()}"
+    store_path = os.path.join(out_path, generation, STORE_NAME)
+    Path(store_path).parent.mkdir(parents=True)
+
+    existing = _open(_store_path(out_path, previous))
+    try:
+        with dbm.open(store_path, 'n') as db:
+            for phone, record in crm.items():
+                stats['records'] += 1
+                raw = existing.get(phone.encode('utf-8')) if existing is not None else None
+                if raw is not None and json.loads(raw).get('record_hash') == record_hash(record):
+                    db[phone] = raw
+                    stats['reused'] += 1
+                    continue
+                db[phone] = json.dumps(build_bundle(phone, record), ensure_ascii=False, separators=(',', ':'))
+                stats['built'] += 1
+    finally:
+        if existing is not None:
+            existing.close()
+
+    pointer = os.path.join(out_path, CURRENT_FILE)
+    tmp = f"{pointer}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(generation)
+    os.replace(tmp, pointer)
+
+    for entry in os.listdir(out_path):
+        if entry.startswith('gen-') and entry not in (generation, previous):
+            shutil.rmtree(os.path.join(out_path, entry), ignore_errors=True)
+    OfferCache.reset()
+    return stats
+
+
+def _current_generation(out_path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(out_path, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _store_path(out_path: str, generation: Optional[str]) -> Optional[str]:
+    return os.path.join(out_path, generation, STORE_NAME) if generation else None
+
+
+def _store_suffixes(path: str):
+    return [s for s in ('', '.db', '.dat', '.dir', '.bak', '.pag') if os.path.isfile(path + s)]
+
+
+def _remove_store(path: str):
+    for suffix in _store_suffixes(path):
+        os.remove(path + suffix)
+
+
+def _open(path: Optional[str]):
+    if path is None or not _store_suffixes(path):
+        return None
+    try:
+        return dbm.open(path, 'r')
+    except Exception as e:
+        print(f"Offer cache unavailable: {e}")
+        return None
+
+
+class OfferCache:
+    """Read side: one shared read-only handle, reopened when the job publishes a new generation."""
+
+    _lock = threading.Lock()
+    _db = None
+    _path: Optional[str] = None
+    _stamp = None
+    hits = 0
+    misses = 0
+    stale = 0
+
+    @staticmethod
+    def _handle(path: str):
+        try:
+            stat = os.stat(os.path.join(path, CURRENT_FILE))
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            stamp = None
+        if OfferCache._path == path and OfferCache._stamp == stamp and (OfferCache._db is not None or stamp is None):
+            return OfferCache._db
+        if OfferCache._db is not None:
+            OfferCache._db.close()
+        OfferCache._db = _open(_store_path(path, _current_generation(path)))
+        OfferCache._path = path
+        OfferCache._stamp = stamp
+        return OfferCache._db
+
+    @staticmethod
+    def lookup(phone: str, record: Dict[str, Any], path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Bundle for a verified phone, or None if missing or built from a different record."""
+        with OfferCache._lock:
+            db = OfferCache._handle(path or OFFER_CACHE_PATH)
+            raw = db.get(phone.encode('utf-8')) if db is not None else None
+            if raw is None:
+                OfferCache.misses += 1
+                return None
+            bundle = json.loads(raw)
+            if bundle.get('record_hash') != record_hash(record):
+                OfferCache.stale += 1
+                return None
+            OfferCache.hits += 1
+            return bundle
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        return {'hits': OfferCache.hits, 'misses': OfferCache.misses, 'stale': OfferCache.stale}
+
+    @staticmethod
+    def reset():
+        """Drop the open handle (and counters) so the next lookup reopens the store."""
+        with OfferCache._lock:
+            if OfferCache._db is not None:
+                OfferCache._db.close()
+            OfferCache._db = None
+            OfferCache._path = None
+            OfferCache._stamp = None
+            OfferCache.hits = OfferCache.misses = OfferCache.stale = 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--crm', default='data/mock_db.json')
+    parser.add_argument('--out', default=OFFER_CACHE_PATH)
+    args = parser.parse_args()
+
+    with open(args.crm, 'r', encoding='utf-8') as f:
+        crm = json.load(f)
+    start = time.perf_counter()
+    stats = precompute(crm, args.out)
+    print(f"{stats} in {time.perf_counter() - start:.2f}s -> {args.out}")
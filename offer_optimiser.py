@@ -0,0 +1,155 @@
+"""
+offer_optimiser.py - Counter-offers that the credit policy would approve
+When a request is above the pre-approved limit (or the EMI breaks FOIR),
+searches a grid of amounts x rates x tenures for loans the customer could
+get instead, evaluating the whole grid at once: EMIs with loan_math, the
+decision with the policy's 'routing' table and affordability with its
+'foir_band' table (the bands behind utils.eligibility_band), all as NumPy
+masks.
+
+For each rate and tenure the largest approvable amount is kept, once for the
+instant lane (no documents) and once for the salary-slip lane; the offers
+returned are the Pareto-best of those: no other candidate gives at least as
+much money for no more EMI, total interest and paperwork.
+
+Rates default to the profile's underwriting rate (policy table
+'underwriting', output 'rate'); pass `rates` to price against a rate card.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from loan_math import emi, foir
+from policy_engine import Policy, get_policy
+
+OFFER_TENURES = (12, 24, 36, 48, 60)
+AMOUNT_LEVELS = 24
+AMOUNT_ROUNDING = 10000
+MAX_OFFERS = 3
+
+APPROVED_DECISIONS = ('Approved', 'Conditional Approval')
+ELIGIBLE_BAND = 'Likely Eligible'
+
+
+def _candidate_amounts(requested: float, limit: float, foir_caps: np.ndarray, multiple: float) -> np.ndarray:
+    """Amount axis: an even ladder up to the request plus every point where a constraint binds."""
+    ladder = np.linspace(requested / AMOUNT_LEVELS, requested, AMOUNT_LEVELS)
+    binding = np.concatenate([[limit, limit * multiple], foir_caps.ravel()])
+    amounts = np.floor(np.concatenate([ladder, binding]) / AMOUNT_ROUNDING) * AMOUNT_ROUNDING
+    amounts = amounts[(amounts > 0) & (amounts < requested)]
+    return np.unique(np.append(amounts, requested))
+
+
+def _pareto(cost: np.ndarray) -> np.ndarray:
+    """Rows of a (candidates x objectives) cost matrix not dominated by another row."""
+    no_worse = (cost[:, None, :] <= cost[None, :, :]).all(axis=2)
+    better = (cost[:, None, :] < cost[None, :, :]).any(axis=2)
+    return ~(no_worse & better).any(axis=0)
+
+
+def counter_offers(profile: Mapping[str, Any], requested_amount: float, existing_emis: float = 0.0,
+                   rates: Optional[Sequence[float]] = None, tenures: Sequence[int] = OFFER_TENURES,
+                   policy: Optional[Policy] = None, max_offers: int = MAX_OFFERS) -> List[Dict[str, Any]]:
+    """
+    Pareto-best loans the policy would approve instead of the request.
+
+    Args:
+        profile: CRM record (credit_score, income, approved_amount, blacklisted)
+        requested_amount: Amount asked for; offers never exceed it
+        existing_emis: Monthly EMIs already being paid (counted in FOIR)
+        rates: Annual rates to try (default: the profile's underwriting rate)
+        tenures: Tenures in months to try
+        policy: Compiled policy (the current data/policy.json by default)
+        max_offers: How many offers to return
+
+    Returns:
+        Offers, instant ones first and then by amount (largest first), each
+        with amount, tenure_months, rate, emi, total_interest, foir, decision,
+        documents and policy_rule; empty when nothing can be approved
+    """
+    policy = policy or get_policy()
+    defaults, thresholds = policy.crm_defaults, policy.thresholds
+    score = profile.get('credit_score', defaults['credit_score'])
+    income = profile.get('income', defaults['income'])
+    limit = profile.get('approved_amount', defaults['approved_amount']) or 0
+    requested = float(requested_amount or 0)
+
+    underwriting = policy.evaluate('underwriting', credit_score=score, income=income)
+    if rates is None:
+        rates = () if underwriting.get('rate') is None else (underwriting['rate'],)
+    if requested <= 0 or not rates or not income:
+        return []
+
+    rate_axis = np.asarray(rates, dtype=np.float64)[:, None]
+    tenure_axis = np.asarray(tenures, dtype=np.float64)[None, :]
+    emi_per_rupee = emi(1.0, rate_axis, tenure_axis)
+    foir_caps = (thresholds['foir_eligible_pct'] / 100.0 * income - existing_emis) / emi_per_rupee
+    amount_axis = _candidate_amounts(requested, float(limit), foir_caps, thresholds['conditional_limit_multiple'])
+
+    # Whole grid, flattened to (amounts x rates x tenures) rows
+    shape = (len(amount_axis), len(rates), len(tenures))
+    amount = np.broadcast_to(amount_axis[:, None, None], shape).ravel()
+    monthly = (amount_axis[:, None, None] * emi_per_rupee[None, :, :]).ravel()
+    ratio = foir(income, existing_emis, monthly)
+
+    routing = policy.table('routing')
+    route = routing.match_batch({
+        'amount': amount,
+        'limit': limit,
+        'credit_score': score,
+        'found': True,
+        'blacklisted': bool(profile.get('blacklisted')),
+        'uw_reject': bool(underwriting['reject']),
+    })
+    approvable = np.array([d in APPROVED_DECISIONS for d in routing.output_values('decision')])[route]
+    needs_documents = np.array([d != 'Not Requested' for d in routing.output_values('documents')])[route]
+
+    bands = policy.table('foir_band')
+    band = bands.match_batch({'foir': ratio, 'credit_score': np.full(len(ratio), score, dtype=np.float64)})
+    affordable = np.array([b == ELIGIBLE_BAND for b in bands.output_values('band')])[band]
+
+    feasible = (approvable & affordable).reshape(shape)
+    documents = needs_documents.reshape(shape)
+
+    # Largest feasible amount per (rate, tenure), separately for each lane
+    candidates = []
+    for lane in (False, True):
+        mask = feasible & (documents == lane)
+        top = len(amount_axis) - 1 - np.argmax(mask[::-1], axis=0)
+        r_idx, t_idx = np.nonzero(mask.any(axis=0))
+        candidates.append(np.ravel_multi_index((top[r_idx, t_idx], r_idx, t_idx), shape))
+    rows = np.concatenate(candidates)
+    if not len(rows):
+        return []
+
+    interest = monthly[rows] * np.asarray(tenures, dtype=np.float64)[rows % len(tenures)] - amount[rows]
+    cost = np.stack([-amount[rows], monthly[rows], interest, needs_documents[rows]], axis=1)
+    front = _pareto(cost)
+    rows, interest = rows[front], interest[front]
+
+    # Instant offers first, then the largest amount; of offers for the same
+    # amount keep the least total interest (the shortest tenure that fits)
+    rows = rows[np.lexsort((interest, -amount[rows], needs_documents[rows]))]
+    key = np.stack([amount[rows], needs_documents[rows]], axis=1)
+    distinct = np.ones(len(rows), dtype=bool)
+    distinct[1:] = (key[1:] != key[:-1]).any(axis=1)
+    best = rows[distinct][:max_offers]
+
+    offers = []
+    for row in best.tolist():
+        _, r, t = np.unravel_index(row, shape)
+        tenure = int(tenures[t])
+        outputs = routing.outputs[route[row]]
+        offers.append({
+            'amount': int(amount[row]),
+            'tenure_months': tenure,
+            'rate': float(rates[r]),
+            'emi': int(round(monthly[row])),
+            'total_interest': int(round(monthly[row] * tenure - amount[row])),
+            'foir': round(float(ratio[row]), 1),
+            'decision': outputs['decision'],
+            'documents': outputs['documents'],
+            'policy_rule': routing.rule_ids[route[row]],
+        })
+    return offers
@@ -0,0 +1,274 @@
+"""
+pitch_batch.py - Bulk personalised offer pitches for a CRM campaign
+Streams applicants from the CRM, generates pitches with bounded async
+concurrency and appends each result to a JSONL checkpoint, so an interrupted
+run resumes where it stopped.
+
+Applicants in the same credit-score / income / pre-approved-limit buckets
+share one generation: the model writes a pitch for the bucket with a {name}
+placeholder, which is filled in per applicant.
+
+Pitches come from Gemini by default; --groq uses AsyncGroqClient in the
+batch lane of the process-wide Groq quota, behind any interactive turns.
+
+Usage:
+    python pitch_batch.py --crm data/mock_db.json --out data/pitches.jsonl --concurrency 8
+    python pitch_batch.py --groq   # Groq, rate-limited as batch work
+    python pitch_batch.py --stub   # offline, deterministic stub model
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from gemini_integration import GeminiClient
+from groq_integration import PRIORITY_BATCH, AsyncGroqClient
+
+CREDIT_SCORE_BAND = 50
+INCOME_BAND = 25000
+LIMIT_BAND = 250000
+
+PITCH_PROMPT = """You are BankGPT, a persuasive and friendly personal loan assistant.
+
+Applicant profile: Credit Score {score_range}, Income ₹{income_range}/month, Pre-approved Limit ₹{limit_range}
+
+Generate a warm, encouraging sales pitch (2-3 sentences) offering a personal loan at 11% interest rate.
+Address the applicant as {{name}} (keep that placeholder exactly as written) and do not mention exact figures
+other than the ranges above. Make the applicant feel valued and highlight how quickly we can process their loan.
+Use appropriate emojis and Indian rupee symbols."""
+
+Bucket = Tuple[int, int, int]
+
+
+def profile_bucket(record: Dict[str, Any]) -> Bucket:
+    """(score, income, limit) bucket lower bounds for a CRM record."""
+    score = int(record.get('credit_score') or 0)
+    income = int(record.get('income') or 0)
+    limit = int(record.get('approved_amount') or 0)
+    return (score - score % CREDIT_SCORE_BAND, income - income % INCOME_BAND, limit - limit % LIMIT_BAND)
+
+
+def bucket_prompt(bucket: Bucket) -> str:
+    score, income, limit = bucket
+    return PITCH_PROMPT.format(
+        score_range=f"{score}-{score + CREDIT_SCORE_BAND - 1}",
+        income_range=f"{income:,}-{income + INCOME_BAND - 1:,}",
+        limit_range=f"{limit:,}-{limit + LIMIT_BAND - 1:,}"
+    )
+
+
+def iter_applicants(crm_path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (phone, record) pairs.
+
+    A .jsonl CRM export (one record with a 'phone' field per line) is read
+    line by line; a JSON object keyed by phone (data/mock_db.json) is loaded whole.
+    """
+    path = Path(crm_path)
+    if path.suffix == '.jsonl':
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    yield str(record['phone']), record
+    else:
+        with path.open('r', encoding='utf-8') as f:
+            for phone, record in json.load(f).items():
+                yield phone, record
+
+
+def load_checkpoint(out_path: str) -> Tuple[Set[str], Dict[Bucket, str]]:
+    """Phones already written and the pitch template of every bucket seen so far."""
+    done, templates = set(), {}
+    path = Path(out_path)
+    if path.exists():
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # partially written last line of an interrupted run
+                done.add(row['phone'])
+                templates[tuple(row['bucket'])] = row['template']
+    return done, templates
+
+
+class GeminiPitchModel:
+    """
+    Bucket pitches from GeminiClient (blocking SDK call run in a worker thread).
+
+    Raises when Gemini is unavailable: the generic fallback pitch must not be
+    checkpointed as a bucket's template.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if not GeminiClient.is_available():
+            raise RuntimeError("Gemini is not available")
+        response = await asyncio.to_thread(GeminiClient._generate, prompt)
+        return response.text
+
+
+class GroqPitchModel:
+    """
+    Bucket pitches from AsyncGroqClient at batch priority.
+
+    Shares GROQ_LIMITER with the chat, so a campaign waits for quota instead
+    of pushing live customers into 429s.
+    """
+
+    def __init__(self, client: Optional[AsyncGroqClient] = None):
+        self.client = client or AsyncGroqClient()
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        text = await self.client.generate(prompt, max_tokens=200, priority=PRIORITY_BATCH)
+        if not text:
+            raise RuntimeError("Groq returned no pitch")
+        return text
+
+
+class StubPitchModel:
+    """Deterministic offline model for tests and dry runs."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        profile = prompt.split('Applicant profile: ')[1].split('\n')[0]
+        return f"🎉 {{name}}, you're pre-approved! ({profile}) Get your personal loan at 11% in 10 minutes."
+
+
+class PitchBatchJob:
+    """One campaign run: CRM in, JSONL checkpoint out."""
+
+    def __init__(self, model, out_path: str, concurrency: int = 8):
+        self.model = model
+        self.out_path = out_path
+        self.concurrency = concurrency
+        self.stats = {'applicants': 0, 'skipped': 0, 'written': 0, 'generated': 0, 'cache_hits': 0, 'errors': 0}
+        self._templates: Dict[Bucket, asyncio.Future] = {}
+
+    async def run(self, applicants) -> Dict[str, Any]:
+        start = time.perf_counter()
+        done, templates = load_checkpoint(self.out_path)
+        loop = asyncio.get_running_loop()
+        for bucket, template in templates.items():
+            future = loop.create_future()
+            future.set_result(template)
+            self._templates[bucket] = future
+
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        Path(self.out_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.out_path, 'a', encoding='utf-8') as out:
+            if _ends_with_torn_line(self.out_path):
+                out.write('\n')
+            for phone, record in applicants:
+                self.stats['applicants'] += 1
+                if phone in done:
+                    self.stats['skipped'] += 1
+                    continue
+                await slots.acquire()  # bounds both in-flight work and memory
+                task = asyncio.ensure_future(self._pitch_one(phone, record, out))
+                task.add_done_callback(lambda t: (slots.release(), tasks.discard(t)))
+                tasks.add(task)
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        self.stats['elapsed_s'] = time.perf_counter() - start
+        return self.stats
+
+    async def _pitch_one(self, phone: str, record: Dict[str, Any], out):
+        bucket = profile_bucket(record)
+        try:
+            template = await self._bucket_template(bucket)
+        except Exception as e:
+            print(f"Pitch generation failed for bucket {bucket}: {e}")
+            self.stats['errors'] += 1
+            return
+
+        name = record.get('name', 'there')
+        out.write(json.dumps({
+            'phone': phone,
+            'name': name,
+            'bucket': list(bucket),
+            'template': template,
+            'pitch': template.replace('{name}', name)
+        }, ensure_ascii=False) + '\n')
+        out.flush()
+        self.stats['written'] += 1
+
+    async def _bucket_template(self, bucket: Bucket) -> str:
+        future = self._templates.get(bucket)
+        if future is not None:
+            self.stats['cache_hits'] += 1
+            return await future
+
+        future = asyncio.get_running_loop().create_future()
+        self._templates[bucket] = future
+        try:
+            template = await self.model.generate(bucket_prompt(bucket))
+            if '{name}' not in (template or ''):
+                raise ValueError("generated pitch has no {name} placeholder")
+        except Exception as e:
+            del self._templates[bucket]  # let a later applicant retry the bucket
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters re-raise it themselves
+            raise
+        self.stats['generated'] += 1
+        future.set_result(template)
+        return template
+
+
+def _ends_with_torn_line(path: str) -> bool:
+    """True if an interrupted run left a last line without its newline."""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, 2)
+        return f.read(1) != b'\n'
+
+
+def run_batch(crm_path: str, out_path: str, concurrency: int = 8, model=None) -> Dict[str, Any]:
+    """Generate pitches for every CRM record not yet in out_path."""
+    job = PitchBatchJob(model or GeminiPitchModel(), out_path, concurrency)
+
+    async def run():
+        try:
+            return await job.run(iter_applicants(crm_path))
+        finally:
+            client = getattr(job.model, 'client', None)
+            if client is not None:
+                await client.close()
+
+    return asyncio.run(run())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--crm', default='data/mock_db.json')
+    parser.add_argument('--out', default='data/pitches.jsonl')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--stub', action='store_true', help='use the offline stub model')
+    parser.add_argument('--groq', action='store_true', help='use Groq at batch priority')
+    args = parser.parse_args()
+
+    model = StubPitchModel() if args.stub else GroqPitchModel() if args.groq else None
+    stats = run_batch(args.crm, args.out, args.concurrency, model)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,333 @@
+"""
+policy_engine.py - Declarative credit policy compiled into decision tables
+data/policy.json holds every threshold and routing rule: named thresholds,
+CRM defaults and first-match-wins decision tables (underwriting,
+eligibility, chat path, routing, FOIR band). At load time each table is
+compiled twice:
+
+- scalar: generated Python source (one `if` per rule, None-safe
+  comparisons), so a decision costs a few comparisons
+- batch:  NumPy masks per condition combined with np.select, for
+  portfolio re-scoring (NaN = missing)
+
+explain() re-evaluates a decision rule by rule and returns the trace of
+conditions checked and the rule that fired. get_policy() re-checks the
+file at most every POLICY_RELOAD_CHECK_S seconds and swaps in a newly
+compiled policy; a file that fails to parse or compile keeps the previous one.
+
+Condition syntax (inside a rule's "when", all must hold):
+    ["credit_score", "<", "min_score"]         threshold name
+    ["limit", "!=", 0]                         literal
+    ["amount", "<=", {"input": "limit", "times": "conditional_limit_multiple"}]
+    ["income", "is_missing"] / ["found", "is_true"]
+Outputs starting with "$" copy an input (e.g. "$underwriting_reason");
+other string outputs may name thresholds in braces ("Credit score < {min_score}"),
+filled in when the policy is compiled so reason texts follow the thresholds.
+"""
+
+import hashlib
+import json
+import operator
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import numpy as np
+
+POLICY_PATH = os.getenv('BANKGPT_POLICY_PATH', 'data/policy.json')
+POLICY_RELOAD_CHECK_S = float(os.getenv('BANKGPT_POLICY_RELOAD_CHECK_S', '1.0'))
+
+COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+PREDICATES = ('is_missing', 'is_present', 'is_true', 'is_false')
+
+
+class PolicyError(ValueError):
+    """The policy file is malformed."""
+
+
+class Condition:
+    """One compiled comparison or predicate."""
+
+    def __init__(self, spec, inputs, thresholds: Mapping[str, float]):
+        if not isinstance(spec, list) or len(spec) not in (2, 3):
+            raise PolicyError(f"Condition must be [input, op] or [input, op, value]: {spec!r}")
+        self.input = spec[0]
+        self.op = spec[1]
+        if self.input not in inputs:
+            raise PolicyError(f"Condition uses undeclared input {self.input!r}")
+
+        self.rhs_input = None
+        self.rhs_value = None
+        if self.op in PREDICATES:
+            if len(spec) != 2:
+                raise PolicyError(f"{self.op} takes no value: {spec!r}")
+            self.text = f"{self.input} {self.op}"
+            return
+        if self.op not in COMPARISONS or len(spec) != 3:
+            raise PolicyError(f"Unknown condition {spec!r}")
+
+        rhs = spec[2]
+        if isinstance(rhs, dict):
+            self.rhs_input = rhs.get('input')
+            if self.rhs_input not in inputs:
+                raise PolicyError(f"Condition compares with undeclared input {self.rhs_input!r}")
+            times = rhs.get('times', 1)
+            self.rhs_value = _resolve(times, thresholds)
+            self.text = f"{self.input} {self.op} {self.rhs_input}" + (
+                f" * {times} ({self.rhs_value})" if times != 1 else '')
+        else:
+            self.rhs_value = _resolve(rhs, thresholds)
+            self.text = f"{self.input} {self.op} {rhs}" + (f" ({self.rhs_value})" if isinstance(rhs, str) else '')
+
+    def source(self) -> str:
+        """Python expression over v_<input> locals, False when an operand is missing."""
+        lhs = f"v_{self.input}"
+        if self.op == 'is_missing':
+            return f"{lhs} is None"
+        if self.op == 'is_present':
+            return f"{lhs} is not None"
+        if self.op == 'is_true':
+            return f"bool({lhs})"
+        if self.op == 'is_false':
+            return f"not {lhs}"
+        if self.rhs_input is None:
+            return f"({lhs} is not None and {lhs} {self.op} {self.rhs_value!r})"
+        rhs = f"v_{self.rhs_input}"
+        scaled = rhs if self.rhs_value == 1 else f"{rhs} * {self.rhs_value!r}"
+        return f"({lhs} is not None and {rhs} is not None and {lhs} {self.op} {scaled})"
+
+    def holds(self, values: Mapping[str, Any]) -> bool:
+        value = values.get(self.input)
+        if self.op == 'is_missing':
+            return value is None
+        if self.op == 'is_present':
+            return value is not None
+        if self.op == 'is_true':
+            return bool(value)
+        if self.op == 'is_false':
+            return not value
+        rhs = self.rhs_value
+        if self.rhs_input is not None:
+            other = values.get(self.rhs_input)
+            if other is None:
+                return False
+            rhs = other * rhs
+        return value is not None and COMPARISONS[self.op](value, rhs)
+
+    def mask(self, columns: Mapping[str, Any]) -> np.ndarray:
+        values = np.asarray(columns[self.input])
+        if self.op in ('is_true', 'is_false'):
+            truth = values.astype(bool)
+            return truth if self.op == 'is_true' else ~truth
+        values = values.astype(np.float64)
+        present = ~np.isnan(values)
+        if self.op == 'is_missing':
+            return ~present
+        if self.op == 'is_present':
+            return present
+        rhs = self.rhs_value
+        if self.rhs_input is not None:
+            other = np.asarray(columns[self.rhs_input], dtype=np.float64)
+            present &= ~np.isnan(other)
+            rhs = other * rhs
+        return present & COMPARISONS[self.op](values, rhs)
+
+
+def _resolve(value, thresholds: Mapping[str, float]):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise PolicyError(f"Expected a number or threshold name, got {value!r}")
+    if isinstance(value, str):
+        if value not in thresholds:
+            raise PolicyError(f"Unknown threshold {value!r}")
+        return thresholds[value]
+    return value
+
+
+class DecisionTable:
+    """A first-match-wins rule list compiled for scalar and batch evaluation."""
+
+    def __init__(self, name: str, spec: Dict[str, Any], thresholds: Mapping[str, float]):
+        self.name = name
+        self.description = spec.get('description', '')
+        self.inputs = list(spec.get('inputs', []))
+        for input_name in self.inputs:
+            if not input_name.isidentifier():
+                raise PolicyError(f"{name}: input names must be identifiers, got {input_name!r}")
+        if 'default' not in spec:
+            raise PolicyError(f"{name}: a default outcome is required")
+
+        self.rule_ids: List[str] = []
+        self.conditions: List[List[Condition]] = []
+        self.outputs: List[Dict[str, Any]] = []
+        for rule in spec.get('rules', []) + [dict(spec['default'], when=[])]:
+            self.rule_ids.append(rule['id'])
+            self.conditions.append([Condition(c, self.inputs, thresholds) for c in rule['when']])
+            outputs = dict(rule['then'])
+            for key, value in outputs.items():
+                if not isinstance(value, str):
+                    continue
+                if value.startswith('$'):
+                    if value[1:] not in self.inputs:
+                        raise PolicyError(f"{name}.{rule['id']}: output refers to undeclared input {value!r}")
+                    continue
+                try:
+                    outputs[key] = value.format_map(thresholds)
+                except (KeyError, ValueError, IndexError) as e:
+                    raise PolicyError(f"{name}.{rule['id']}: bad threshold reference in {value!r}: {e}") from None
+            self.outputs.append(outputs)
+        self.default_index = len(self.rule_ids) - 1
+        self._match = self._compile()
+
+    def _compile(self) -> Callable[[Mapping[str, Any]], int]:
+        lines = ["def match(values):"]
+        lines += [f"    v_{name} = values.get({name!r})" for name in self.inputs]
+        for index, conditions in enumerate(self.conditions[:-1]):
+            test = ' and '.join(c.source() for c in conditions) or 'True'
+            lines.append(f"    if {test}:")
+            lines.append(f"        return {index}")
+        lines.append(f"    return {self.default_index}")
+        namespace: Dict[str, Any] = {}
+        exec(compile('\n'.join(lines), f'<policy:{self.name}>', 'exec'), namespace)
+        return namespace['match']
+
+    def _outputs(self, index: int, values: Mapping[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for key, value in self.outputs[index].items():
+            if isinstance(value, str) and value.startswith('$'):
+                value = values.get(value[1:])
+            result[key] = value
+        result['rule'] = self.rule_ids[index]
+        return result
+
+    def evaluate(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        """Outputs of the first matching rule, plus 'rule' (its id)."""
+        return self._outputs(self._match(values), values)
+
+    def explain(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        """evaluate() plus 'trace': every rule checked, with each condition's result."""
+        trace = []
+        for index, conditions in enumerate(self.conditions):
+            checks = [{'condition': c.text, 'value': values.get(c.input), 'holds': c.holds(values)}
+                      for c in conditions]
+            matched = all(check['holds'] for check in checks)
+            trace.append({'rule': self.rule_ids[index], 'matched': matched, 'conditions': checks})
+            if matched:
+                return dict(self._outputs(index, values), trace=trace)
+        raise AssertionError("default rule always matches")
+
+    def match_batch(self, columns: Mapping[str, Any]) -> np.ndarray:
+        """Index of the first matching rule per row (default_index when none)."""
+        masks = []
+        for conditions in self.conditions[:-1]:
+            mask = None
+            for condition in conditions:
+                mask = condition.mask(columns) if mask is None else mask & condition.mask(columns)
+            masks.append(mask)
+        n = len(np.asarray(next(iter(columns.values()))))
+        masks = [np.ones(n, dtype=bool) if m is None else m for m in masks]
+        return np.select(masks, list(range(len(masks))), default=self.default_index).astype(np.int16)
+
+    def output_values(self, key: str) -> tuple:
+        """The value of one output for each rule index (default last)."""
+        return tuple(outputs.get(key) for outputs in self.outputs)
+
+
+class Policy:
+    """A compiled policy file."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = '<dict>'):
+        self.source = source
+        self.version = spec.get('version')
+        # Identity of the rules themselves, for caches of policy-derived results
+        self.fingerprint = hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+        self.thresholds: Dict[str, float] = dict(spec.get('thresholds', {}))
+        self.crm_defaults: Dict[str, Any] = dict(spec.get('crm_defaults', {}))
+        self.tables = {name: DecisionTable(name, table, self.thresholds)
+                       for name, table in spec.get('tables', {}).items()}
+
+    @classmethod
+    def load(cls, path: str) -> 'Policy':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), source=path)
+
+    def table(self, name: str) -> DecisionTable:
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise PolicyError(f"Policy {self.source} has no table {name!r}") from None
+
+    def evaluate(self, name: str, **values) -> Dict[str, Any]:
+        return self.table(name).evaluate(values)
+
+    def explain(self, name: str, **values) -> Dict[str, Any]:
+        return self.table(name).explain(values)
+
+
+class _PolicyHolder:
+    """Current policy for a file, recompiled when the file changes."""
+
+    def __init__(self, path: str, check_interval_s: Optional[float] = None):
+        self.path = Path(path)
+        self.check_interval_s = POLICY_RELOAD_CHECK_S if check_interval_s is None else check_interval_s
+        self.policy: Optional[Policy] = None
+        self._stamp = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_errors = 0
+
+    def get(self) -> Policy:
+        now = time.monotonic()
+        if self.policy is not None and now - self._checked_at < self.check_interval_s:
+            return self.policy
+        with self._lock:
+            self._checked_at = now
+            stamp = None
+            try:
+                stat = self.path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                if stamp == self._stamp:
+                    return self.policy
+                policy = Policy.load(str(self.path))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                if self.policy is None:
+                    raise
+                # Missing, mid-edit or invalid: keep deciding with the last good policy
+                self.load_errors += 1
+                print(f"Policy reload failed, keeping version {self.policy.version}: {e}")
+                if stamp is not None:
+                    self._stamp = stamp
+            else:
+                self.policy = policy
+                self.loads += 1
+                self._stamp = stamp
+            return self.policy
+
+
+_HOLDERS: Dict[str, _PolicyHolder] = {}
+_HOLDERS_LOCK = threading.Lock()
+
+
+def get_policy(path: Optional[str] = None) -> Policy:
+    """The compiled policy for a file (data/policy.json by default), hot reloaded."""
+    key = str(path or POLICY_PATH)
+    with _HOLDERS_LOCK:
+        holder = _HOLDERS.get(key)
+        if holder is None:
+            holder = _HOLDERS[key] = _PolicyHolder(key)
+    return holder.get()
+
+
+def decide(table: str, **values) -> Dict[str, Any]:
+    """Evaluate one table of the current policy."""
+    return get_policy().evaluate(table, **values)
+
+
+def explain(table: str, **values) -> Dict[str, Any]:
+    """decide() with the rule-by-rule trace."""
+    return get_policy().explain(table, **values)
@@ -4,19 +4,18 @@ import uuid
 from pathlib import Path
 from typing import List, Dict
 import chromadb
-from sentence_transformers import SentenceTransformer
-import google.generativeai as genai
 from tqdm import tqdm
 from pypdf import PdfReader
-
-DEFAULT_EMBED_MODEL = 'all-MiniLM-L6-v2'
+from gemini_integration import GeminiClient, GeminiStream
+from llm_provider import RAG_ROUTER
+from embeddings import DEFAULT_EMBED_MODEL, get_embedder
 
 class Ingestor:
     def __init__(self, docs_folder='docs', persist_dir='chroma_db'):
         self.docs_folder = Path(docs_folder)
         self.persist_dir = persist_dir
         self.model_name = DEFAULT_EMBED_MODEL
-        self.embedder = SentenceTransformer(self.model_name)
+        self.embedder = get_embedder(self.model_name)
         self.client = chromadb.PersistentClient(path=persist_dir)
         try:
             self.col = self.client.get_collection('loan_docs')
@@ -74,7 +73,7 @@ class Ingestor:
 class RAG:
     def __init__(self, persist_dir='chroma_db', model_name=None):
         self.model_name = model_name or DEFAULT_EMBED_MODEL
-        self.embedder = SentenceTransformer(self.model_name)
+        self.embedder = get_embedder(self.model_name)
         self.client = chromadb.PersistentClient(path=persist_dir)
         self.col = self.client.get_collection('loan_docs')
 
@@ -87,12 +86,7 @@ class RAG:
         return docs
 
 
-def chat_with_gemini(system_prompt: str, user_prompt: str, context_chunks: List[Dict], language: str = 'en'):
-    api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key:
-        raise EnvironmentError('Set GEMINI_API_KEY in environment to use Gemini.')
-    genai.configure(api_key=api_key)
-
+def _build_gemini_prompt(system_prompt: str, user_prompt: str, context_chunks: List[Dict], language: str = 'en'):
     context_texts = []
     sources = []
     for c in context_chunks:
@@ -107,17 +101,41 @@ def chat_with_gemini(system_prompt: str, user_prompt: str, context_chunks: List[
 
     # Build full prompt combining system, context, and user query
     full_prompt = f"{system_full}\n\nContext (retrieved documents):\n{context_combined}\n\nUser question: {user_prompt}"
+    return full_prompt, sources
 
-    # Use GenerativeModel API - using flash-latest for better quota limits
-    model = genai.GenerativeModel('gemini-flash-latest')
-    response = model.generate_content(
-        full_prompt,
-        generation_config=genai.types.GenerationConfig(
-            temperature=0.1,
-            max_output_tokens=800
-        )
-    )
 
-    # Extract text
-    out = response.text if hasattr(response, 'text') else str(response)
+def chat_with_gemini(system_prompt: str, user_prompt: str, context_chunks: List[Dict], language: str = 'en'):
+    if not RAG_ROUTER.is_available():
+        raise EnvironmentError('Set GEMINI_API_KEY (or GROQ_API_KEY for failover) in environment to use the LLM.')
+
+    full_prompt, sources = _build_gemini_prompt(system_prompt, user_prompt, context_chunks, language)
+
+    # Gemini flash-latest first (better quota limits), Groq as failover; the
+    # router enforces a deadline, retries and per-provider circuit breakers.
+    out = RAG_ROUTER.generate(full_prompt, max_tokens=800)
+    if out is None:
+        raise RuntimeError('No LLM provider answered before the deadline.')
     return out, list(dict.fromkeys(sources))
+
+
+def stream_chat_with_gemini(system_prompt: str, user_prompt: str, context_chunks: List[Dict],
+                            language: str = 'en', api_base: str = None) -> GeminiStream:
+    """Streaming variant of chat_with_gemini.
+
+    Returns a GeminiStream: iterate it (or pass it to st.write_stream) to get text
+    deltas as they arrive; .text, .sources and .ttft_ms are set once it is exhausted.
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise EnvironmentError('Set GEMINI_API_KEY in environment to use Gemini.')
+
+    full_prompt, sources = _build_gemini_prompt(system_prompt, user_prompt, context_chunks, language)
+    deltas = GeminiClient.stream_text(
+        full_prompt,
+        model='gemini-flash-latest',
+        temperature=0.1,
+        max_output_tokens=800,
+        api_key=api_key,
+        api_base=api_base
+    )
+    return GeminiStream(deltas, sources=sources, event_name='rag_gemini_stream')
@@ -0,0 +1,190 @@
+"""
+rate_limiter.py - Token-bucket rate limiting for provider quotas
+A TokenBucket refills continuously up to its capacity; RateLimiter combines a
+requests-per-minute and a tokens-per-minute bucket so a call only proceeds
+when both quotas have room, instead of finding out from a 429.
+
+One RateLimiter is shared per provider account by everything in the process
+(the chat's worker threads and asyncio batch jobs alike). Waiting callers are
+admitted in priority lanes: interactive turns before batch work, first come
+first served within a lane.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# Request priorities (lower is served first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# How often a coroutine queued behind another caller re-checks its place
+LANE_POLL_S = 0.05
+
+
+class TokenBucket:
+    """Continuously refilling bucket; acquiring more than is available waits."""
+
+    def __init__(self, capacity: float, refill_per_s: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_s = float(refill_per_s)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_s)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            missing = amount - self._tokens
+        return max(0.0, missing / self.refill_per_s) if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        """Remove tokens unconditionally (the balance may go negative)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+
+    def penalize(self, seconds: float):
+        """Empty the bucket and push its refill `seconds` into the future (e.g. Retry-After)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.refill_per_s
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one provider.
+
+    acquire() (coroutines) and acquire_blocking() (threads) share one line of
+    waiters ordered by (priority, arrival); only the caller at the head of the
+    line may take quota, so batch work never overtakes a waiting interactive call.
+    """
+
+    def __init__(self, rpm: float, tpm: float, clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(rpm, rpm / 60.0, clock)
+        self.tokens = TokenBucket(tpm, tpm / 60.0, clock)
+        self.waits = 0
+        self.waited_s = 0.0
+        self._cond = threading.Condition()
+        self._line = []
+        self._seq = itertools.count()
+
+    def wait_time(self, tokens: float) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def _join(self, priority: int) -> Tuple[int, int]:
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._line, ticket)
+        return ticket
+
+    def _leave(self, ticket: Tuple[int, int]):
+        with self._cond:
+            if ticket in self._line:
+                self._line.remove(ticket)
+                heapq.heapify(self._line)
+                self._cond.notify_all()
+
+    def _admit(self, ticket: Tuple[int, int], tokens: float) -> Optional[float]:
+        """Take the quota if `ticket` is first in line and it fits: 0.0; seconds to wait; None if not first."""
+        with self._cond:
+            if self._line[0] != ticket:
+                return None
+            delay = self.wait_time(tokens)
+            if delay > 0:
+                return delay
+            heapq.heappop(self._line)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._cond.notify_all()
+            return 0.0
+
+    def _waited(self, start: float):
+        with self._cond:
+            self.waits += 1
+            self.waited_s += time.monotonic() - start
+
+    async def acquire(self, tokens: float, priority: int = PRIORITY_INTERACTIVE):
+        """Wait until one request and `tokens` tokens fit both quotas, then take them."""
+        start = time.monotonic()
+        ticket = self._join(priority)
+        waited = False
+        try:
+            while True:
+                delay = self._admit(ticket, tokens)
+                if delay == 0:
+                    break
+                waited = True
+                await asyncio.sleep(LANE_POLL_S if delay is None else delay)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        if waited:
+            self._waited(start)
+
+    def acquire_blocking(self, tokens: float, priority: int = PRIORITY_INTERACTIVE,
+                         timeout: Optional[float] = None) -> bool:
+        """Thread version of acquire(); False (nothing taken) if the quota is not free within `timeout`."""
+        start = time.monotonic()
+        ticket = self._join(priority)
+        waited = False
+        with self._cond:
+            while True:
+                delay = self._admit(ticket, tokens)
+                if delay == 0:
+                    break
+                remaining = None if timeout is None else start + timeout - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._leave(ticket)
+                    return False
+                waited = True
+                # Woken early whenever the line moves
+                self._cond.wait(min(d for d in (delay, remaining, LANE_POLL_S * 20) if d is not None))
+        if waited:
+            self._waited(start)
+        return True
+
+    def penalize(self, seconds: float):
+        """Back off both buckets after a 429."""
+        self.requests.penalize(seconds)
+        self.tokens.penalize(seconds)
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            'requests_available': self.requests.available,
+            'tokens_available': self.tokens.available,
+            'waiting': len(self._line),
+            'waits': self.waits,
+            'waited_s': self.waited_s
+        }
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether a provider SDK error is a 429."""
+    return getattr(error, 'status_code', None) == 429
+
+
+def retry_after(error: Exception, default: float = 2.0) -> float:
+    """Seconds a 429 asks us to wait (its Retry-After header), or `default`."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after', default))
+    except (AttributeError, TypeError, ValueError):
+        return default
@@ -0,0 +1,250 @@
+"""
+rescore.py - Re-score a file of loan applications with the decision rules
+Streams a CSV or JSONL of applications in chunks, shards the chunks across a
+process pool that runs the same rules as the app (decide_applicant, which
+calls underwriting_agent and fraud_agent, plus check_eligibility for the
+chat's eligibility path), and appends one JSONL decision per application in
+input order.
+
+At most `workers * 2` chunks are in flight, so memory stays bounded however
+large the input is. Every output row carries its input offset; --resume
+continues after the last complete row of an existing output file.
+
+Input fields: phone, requested_amount, and optionally monthly_income,
+credit_score and application_id (empty = not given). A row that cannot be
+parsed or scored does not stop the run: it gets decision 'error' with the
+reason in 'error', and the stats count it.
+
+Usage:
+    python rescore.py applications.csv --out data/decisions.jsonl --workers 4
+    python rescore.py applications.jsonl --out data/decisions.jsonl --resume
+    python rescore.py applications.csv --out part2.jsonl --start-offset 500000
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agents import load_db
+from eligibility import check_eligibility
+from orchestration import decide_applicant
+
+CHUNK_SIZE = 5000
+PROGRESS_EVERY_S = 5.0
+
+_DB = None
+
+
+def _number(value, cast, field: str):
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} is not a number: {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{field} is not finite: {value!r}")
+    return cast(number)
+
+
+def _json_rows(f) -> Iterator[Any]:
+    # A line that is not valid JSON is passed on as its error, keeping offsets aligned
+    for line in f:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+
+def _parse_application(offset: int, raw: Any) -> Dict[str, Any]:
+    """One input row as a scoring row; 'error' is set (and the rest may be None) when it is unusable."""
+    row = {'offset': offset, 'application_id': None, 'phone': None, 'requested_amount': None,
+           'monthly_income': None, 'credit_score': None, 'error': None}
+    if isinstance(raw, Exception):
+        row['error'] = f"invalid JSON: {raw}"
+        return row
+    if not isinstance(raw, dict):
+        row['error'] = "row is not an object"
+        return row
+
+    row['application_id'] = raw.get('application_id')
+    phone = raw.get('phone')
+    row['phone'] = None if phone in (None, '') else str(phone)
+    try:
+        row['requested_amount'] = _number(raw.get('requested_amount'), float, 'requested_amount')
+        row['monthly_income'] = _number(raw.get('monthly_income'), float, 'monthly_income')
+        row['credit_score'] = _number(raw.get('credit_score'), int, 'credit_score')
+    except ValueError as e:
+        row['error'] = str(e)
+        return row
+    if row['phone'] is None:
+        row['error'] = "phone is missing"
+    elif row['requested_amount'] is None:
+        row['error'] = "requested_amount is missing"
+    return row
+
+
+def iter_applications(path: str, start_offset: int = 0) -> Iterator[Dict[str, Any]]:
+    """Stream applications from a .csv or .jsonl file, skipping the first start_offset rows."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if Path(path).suffix.lower() == '.csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = _json_rows(f)
+        for offset, raw in enumerate(rows):
+            if offset < start_offset:
+                continue
+            yield _parse_application(offset, raw)
+
+
+def iter_chunks(rows: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker():
+    # Each worker opens the CRM itself (SQLite connections cannot cross processes)
+    global _DB
+    _DB = load_db()
+
+
+def score_chunk(rows: List[Dict[str, Any]]) -> Tuple[List[str], int]:
+    """Decide one chunk; returns the JSONL lines to write, in input order, and how many are errors."""
+    db = _DB if _DB is not None else load_db()
+    lines = []
+    errors = 0
+    for row in rows:
+        error = row.get('error')
+        if error is None:
+            try:
+                lines.append(_decision_line(row, db))
+                continue
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        errors += 1
+        lines.append(json.dumps({
+            'offset': row['offset'],
+            'application_id': row['application_id'],
+            'phone': row['phone'],
+            'requested_amount': row['requested_amount'],
+            'decision': 'error',
+            'error': error,
+        }, ensure_ascii=False))
+    return lines, errors
+
+
+def _decision_line(row: Dict[str, Any], db) -> str:
+    outcome = decide_applicant(row['phone'], row['requested_amount'], row['monthly_income'],
+                               row['credit_score'], db)
+    eligibility = check_eligibility(row['requested_amount'], {
+        'pre_approved_limit': outcome['preapproved_limit'] or 0,
+        'credit_score': outcome['credit_used'] or 0,
+    })
+    return json.dumps({
+        'offset': row['offset'],
+        'application_id': row['application_id'],
+        'phone': row['phone'],
+        'requested_amount': row['requested_amount'],
+        'decision': outcome['decision'],
+        'reason': outcome['reason'],
+        'eligibility_path': eligibility,
+        'underwriting': outcome['underwriting'],
+        'fraud': outcome['fraud'],
+        'documents': outcome['documents'],
+    }, ensure_ascii=False)
+
+
+def resume_offset(out_path: str) -> int:
+    """
+    Input offset to continue from, given an existing output file.
+
+    A torn last line (interrupted write) is cut off so appending starts on
+    a clean line.
+    """
+    path = Path(out_path)
+    if not path.exists():
+        return 0
+    next_offset = 0
+    good_bytes = 0
+    with path.open('rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                next_offset = json.loads(line)['offset'] + 1
+            except (ValueError, KeyError):
+                break
+            good_bytes += len(line)
+    if good_bytes != path.stat().st_size:
+        with path.open('r+b') as f:
+            f.truncate(good_bytes)
+    return next_offset
+
+
+def rescore(input_path: str, out_path: str, workers: int = 4, chunk_size: int = CHUNK_SIZE,
+            start_offset: Optional[int] = None, resume: bool = False) -> Dict[str, Any]:
+    """Run the re-scoring job; returns row and error counts and throughput."""
+    if resume:
+        start_offset = resume_offset(out_path)
+    start_offset = start_offset or 0
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+
+    chunks = iter_chunks(iter_applications(input_path, start_offset), chunk_size)
+    rows = errors = 0
+    start = last_report = time.perf_counter()
+    ctx = multiprocessing.get_context('spawn')
+    with open(out_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(score_chunk, chunk))
+            # Write finished chunks in order; cap what is buffered
+            while in_flight and (in_flight[0].done() or len(in_flight) >= workers * 2):
+                written, failed = _write(out, in_flight.popleft().result())
+                rows, errors = rows + written, errors + failed
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_EVERY_S:
+                last_report = now
+                print(f"{start_offset + rows:,} rows, {rows / (now - start):,.0f} rows/s", file=sys.stderr)
+        while in_flight:
+            written, failed = _write(out, in_flight.popleft().result())
+            rows, errors = rows + written, errors + failed
+
+    elapsed = time.perf_counter() - start
+    return {'start_offset': start_offset, 'rows': rows, 'errors': errors, 'next_offset': start_offset + rows,
+            'elapsed_s': round(elapsed, 3), 'rows_per_s': round(rows / elapsed) if elapsed else 0}
+
+
+def _write(out, scored: Tuple[List[str], int]) -> Tuple[int, int]:
+    lines, errors = scored
+    out.write('\n'.join(lines) + '\n')
+    out.flush()
+    return len(lines), errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Re-score a file of loan applications')
+    parser.add_argument('input', help='CSV or JSONL of applications')
+    parser.add_argument('--out', default='data/decisions.jsonl')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--start-offset', type=int, default=None, help='skip this many input rows')
+    parser.add_argument('--resume', action='store_true', help='continue after the last row in --out')
+    args = parser.parse_args()
+
+    stats = rescore(args.input, args.out, args.workers, args.chunk_size, args.start_offset, args.resume)
+    print(json.dumps(stats, indent=2))
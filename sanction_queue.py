@@ -0,0 +1,168 @@
+"""
+sanction_queue.py - Background rendering of sanction letters
+Decisions no longer wait for the PDF: run_pipeline submits the letter here
+and returns its job id straight away, a small worker pool renders it with
+agents.sanction_agent, and callers poll status() (or wait()) for the file.
+
+Jobs are content-addressed: the job id is the hash of what the letter says
+and the applicant's phone (agents.sanction_letter_id), and the file is
+outputs/sanction_<id>.pdf. The same letter for the same applicant is
+rendered once, applicants with the same name and amount but different
+phones never share a file, and a letter rendered before a restart is still
+found on disk.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from agents import sanction_agent, sanction_letter_id
+from logger import AuditTrail, PerformanceMonitor
+
+SANCTION_DIR = Path(os.getenv('BANKGPT_SANCTION_DIR', 'outputs'))
+SANCTION_WORKERS = int(os.getenv('BANKGPT_SANCTION_WORKERS', '2'))
+
+# Finished jobs kept in memory; older ones are answered from disk
+MAX_JOBS = 1024
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=SANCTION_WORKERS, thread_name_prefix='sanction')
+
+
+def letter_path(job_id: str, output_dir: Optional[Path] = None) -> Path:
+    return Path(output_dir or SANCTION_DIR) / f"sanction_{job_id}.pdf"
+
+
+class SanctionLetters:
+    """Process-wide letter job queue: submit, poll, wait."""
+
+    _lock = threading.Lock()
+    _jobs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+    rendered = 0
+    reused = 0
+    failed = 0
+
+    @staticmethod
+    def submit(applicant_name: str, amount: float, phone: Optional[str] = None,
+               output_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Queue a letter for rendering and return at once.
+
+        Args:
+            applicant_name: Name printed on the letter
+            amount: Sanctioned amount
+            phone: Applicant phone: part of the job id, masked on the letter
+            output_dir: Where letters go (BANKGPT_SANCTION_DIR, default outputs/)
+
+        Returns:
+            The job's status (see status()); 'ready' straight away when the
+            same letter was rendered before
+        """
+        output_dir = Path(output_dir or SANCTION_DIR)
+        job_id = sanction_letter_id(applicant_name, amount, phone)
+        path = letter_path(job_id, output_dir)
+
+        with SanctionLetters._lock:
+            # Join an in-flight render; failed jobs and deleted files are rendered again
+            job = SanctionLetters._jobs.get(job_id)
+            if job is not None and job['path'] == str(path) and (
+                    job['status'] in ('queued', 'rendering') or (job['status'] == 'ready' and path.exists())):
+                if job['status'] == 'ready':
+                    SanctionLetters.reused += 1
+                return SanctionLetters._public(job)
+            job = {
+                'job_id': job_id,
+                'status': 'ready' if path.exists() else 'queued',
+                'path': str(path),
+                'error': None,
+                'submitted_at': time.time(),
+                'render_ms': None,
+                'done': threading.Event()
+            }
+            SanctionLetters._jobs[job_id] = job
+            SanctionLetters._trim()
+            if job['status'] == 'ready':
+                SanctionLetters.reused += 1
+                job['done'].set()
+                return SanctionLetters._public(job)
+
+        _EXECUTOR.submit(SanctionLetters._render, job, applicant_name, amount, phone, output_dir)
+        return SanctionLetters._public(job)
+
+    @staticmethod
+    def _render(job: Dict[str, Any], applicant_name: str, amount: float, phone: Optional[str], output_dir: Path):
+        with SanctionLetters._lock:
+            job['status'] = 'rendering'
+        start = time.perf_counter()
+        try:
+            path = sanction_agent(applicant_name, amount, output_dir, phone=phone)
+        except Exception as e:
+            print(f"Sanction letter {job['job_id']} failed: {e}")
+            with SanctionLetters._lock:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+                SanctionLetters.failed += 1
+            job['done'].set()
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with SanctionLetters._lock:
+            job['status'] = 'ready'
+            job['path'] = str(path)
+            job['render_ms'] = round(elapsed_ms, 2)
+            SanctionLetters.rendered += 1
+        job['done'].set()
+        PerformanceMonitor.record('sanction_render', elapsed_ms, {'job_id': job['job_id']})
+        AuditTrail.log_sanction_generated(phone or '', str(path), amount)
+
+    @staticmethod
+    def status(job_id: str, output_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Where a job is: 'queued', 'rendering', 'ready' (path is the PDF),
+        'failed' (error says why) or 'unknown'.
+        """
+        with SanctionLetters._lock:
+            job = SanctionLetters._jobs.get(job_id)
+            if job is not None:
+                return SanctionLetters._public(job)
+        path = letter_path(job_id, output_dir)
+        return {'job_id': job_id, 'status': 'ready' if path.exists() else 'unknown',
+                'path': str(path) if path.exists() else None, 'error': None, 'render_ms': None}
+
+    @staticmethod
+    def wait(job_id: str, timeout: Optional[float] = None, output_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """Block until the job is ready or failed (or the timeout passes); returns its status."""
+        with SanctionLetters._lock:
+            job = SanctionLetters._jobs.get(job_id)
+        if job is not None:
+            job['done'].wait(timeout)
+        return SanctionLetters.status(job_id, output_dir)
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with SanctionLetters._lock:
+            pending = sum(1 for job in SanctionLetters._jobs.values() if job['status'] in ('queued', 'rendering'))
+            return {'pending': pending, 'rendered': SanctionLetters.rendered,
+                    'reused': SanctionLetters.reused, 'failed': SanctionLetters.failed}
+
+    @staticmethod
+    def reset():
+        """Forget finished jobs and counters (files on disk are kept)."""
+        with SanctionLetters._lock:
+            for job_id in [k for k, job in SanctionLetters._jobs.items() if job['done'].is_set()]:
+                del SanctionLetters._jobs[job_id]
+            SanctionLetters.rendered = SanctionLetters.reused = SanctionLetters.failed = 0
+
+    @staticmethod
+    def _trim():
+        # Caller holds the lock; only finished jobs are dropped
+        excess = len(SanctionLetters._jobs) - MAX_JOBS
+        for job_id in [k for k, job in SanctionLetters._jobs.items() if job['done'].is_set()][:max(0, excess)]:
+            del SanctionLetters._jobs[job_id]
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: job[key] for key in ('job_id', 'status', 'path', 'error', 'render_ms')}
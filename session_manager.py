@@ -3,6 +3,9 @@
 import streamlit as st
 from typing import Dict, Any, List, Optional
 
+# First assistant message of every session
+WELCOME_MESSAGE = "Namaste! 🙏 I am BankGPT. I can help you get a personal loan in under 10 minutes. Are you looking for a loan today? (You can speak in Hindi or English)"
+
 
 def init_session():
     """Initialize all session state keys for the conversation flow."""
@@ -14,6 +17,8 @@ def init_session():
             'credit_score': None,
             'pre_approved_limit': 0,
             'requested_amount': 0,
+            'tenure_months': None,  # stated by the customer; templates default to 60
+            'offers_shown': False,  # last reply listed counter-offers the customer can pick
             'eligibility_path': None,
             'fraud_status': 'Pending',
             'decision': 'Pending',
@@ -22,14 +27,15 @@ def init_session():
             'income': 0,
             'verified': False,
             'voice_enabled': False,
-            'language': 'English'
+            'language': 'English',
+            'conversation_summary': None  # ConversationSummary, created on the first agent turn
         }
     
     if 'messages' not in st.session_state:
         st.session_state['messages'] = [
             {
                 "role": "assistant",
-                "content": "Namaste! 🙏 I am BankGPT. I can help you get a personal loan in under 10 minutes. Are you looking for a loan today? (You can speak in Hindi or English)"
+                "content": WELCOME_MESSAGE
             }
         ]
 
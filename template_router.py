@@ -0,0 +1,323 @@
+"""
+template_router.py - Deterministic template fast path for scripted stages
+Answers turns whose content is fully determined by conversation state
+(profile found with eligibility, EMI table and pitch, fast-track approval
+with EMI, salary slip request with counter-offers, phone prompts) straight
+from language_helper templates, so the LLM is only called for free-form turns.
+
+Counter-offers are priced at TEMPLATE_RATE, the rate every approval quotes,
+so an offer the customer picks is approved on exactly the terms shown.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from extraction import MAX_TENURE_MONTHS, MIN_TENURE_MONTHS, extract_phone
+from language_helper import PHASE_2_TEMPLATES, get_response_template
+from offer_optimiser import ELIGIBLE_BAND, OFFER_TENURES, counter_offers
+from policy_engine import get_policy
+from utils import compute_emi, compute_foir, eligibility_band
+
+# Offer terms quoted by the templates ("11% interest rate"); the tenure is
+# the customer's stated tenure when they gave one. The chat's flat rate
+# overrides the underwriting table's rate band (documented in data/policy.json)
+TEMPLATE_RATE = 11.0
+TEMPLATE_TENURE_MONTHS = 60
+
+PHONE_ATTEMPT_PATTERN = re.compile(r'\b\d{8,11}\b')
+
+
+def _crm_profile(state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """CRM fields of a verified customer, in the shape offer_optimiser expects."""
+    if not state.get('verified'):
+        return None
+    return {
+        'credit_score': state.get('credit_score'),
+        'income': state.get('income'),
+        'approved_amount': state.get('pre_approved_limit', 0),
+        'blacklisted': state.get('blacklisted', False)
+    }
+
+
+def _foir_breach(amount: float, emi: float, profile: Optional[Dict[str, Any]]) -> Optional[float]:
+    """FOIR of the quoted EMI when it is outside the eligible band, else None."""
+    if not profile or not profile.get('income'):
+        return None
+    foir = compute_foir(profile['income'], 0, emi)
+    if eligibility_band(foir, profile.get('credit_score')) == ELIGIBLE_BAND:
+        return None
+    return foir
+
+
+class TemplateRouter:
+    """Routes deterministic stage transitions to templates and counts fast-path turns."""
+
+    _lock = threading.Lock()
+    _turns = 0
+    _template_turns = 0
+    _failed_turns = 0
+
+    @staticmethod
+    def route(user_input: str, stage: str, extracted: Dict[str, Any],
+              state: Dict[str, Any], language: str) -> Optional[str]:
+        """
+        Return a template reply if this turn is fully determined by state.
+
+        Args:
+            user_input: User's message
+            stage: Conversation stage before this turn
+            extracted: Slots extracted from this turn (_extract_information)
+            state: Conversation state before this turn
+            language: Detected language ('english', 'hindi', 'hinglish')
+
+        Returns:
+            Template text, or None when the turn needs the LLM
+        """
+        merged = {**state, **extracted}
+        verified_now = bool(extracted.get('verified'))
+        amount_now = bool(extracted.get('requested_amount'))
+        tenure_now = bool(extracted.get('tenure_months'))
+
+        # A tenure we do not offer: ask again before quoting anything
+        if extracted.get('tenure_out_of_range'):
+            return get_response_template('intent', 'tenure_out_of_range', language,
+                                         months=extracted['tenure_out_of_range'],
+                                         min_months=MIN_TENURE_MONTHS, max_months=MAX_TENURE_MONTHS)
+
+        # Amount given (or a counter-offer picked, or a tenure for the amount
+        # already asked for) for a verified customer: the verdict is deterministic
+        if (amount_now or (tenure_now and merged.get('requested_amount'))) and merged.get('verified'):
+            return TemplateRouter.eligibility_reply(
+                merged['requested_amount'], merged.get('pre_approved_limit', 0), language,
+                profile=_crm_profile(merged), tenure_months=merged.get('tenure_months'),
+                show_offers=not extracted.get('accepted_offer')
+            )
+
+        # Phone just verified: the profile's offer, then ask for the amount.
+        # The precomputed bundle (offer_cache) when there is a fresh one
+        if verified_now:
+            offer = extracted.get('offer') or TemplateRouter.verified_offer(
+                merged.get('customer_name', ''), merged.get('credit_score'),
+                merged.get('income', 0), merged.get('pre_approved_limit', 0)
+            )
+            return TemplateRouter.verified_reply(offer, language)
+
+        if stage == 'phone_asked' and not state.get('phone'):
+            if extract_phone(user_input):
+                # A well-formed number that the CRM did not recognise
+                return get_response_template(2, 'phone_not_found', language)
+            if PHONE_ATTEMPT_PATTERN.search(user_input) and not amount_now:
+                return get_response_template(2, 'invalid_phone', language)
+            if '?' not in user_input and not amount_now:
+                return get_response_template(2, 'verify_prompt', language)
+
+        return None
+
+    @staticmethod
+    def verified_offer(name: str, credit_score: Optional[int], income: float, limit: float) -> Dict[str, Any]:
+        """
+        What the chat shows once the phone is verified: profile, how far the
+        customer can borrow on each path, EMIs at the limit for every offer
+        tenure, and the pitch in each language. offer_cache stores exactly this.
+        """
+        thresholds = get_policy().thresholds
+        score = credit_score or 0
+        limit = int(limit or 0)
+        return {
+            'profile': {'name': name, 'credit_score': credit_score, 'income': income, 'pre_approved_limit': limit},
+            'eligibility': {
+                'fast_track_up_to': limit if score >= thresholds['good_score'] else 0,
+                'conditional_up_to': int(thresholds['conditional_limit_multiple'] * limit)
+                if score >= thresholds['min_score'] else 0
+            },
+            'rate': TEMPLATE_RATE,
+            'emi_table': [{'tenure_months': n, 'emi': int(round(compute_emi(float(limit), TEMPLATE_RATE, n)))}
+                          for n in OFFER_TENURES] if limit else [],
+            'pitch': {language: get_response_template(2, 'offer_pitch', language) for language in PHASE_2_TEMPLATES}
+        }
+
+    @staticmethod
+    def verified_reply(offer: Dict[str, Any], language: str) -> str:
+        """Profile-found reply rendered from a verified_offer() (or an offer_cache bundle)."""
+        profile, eligibility = offer['profile'], offer['eligibility']
+        details = ''
+        if eligibility['fast_track_up_to']:
+            details += get_response_template(2, 'eligibility_fast', language, amount=eligibility['fast_track_up_to'])
+        if eligibility['conditional_up_to'] > eligibility['fast_track_up_to']:
+            details += get_response_template(2, 'eligibility_conditional', language,
+                                             amount=eligibility['conditional_up_to'])
+        if offer['emi_table']:
+            details += get_response_template(2, 'emi_table_header', language,
+                                             amount=profile['pre_approved_limit'], rate=offer['rate'])
+            details += ''.join(get_response_template(2, 'emi_table_line', language, **row)
+                               for row in offer['emi_table'])
+        if details:
+            details += offer['pitch'].get(language) or offer['pitch']['english']
+        return get_response_template(
+            2, 'profile_found', language,
+            name=profile['name'],
+            credit_score=profile['credit_score'],
+            income=profile['income'],
+            pre_approved_limit=profile['pre_approved_limit'],
+            offer_details=details
+        )
+
+    @staticmethod
+    def chat_offers(amount: float, limit: float, profile: Optional[Dict[str, Any]],
+                    tenure_months: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Counter-offers the chat lists for a request: above the pre-approved
+        limit, or within it when the quoted EMI breaks FOIR. Deterministic for
+        a given state, so a later "option 2" picks exactly what was shown.
+        Priced at TEMPLATE_RATE, like every other chat quote, rather than the
+        underwriting rate, so a picked offer's EMI matches its approval.
+        """
+        if not profile or not amount:
+            return []
+        if amount <= limit:
+            emi = compute_emi(float(amount), TEMPLATE_RATE, tenure_months or TEMPLATE_TENURE_MONTHS)
+            if _foir_breach(amount, emi, profile) is None:
+                return []
+        return counter_offers(profile, amount, rates=(TEMPLATE_RATE,))
+
+    @staticmethod
+    def picked_offer(choice: Optional[int], state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The counter-offer numbered `choice` in the list shown for this state,
+        if the previous reply listed offers (state['offers_shown']).
+        """
+        if not choice or not state.get('offers_shown') or not state.get('requested_amount'):
+            return None
+        offers = TemplateRouter.chat_offers(state['requested_amount'], state.get('pre_approved_limit', 0),
+                                            _crm_profile(state), state.get('tenure_months'))
+        return offers[choice - 1] if choice <= len(offers) else None
+
+    @staticmethod
+    def eligibility_reply(amount: float, limit: float, language: str,
+                          profile: Optional[Dict[str, Any]] = None,
+                          tenure_months: Optional[int] = None, show_offers: bool = True) -> str:
+        """
+        Fast-track approval with EMI, or a salary slip request above the limit.
+
+        With the customer's CRM profile, requests above the limit also get a
+        numbered list of the best counter-offers the policy would approve
+        (chat_offers); so do approvals whose EMI breaks FOIR, after a note
+        on the EMI's share of income. The EMI is quoted over tenure_months
+        (default TEMPLATE_TENURE_MONTHS).
+        """
+        tenure = tenure_months or TEMPLATE_TENURE_MONTHS
+        emi = compute_emi(float(amount), TEMPLATE_RATE, tenure)
+        offers = TemplateRouter.chat_offers(amount, limit, profile, tenure_months) if show_offers else []
+
+        if amount <= limit:
+            reply = get_response_template(
+                2.5, 'fast_track', language,
+                amount=int(amount),
+                emi=int(round(emi)),
+                tenure_months=tenure,
+                total_interest=emi * tenure - amount
+            )
+            if offers:
+                reply += get_response_template(2.5, 'foir_breach', language, emi=int(round(emi)),
+                                               foir=_foir_breach(amount, emi, profile))
+        else:
+            reply = get_response_template(2.5, 'conditional', language, amount=int(amount), limit=int(limit))
+        if offers:
+            reply += TemplateRouter._offer_list(offers, language)
+        return reply
+
+    @staticmethod
+    def _offer_list(offers: List[Dict[str, Any]], language: str) -> str:
+        lines = [
+            get_response_template(
+                2.5, 'counter_offer_line', language,
+                index=index,
+                note=get_response_template(2.5, 'counter_offer_documents', language)
+                if offer['documents'] != 'Not Requested' else '',
+                **offer
+            )
+            for index, offer in enumerate(offers, 1)
+        ]
+        return get_response_template(2.5, 'counter_offers', language, offers='\n'.join(lines))
+
+    @staticmethod
+    def lists_offers(reply: str, state: Dict[str, Any], language: str) -> bool:
+        """Whether `reply` carries the numbered counter-offers for this state (so the next turn may pick one)."""
+        if not reply or not state.get('requested_amount'):
+            return False
+        offers = TemplateRouter.chat_offers(state['requested_amount'], state.get('pre_approved_limit', 0),
+                                            _crm_profile(state), state.get('tenure_months'))
+        return bool(offers) and TemplateRouter._offer_list(offers, language) in reply
+
+    @staticmethod
+    def intent_reply(message_type: str, language: str, **kwargs) -> Optional[str]:
+        """Fill an INTENT_TEMPLATES reply; emi_info gets EMI figures for the amount."""
+        if message_type == 'emi_info':
+            amount = float(kwargs['amount'])
+            tenure = kwargs.get('tenure_months') or TEMPLATE_TENURE_MONTHS
+            emi = compute_emi(amount, TEMPLATE_RATE, tenure)
+            kwargs = {
+                'amount': int(amount),
+                'emi': int(round(emi)),
+                'tenure_months': tenure,
+                'total_interest': emi * tenure - amount
+            }
+        return get_response_template('intent', message_type, language, **kwargs)
+
+    @staticmethod
+    def stage_reply(stage: str, state: Dict[str, Any], language: str) -> str:
+        """
+        Best scripted reply for a stage, used when the LLM misses the turn deadline.
+
+        Args:
+            stage: Conversation stage after this turn
+            state: Conversation state merged with this turn's slots
+            language: Detected language
+        """
+        amount = state.get('requested_amount')
+
+        if not state.get('verified') and stage in ('greeting', 'loan_type', 'phone_asked', 'phone_provided'):
+            return get_response_template(2, 'verify_prompt', language)
+
+        if state.get('verified') and not amount:
+            return get_response_template(1, 'response', language)
+
+        if amount and stage in ('amount_provided', 'eligibility_check', 'approved', 'document_needed'):
+            return TemplateRouter.eligibility_reply(amount, state.get('pre_approved_limit', 0), language,
+                                                    profile=_crm_profile(state),
+                                                    tenure_months=state.get('tenure_months'))
+
+        return get_response_template('fallback', 'still_working', language)
+
+    @staticmethod
+    def record_turn(served_by_template: bool, llm_failed: bool = False):
+        """Count one agent turn for the fast-path fraction; llm_failed turns got no LLM answer."""
+        with TemplateRouter._lock:
+            TemplateRouter._turns += 1
+            if served_by_template:
+                TemplateRouter._template_turns += 1
+            elif llm_failed:
+                TemplateRouter._failed_turns += 1
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Turns served with and without the LLM, and LLM turns no provider answered."""
+        with TemplateRouter._lock:
+            turns = TemplateRouter._turns
+            template_turns = TemplateRouter._template_turns
+            failed_turns = TemplateRouter._failed_turns
+        return {
+            'turns': turns,
+            'template_turns': template_turns,
+            'llm_turns': turns - template_turns - failed_turns,
+            'llm_failed_turns': failed_turns,
+            'template_fraction': (template_turns / turns) if turns else 0.0
+        }
+
+    @staticmethod
+    def reset_stats():
+        with TemplateRouter._lock:
+            TemplateRouter._turns = 0
+            TemplateRouter._template_turns = 0
+            TemplateRouter._failed_turns = 0
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio Groq client with a fake completion function.
+Verifies:
+1. The RPM bucket spaces out a burst instead of letting it hit 429s
+2. Interactive turns overtake queued batch jobs
+3. Identical in-flight prompts make one provider call
+4. A 429 backs off and the request is retried
+5. close() fails queued and running requests instead of leaving them waiting
+6. One process-wide limiter serves threads and coroutines in priority lanes,
+   and every Groq caller (chat, summaries, pitch batches) uses it
+"""
+
+import asyncio
+import threading
+import time
+
+from conversation_summary import SUMMARY_ROUTER
+from groq_integration import GROQ_LIMITER, PRIORITY_BATCH, PRIORITY_INTERACTIVE, AsyncGroqClient
+from llm_provider import CHAT_ROUTER, GroqProvider
+from pitch_batch import GroqPitchModel
+from rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeGroq:
+    """Records completion order; optionally fails the first calls with a 429."""
+
+    def __init__(self, delay: float = 0.0, rate_limit_first: int = 0):
+        self.delay = delay
+        self.rate_limit_first = rate_limit_first
+        self.prompts = []
+
+    async def __call__(self, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        if self.rate_limit_first > 0:
+            self.rate_limit_first -= 1
+            error = RuntimeError("429 Too Many Requests")
+            error.status_code = 429
+            raise error
+        return f"reply to {prompt}"
+
+
+def test_token_bucket():
+    now = [0.0]
+    bucket = TokenBucket(capacity=10, refill_per_s=2, clock=lambda: now[0])
+    assert bucket.wait_time(10) == 0
+    bucket.take(10)
+    assert bucket.wait_time(4) == 2.0
+    now[0] = 2.0
+    assert bucket.wait_time(4) == 0
+    bucket.penalize(3)
+    assert bucket.wait_time(1) == 3.5
+    print("✅ PASS: Token bucket refill and penalty")
+
+
+def test_rpm_limit_spaces_burst():
+    async def run():
+        client = AsyncGroqClient(rpm=300, tpm=10 ** 6, max_concurrency=20, complete_fn=FakeGroq())
+        client.limiter.requests.capacity = 5  # burst of 5, then 5 requests/s
+        client.limiter.requests._tokens = 5
+        start = time.monotonic()
+        replies = await asyncio.gather(*(client.generate(f"q{i}") for i in range(10)))
+        elapsed = time.monotonic() - start
+        await client.close()
+        return replies, elapsed, client.stats()
+
+    replies, elapsed, stats = asyncio.run(run())
+    print(f"10 requests at 5 burst + 5/s took {elapsed:.2f}s, {stats['waits']} waited")
+    assert all(replies)
+    assert 0.8 <= elapsed < 1.6
+    print("✅ PASS: Burst throttled to the RPM quota")
+
+
+def test_interactive_before_batch():
+    async def run():
+        fake = FakeGroq(delay=0.05)
+        client = AsyncGroqClient(max_concurrency=1, complete_fn=fake)
+        batch = [asyncio.ensure_future(client.generate(f"batch {i}", priority=PRIORITY_BATCH)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        interactive = await client.generate("interactive turn", priority=PRIORITY_INTERACTIVE)
+        await asyncio.gather(*batch)
+        await client.close()
+        return fake.prompts, interactive
+
+    order, interactive = asyncio.run(run())
+    print(f"Completion order: {order}")
+    assert interactive == "reply to interactive turn"
+    assert order.index("interactive turn") <= 1
+    print("✅ PASS: Interactive turn jumped the batch queue")
+
+
+def test_identical_prompts_coalesced():
+    async def run():
+        fake = FakeGroq(delay=0.05)
+        client = AsyncGroqClient(complete_fn=fake)
+        replies = await asyncio.gather(*(client.generate("same pitch prompt") for _ in range(10)))
+        await client.close()
+        return fake, replies, client.stats()
+
+    fake, replies, stats = asyncio.run(run())
+    assert len(fake.prompts) == 1
+    assert set(replies) == {"reply to same pitch prompt"}
+    assert stats['coalesced'] == 9
+    print("✅ PASS: 10 identical prompts, 1 provider call")
+
+
+def test_rate_limited_retry():
+    async def run():
+        fake = FakeGroq(rate_limit_first=1)
+        client = AsyncGroqClient(complete_fn=fake)
+        client.limiter.penalize = lambda seconds: None  # do not wait out the real Retry-After
+        reply = await client.generate("hello")
+        await client.close()
+        return fake, reply, client.stats()
+
+    fake, reply, stats = asyncio.run(run())
+    assert reply == "reply to hello"
+    assert len(fake.prompts) == 2 and stats['rate_limited'] == 1
+    print("✅ PASS: 429 retried after back-off")
+
+
+def test_close_fails_pending_requests():
+    async def run():
+        fake = FakeGroq(delay=5.0)
+        client = AsyncGroqClient(rpm=6000, tpm=10 ** 7, max_concurrency=1, complete_fn=fake)
+        waiting = [asyncio.ensure_future(client.generate(f"turn {i}")) for i in range(4)]
+        await asyncio.sleep(0.05)
+        start = time.monotonic()
+        await client.close()
+        results = await asyncio.wait_for(asyncio.gather(*waiting, return_exceptions=True), timeout=1)
+        return results, time.monotonic() - start, client.stats()
+
+    results, elapsed, stats = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results), results
+    assert elapsed < 1 and stats['queued'] == 0 and stats['in_flight'] == 0
+    print(f"✅ PASS: close() failed {len(results)} pending requests in {elapsed * 1000:.0f}ms")
+
+
+def test_shared_limiter_priority_lanes():
+    limiter = RateLimiter(rpm=600, tpm=10 ** 7)
+    limiter.requests.take(600)  # empty: one request every 0.1s from here on
+    order = []
+
+    def interactive_turn():
+        if limiter.acquire_blocking(10, PRIORITY_INTERACTIVE, timeout=2):
+            order.append('interactive')
+
+    async def batch(i):
+        await limiter.acquire(10, PRIORITY_BATCH)
+        order.append(f'batch {i}')
+
+    async def run():
+        tasks = [asyncio.ensure_future(batch(i)) for i in range(3)]
+        await asyncio.sleep(0.02)
+        thread = threading.Thread(target=interactive_turn)
+        thread.start()
+        await asyncio.gather(*tasks)
+        thread.join()
+
+    asyncio.run(run())
+    assert order == ['interactive', 'batch 0', 'batch 1', 'batch 2'], order
+    assert not limiter.acquire_blocking(10, timeout=0.01) and limiter.snapshot()['waiting'] == 0
+
+    groq = [p for p in CHAT_ROUTER.providers + SUMMARY_ROUTER.providers if isinstance(p, GroqProvider)]
+    assert len(groq) == 2 and all(p.limiter is GROQ_LIMITER for p in groq)
+    assert [p.priority for p in groq] == [PRIORITY_INTERACTIVE, PRIORITY_BATCH]
+    assert AsyncGroqClient().limiter is GROQ_LIMITER and GroqPitchModel().client.limiter is GROQ_LIMITER
+    print(f"✅ PASS: Admission order {order}; chat, summaries and pitches share GROQ_LIMITER")
+
+
+if __name__ == '__main__':
+    test_token_bucket()
+    test_rpm_limit_spaces_burst()
+    test_interactive_before_batch()
+    test_identical_prompts_coalesced()
+    test_rate_limited_retry()
+    test_close_fails_pending_requests()
+    test_shared_limiter_priority_lanes()
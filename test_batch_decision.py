@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test vectorised batch decisioning.
+Verifies:
+1. decide_batch matches orchestration.decide_applicant row for row on
+   randomised applicants (every decision, reason and intermediate status)
+2. Snapshot-backed CRM columns give the same decisions as the JSON CRM
+3. run_pipeline still decides through the scalar path
+"""
+
+import math
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from batch_decision import CRMColumns, decide_batch, labels
+from crm_snapshot import CRMSnapshot, build_snapshot
+from orchestration import decide_applicant, run_pipeline
+
+
+def _crm(rng: random.Random):
+    """Synthetic CRM covering missing fields, zero limits and blacklisting."""
+    crm = {}
+    for i in range(300):
+        crm[str(7000000000 + i * 7)] = {
+            'name': f'Customer {i}',
+            'credit_score': None if i % 17 == 0 else rng.randint(600, 820),
+            'income': None if i % 19 == 0 else rng.choice([0, 25000, 30000, 45000, 50000, 90000]),
+            'blacklisted': i % 11 == 0,
+            'approved_amount': None if i % 23 == 0 else rng.choice([0, 300000, 800000, 1500000]),
+        }
+    return crm
+
+
+def _applicants(crm, rng: random.Random, n: int):
+    phones = list(crm)
+    rows = []
+    for _ in range(n):
+        phone = rng.choice(phones) if rng.random() < 0.85 else str(8000000000 + rng.randrange(1000))
+        rows.append({
+            'phone': phone,
+            'requested_amount': float(rng.choice([100000, 300000, 600000, 800000, 1600000, 3100000])),
+            'monthly_income': rng.choice([None, None, 0.0, 20000.0, 40000.0, 60000.0]),
+            'credit_score': rng.choice([None, None, 0, 640, 690, 700, 760]),
+        })
+    return rows
+
+
+def _columns(rows):
+    return {
+        'phone': np.array([int(r['phone']) for r in rows], dtype=np.int64),
+        'requested_amount': np.array([r['requested_amount'] for r in rows]),
+        'monthly_income': np.array([np.nan if r['monthly_income'] is None else r['monthly_income'] for r in rows]),
+        'credit_score': np.array([np.nan if r['credit_score'] is None else r['credit_score'] for r in rows],
+                                 dtype=np.float64),
+    }
+
+
+def _same_number(scalar, vector):
+    return (scalar is None and math.isnan(vector)) or scalar == vector
+
+
+def _assert_matches(rows, crm, result):
+    keys = ('verification', 'fraud', 'underwriting', 'underwriting_reason', 'documents', 'decision',
+            'reason', 'policy_rule')
+    text = {key: labels(result, 'verified' if key == 'verification' else key) for key in keys}
+    for i, row in enumerate(rows):
+        expected = decide_applicant(row['phone'], row['requested_amount'], row['monthly_income'],
+                                    row['credit_score'], crm)
+        for key in keys:
+            assert expected[key] == text[key][i], (key, row, expected, text[key][i])
+        assert (expected['preapproved_limit'] or 0) == result['preapproved_limit'][i]
+        assert _same_number(expected['credit_used'], result['credit_used'][i])
+        assert _same_number(expected['income_used'], result['income_used'][i])
+
+
+def test_matches_scalar_path():
+    rng = random.Random(45)
+    crm = _crm(rng)
+    rows = _applicants(crm, rng, 5000)
+    result = decide_batch(_columns(rows), CRMColumns.from_records(crm))
+    _assert_matches(rows, crm, result)
+    outcomes = sorted(set(labels(result, 'decision')))
+    assert outcomes == ['Approved', 'Conditional Approval', 'Manual Review', 'Rejected']
+    print(f"✅ PASS: 5000 applicants identical to decide_applicant ({', '.join(outcomes)})")
+
+
+def test_snapshot_columns():
+    rng = random.Random(7)
+    crm = _crm(rng)
+    rows = _applicants(crm, rng, 2000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        build_snapshot(crm.items(), path)
+        from_snapshot = decide_batch(_columns(rows), CRMColumns.from_snapshot(CRMSnapshot(path)))
+    from_records = decide_batch(_columns(rows), CRMColumns.from_records(crm))
+    for key in ('decision', 'reason', 'underwriting', 'fraud', 'documents', 'verified'):
+        assert (from_snapshot[key] == from_records[key]).all(), key
+    print("✅ PASS: Snapshot CRM columns decide identically")
+
+
+def test_throughput():
+    rng = random.Random(1)
+    crm = _crm(rng)
+    columns = _columns(_applicants(crm, rng, 2000))
+    n = 1000000
+    big = {k: np.resize(v, n) for k, v in columns.items()}
+    crm_columns = CRMColumns.from_records(crm)
+    start = time.perf_counter()
+    decide_batch(big, crm_columns)
+    rate = n / (time.perf_counter() - start)
+    print(f"✅ PASS: {rate:,.0f} rows/s vectorised")
+
+
+def test_run_pipeline_uses_scalar_path():
+    result = run_pipeline("Test", "8887776665", 500000, None, None, 11.0, 5)
+    assert result['decision'] == 'Rejected' and result['fraud'] == 'Blacklisted'
+    assert result['sanction_path'] is None
+    print("✅ PASS: run_pipeline decides through decide_applicant")
+
+
+if __name__ == '__main__':
+    test_matches_scalar_path()
+    test_snapshot_columns()
+    test_throughput()
+    test_run_pipeline_uses_scalar_path()
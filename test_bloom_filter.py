@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test the phone Bloom filter.
+Verifies:
+1. No false negatives; the false-positive rate stays near its target
+2. The filter round-trips through its .npz file
+3. SQLiteCRM answers unknown numbers from the filter and reports the measured rate
+4. Added records extend the persisted filter; outgrowing it triggers a rebuild
+5. A filter that no longer matches the table is rebuilt on open
+6. Rows committed by another connection before its filter is saved are
+   still found (no stale negatives mid-import)
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from bloom_filter import BloomFilter
+from crm_store import FILTER_MIN_CAPACITY, SQLiteCRM, bulk_import
+
+
+def _record(i):
+    return {'name': f'Customer {i}', 'credit_score': 720, 'income': 50000,
+            'blacklisted': False, 'approved_amount': 600000}
+
+
+def test_membership_and_fp_rate():
+    bloom = BloomFilter(20000, fp_rate=0.01)
+    members = [str(6000000000 + i) for i in range(20000)]
+    bloom.add_many(members[:10000])
+    for phone in members[10000:]:
+        bloom.add(phone)
+    assert all(phone in bloom for phone in members)
+
+    absent = [str(9000000000 + i) for i in range(50000)]
+    fp_rate = sum(phone in bloom for phone in absent) / len(absent)
+    assert fp_rate < 0.02, fp_rate
+    assert abs(bloom.expected_fp_rate() - 0.01) < 0.005
+    print(f"✅ PASS: No false negatives, fp rate {fp_rate:.3%} (target 1%)")
+
+
+def test_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'phones.bloom.npz')
+        bloom = BloomFilter.build((str(7000000000 + i) for i in range(5000)), 5000)
+        bloom.meta['source_records'] = 5000
+        bloom.save(path)
+
+        loaded = BloomFilter.load(path)
+        assert loaded.count == 5000 and loaded.meta == {'source_records': 5000}
+        assert (loaded.bits == bloom.bits).all()
+        assert '7000004999' in loaded
+        print("✅ PASS: Filter saved and loaded")
+
+
+def test_sqlite_negative_lookups():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        bulk_import('data/mock_db.json', db_path)
+        db = SQLiteCRM(db_path)
+
+        assert db.get('9876543210')['name'] == 'Amit Kumar'
+        for i in range(1000):
+            assert db.get(str(9100000000 + i)) is None
+        stats = db.phone_filter.stats()
+        assert stats['probes'] == 1001
+        assert stats['negatives'] + stats['false_positives'] == 1000
+        assert stats['measured_fp_rate'] < 0.02
+        db.close()
+        print(f"✅ PASS: {stats['negatives']}/1000 unknown numbers answered by the filter")
+
+
+def test_incremental_and_rebuild():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        db = SQLiteCRM(db_path)
+        assert db.phone_filter.capacity == FILTER_MIN_CAPACITY
+
+        db.upsert_many([(str(7000000000 + i), _record(i)) for i in range(100)])
+        assert db.get('7000000050')['name'] == 'Customer 50'
+        reopened = SQLiteCRM(db_path)
+        assert reopened.phone_filter.meta['source_records'] == 100
+        assert '7000000099' in reopened.phone_filter
+        reopened.close()
+
+        # Outgrow the filter: it is rebuilt at twice the row count
+        db.upsert_many([(str(7100000000 + i), _record(i)) for i in range(FILTER_MIN_CAPACITY)])
+        assert db.phone_filter.capacity == 2 * (FILTER_MIN_CAPACITY + 100)
+        assert db.get(str(7100000000 + FILTER_MIN_CAPACITY - 1)) is not None
+        db.close()
+        print("✅ PASS: Filter extended in place, rebuilt when outgrown")
+
+
+def test_stale_filter_rebuilt():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        db = SQLiteCRM(db_path)
+        db.upsert_many([(str(7000000000 + i), _record(i)) for i in range(10)])
+        # Rows written behind the filter's back (another tool, manual SQL)
+        with db.conn:
+            db.conn.execute("INSERT INTO customers (phone, name) VALUES ('7999999999', 'Side Door')")
+        db.close()
+
+        reopened = SQLiteCRM(db_path)
+        assert reopened.phone_filter.meta['source_records'] == 11
+        assert reopened.get('7999999999')['name'] == 'Side Door'
+        reopened.close()
+        print("✅ PASS: Filter out of step with the table is rebuilt on open")
+
+
+def test_no_stale_negatives_mid_import():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        reader = SQLiteCRM(db_path, check_interval_s=3600)  # never reloads the filter file
+        reader.upsert_many([(str(7000000000 + i), _record(i)) for i in range(10)])
+        assert reader.get('7200000000') is None
+        negatives = reader.phone_filter.negatives
+
+        # Another process commits a batch; its filter is only saved at the end
+        importer = sqlite3.connect(db_path)
+        with importer:
+            importer.execute("INSERT INTO customers (phone, name) VALUES ('7200000000', 'Mid Import')")
+        assert reader.get('7200000000')['name'] == 'Mid Import'
+        assert reader.get('7300000000') is None
+        importer.close()
+
+        # Once the filter covers the table again, negatives skip SQLite
+        reader.rebuild_filter()
+        assert reader.get('7300000000') is None
+        assert reader.phone_filter.negatives == 1
+        assert negatives == 1
+        reader.close()
+        print("✅ PASS: Rows committed ahead of the filter are still found")
+
+
+if __name__ == '__main__':
+    test_membership_and_fp_rate()
+    test_persistence()
+    test_sqlite_negative_lookups()
+    test_incremental_and_rebuild()
+    test_stale_filter_rebuilt()
+    test_no_stale_negatives_mid_import()
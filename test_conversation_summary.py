@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test the rolling conversation summary used for the prompt's history block.
+Verifies:
+1. Older turns are folded into the summary in the background
+2. Facts from early turns survive in the summary
+3. Prompt size stays flat as the conversation grows
+4. run_unified_agent keeps the summary in the session state
+5. Folds are batched (every few messages or over a token budget) and
+   unfolded messages stay in the prompt verbatim; the LLM fold has
+   breakers separate from the chat's
+6. The LLM fold is the default and keeps early facts; the extractive fold
+   is used only when no summary provider answers
+"""
+
+import conversation_summary
+from conversation_summary import (SUMMARY_MAX_CHARS, SUMMARY_ROUTER, ConversationSummary,
+                                  extractive_fold, llm_fold)
+from llm_provider import CHAT_ROUTER, LLMProvider, ProviderRouter
+from master_agent import _build_full_prompt, run_unified_agent
+from utils import estimate_tokens
+
+
+def _conversation(turns: int) -> list:
+    history = [{'role': 'user', 'content': 'I need a loan for my daughter\'s wedding in Jaipur'},
+               {'role': 'assistant', 'content': 'Congratulations! Could you share your phone number?'}]
+    for i in range(turns):
+        history.append({'role': 'user', 'content': f'Question {i}: can you explain the processing fee again?'})
+        history.append({'role': 'assistant', 'content': f'Answer {i}: the processing fee is 1% of the amount.'})
+    return history
+
+
+def _fold_keeping_facts(summary, messages):
+    """Deterministic fold that keeps the first customer fact and counts folded messages."""
+    facts = summary or "Customer needs a loan for daughter's wedding in Jaipur."
+    return f"{facts.split(' Folded')[0]} Folded {len(messages)} more messages."
+
+
+def test_summary_folds_old_turns():
+    history = _conversation(10)
+    summary = ConversationSummary(fold_fn=_fold_keeping_facts)
+
+    summary.schedule_update(history)
+    summary.wait(timeout=5)
+
+    assert summary.upto == len(history) - summary.raw_messages
+    assert "wedding" in summary.text
+    context = summary.context(history)
+    assert context.startswith("Summary of earlier conversation:")
+    assert context.count("\n") == summary.raw_messages  # summary line + raw messages
+    print(f"✅ PASS: {summary.upto} messages folded, context: {context.splitlines()[0]}")
+
+
+def test_prompt_size_is_flat():
+    sizes = []
+    for turns in (5, 20, 80):
+        history = _conversation(turns)
+        summary = ConversationSummary(fold_fn=extractive_fold)
+        summary.schedule_update(history)
+        summary.wait(timeout=5)
+        assert len(summary.text) <= SUMMARY_MAX_CHARS
+        sizes.append(estimate_tokens(_build_full_prompt("ok", {}, history, 'amount_asked', 'english',
+                                                        summary=summary)))
+
+    print(f"Prompt tokens at 10/40/160 messages: {sizes}")
+    assert max(sizes) - min(sizes) < 60
+    print("✅ PASS: Prompt size independent of conversation length")
+
+
+def test_agent_keeps_summary_in_state():
+    state = {'phone': '9876543210', 'verified': True}
+    history = _conversation(6)
+
+    run_unified_agent("tell me about prepayment charges", state, history)
+    summary = state['conversation_summary']
+    assert isinstance(summary, ConversationSummary)
+    summary.wait(timeout=15)
+    assert summary.upto == len(history) - summary.raw_messages
+    assert summary.text
+
+    run_unified_agent("and foreclosure?", state, history)
+    assert state['conversation_summary'] is summary
+    print("✅ PASS: Summary stored in session state and reused")
+
+
+def test_folds_are_batched():
+    folds = []
+
+    def counting_fold(summary, messages):
+        folds.append(len(messages))
+        return extractive_fold(summary, messages)
+
+    summary = ConversationSummary(fold_fn=counting_fold, raw_messages=4, fold_every=6, fold_token_budget=10 ** 6)
+    history = _conversation(0)
+    for i in range(12):
+        history += [{'role': 'user', 'content': f'Question {i}'}, {'role': 'assistant', 'content': f'Answer {i}'}]
+        summary.schedule_update(history)
+        summary.wait(timeout=5)
+        # Everything not yet folded is still in the prompt
+        context = summary.context(history)
+        for msg in history[summary.upto:]:
+            assert msg['content'] in context
+    assert len(folds) == 3 and all(n >= 6 for n in folds), folds
+
+    # A long backlog folds early on the token budget
+    wordy = ConversationSummary(fold_fn=counting_fold, raw_messages=2, fold_every=50, fold_token_budget=100)
+    wordy.schedule_update(_conversation(3) + [{'role': 'user', 'content': 'word ' * 300}] * 2)
+    wordy.wait(timeout=5)
+    assert wordy.upto == 8
+
+    for provider in SUMMARY_ROUTER.providers:
+        assert all(provider.breaker is not p.breaker for p in CHAT_ROUTER.providers)
+    print(f"✅ PASS: 24 messages folded in {len(folds)} batches; summary breakers separate from chat")
+
+
+class ScriptedSummaryProvider(LLMProvider):
+    """Summary provider that answers with a fixed summary, or not at all."""
+
+    name = 'scripted_summary'
+
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+        self.prompts = []
+
+    def is_available(self) -> bool:
+        return True
+
+    def _complete(self, prompt, max_tokens, timeout, json_mode=False):
+        self.prompts.append(prompt)
+        return self.reply
+
+
+def test_llm_fold_is_default_with_extractive_fallback():
+    assert ConversationSummary()._fold is llm_fold
+
+    history = _conversation(80)
+    saved = conversation_summary.SUMMARY_ROUTER
+    try:
+        provider = ScriptedSummaryProvider("Customer needs a loan for daughter's wedding in Jaipur; "
+                                           "asked about the 1% processing fee.")
+        conversation_summary.SUMMARY_ROUTER = ProviderRouter([provider], deadline_s=5, max_retries=0)
+        summary = ConversationSummary()
+        summary.schedule_update(history)
+        summary.wait(timeout=5)
+        assert provider.prompts and 'wedding' in provider.prompts[0]
+        assert 'wedding' in summary.text
+
+        # No provider answers: the extractive fold keeps the most recent text
+        conversation_summary.SUMMARY_ROUTER = ProviderRouter([ScriptedSummaryProvider('')],
+                                                             deadline_s=5, max_retries=0)
+        fallback = ConversationSummary()
+        fallback.schedule_update(history)
+        fallback.wait(timeout=5)
+        assert fallback.text == extractive_fold('', history[:fallback.upto])
+    finally:
+        conversation_summary.SUMMARY_ROUTER = saved
+    print("✅ PASS: LLM fold keeps early facts; extractive only as fallback")
+
+
+if __name__ == '__main__':
+    test_summary_folds_old_turns()
+    test_prompt_size_is_flat()
+    test_agent_keeps_summary_in_state()
+    test_folds_are_batched()
+    test_llm_fold_is_default_with_extractive_fallback()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the columnar CRM snapshot.
+Verifies:
+1. Every mock_db.json record round-trips through the memory-mapped columns
+2. Batch lookups return row indices, -1 for unknown phones
+3. verification_agent gives the same result on the snapshot and the JSON dict
+4. A rebuilt snapshot is picked up by get_crm_snapshot
+5. Readers never fail while rebuilds swap the snapshot in
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from agents import verification_agent
+from crm_snapshot import CRMSnapshot, build_snapshot, get_crm_snapshot
+
+
+def _crm():
+    with open('data/mock_db.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_round_trip():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        stats = build_snapshot(crm.items(), path)
+        assert stats['records'] == len(crm) and stats['skipped'] == 0
+
+        snapshot = CRMSnapshot(path)
+        assert len(snapshot) == len(crm)
+        for phone, record in crm.items():
+            assert snapshot.get(phone) == record
+        assert snapshot.get('0000000000') is None
+        assert snapshot.get('98765') is None
+        assert snapshot.get('not-a-phone') is None
+        assert dict(snapshot.items()) == crm
+        print(f"✅ PASS: {len(crm)} records round-trip ({stats['bytes']} bytes on disk)")
+
+
+def test_batch_index():
+    crm = {str(7000000000 + i): {'name': f'Customer {i}', 'credit_score': 700, 'income': 40000,
+                                 'blacklisted': i % 3 == 0, 'approved_amount': 100000 * i}
+           for i in range(0, 2000, 2)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        build_snapshot(reversed(list(crm.items())), path)
+        snapshot = CRMSnapshot(path)
+
+        query = np.array([7000000000, 7000000001, 7000001998, 7000002000, 1], dtype=np.int64)
+        idx = snapshot.index_of(query)
+        assert list(idx) == [0, -1, 999, -1, -1]
+        assert list(snapshot.is_blacklisted([0, 1, 2, 3])) == [True, False, False, True]
+        assert int(snapshot.columns['approved_amount'][999]) == 199800000
+        print("✅ PASS: searchsorted batch lookups and blacklist bitset")
+
+
+def test_verification_agent_contract():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        build_snapshot(crm.items(), path)
+        snapshot = CRMSnapshot(path)
+        for phone in list(crm) + ['0000000000']:
+            assert verification_agent(phone, snapshot) == verification_agent(phone, crm)
+        print("✅ PASS: verification_agent gives the same result on the snapshot")
+
+
+def test_rebuild_is_picked_up():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        build_snapshot(crm.items(), path)
+        first = get_crm_snapshot(path)
+        assert get_crm_snapshot(path) is first
+
+        crm['9000000001'] = {'name': 'New Customer', 'credit_score': 720, 'income': 50000,
+                             'blacklisted': False, 'approved_amount': 600000}
+        build_snapshot(crm.items(), path)
+        second = get_crm_snapshot(path)
+        assert second is not first
+        assert second.get('9000000001')['name'] == 'New Customer'
+        assert first.get('9876543210')['name'] == 'Amit Kumar'  # old mapping still readable
+        print("✅ PASS: Rebuilt snapshot swapped in, old mapping unaffected")
+
+
+def test_readers_survive_rebuilds():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot')
+        # A plain directory left by an older build is replaced by the symlink
+        build_snapshot(crm.items(), path)
+        real = os.path.realpath(path)
+        os.unlink(path)
+        shutil.copytree(real, path)
+
+        stop = threading.Event()
+        errors, lookups = [], [0]
+
+        def read():
+            while not stop.is_set():
+                try:
+                    assert get_crm_snapshot(path).get('9876543210')['name'] == 'Amit Kumar'
+                    lookups[0] += 1
+                except Exception as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for i in range(5):
+                crm[str(9000000100 + i)] = {'name': f'Customer {i}', 'credit_score': 720}
+                build_snapshot(crm.items(), path)
+        finally:
+            stop.set()
+            reader.join()
+        assert not errors and lookups[0]
+        assert os.path.islink(path)
+        assert len([e for e in os.listdir(tmp) if e.startswith('snapshot.gen-')]) == 2
+        assert get_crm_snapshot(path).get('9000000104')['name'] == 'Customer 4'
+        print(f"✅ PASS: {lookups[0]} lookups during 5 rebuilds, none failed")
+
+
+if __name__ == '__main__':
+    test_round_trip()
+    test_batch_index()
+    test_verification_agent_contract()
+    test_rebuild_is_picked_up()
+    test_readers_survive_rebuilds()
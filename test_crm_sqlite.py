@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite CRM backend.
+Verifies:
+1. Importing data/mock_db.json round-trips every record through db.get(phone)
+2. JSONL and CSV exports stream in across several transactions
+3. verification_agent works unchanged against the SQLite backend
+4. Each thread uses its own connection
+"""
+
+import csv
+import json
+import os
+import tempfile
+import threading
+
+from agents import verification_agent
+from crm_store import SQLiteCRM, bulk_import
+
+
+def _crm():
+    with open('data/mock_db.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_json_round_trip():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        stats = bulk_import('data/mock_db.json', db_path)
+        assert stats['records'] == len(crm)
+
+        db = SQLiteCRM(db_path)
+        assert len(db) == len(crm)
+        for phone, record in crm.items():
+            assert db.get(phone) == record
+        assert db.get('0000000000') is None
+        assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        db.close()
+        print(f"✅ PASS: {len(crm)} records round-trip through SQLite")
+
+
+def test_streaming_import_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = os.path.join(tmp, 'crm.jsonl')
+        csv_path = os.path.join(tmp, 'crm.csv')
+        rows = [{'phone': str(7000000000 + i), 'name': f'Customer {i}', 'credit_score': 700 + i % 100,
+                 'income': 50000, 'blacklisted': i % 10 == 0, 'approved_amount': 500000 + i,
+                 'branch': 'Pune'} for i in range(250)]
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        for source in (jsonl_path, csv_path):
+            db_path = source + '.sqlite3'
+            assert bulk_import(source, db_path, batch_size=100)['records'] == 250
+            db = SQLiteCRM(db_path)
+            record = db.get('7000000010')
+            assert record['blacklisted'] is True and record['approved_amount'] == 500010
+            assert record['credit_score'] == 710 and record['branch'] == 'Pune'
+            assert len(db) == 250
+            db.close()
+        print("✅ PASS: JSONL and CSV exports imported in batches")
+
+
+def test_verification_agent_contract():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        bulk_import('data/mock_db.json', db_path)
+        db = SQLiteCRM(db_path)
+        for phone in crm:
+            assert verification_agent(phone, db) == verification_agent(phone, crm)
+        assert verification_agent('0000000000', db) == verification_agent('0000000000', crm)
+        db.close()
+        print("✅ PASS: verification_agent gives the same result on SQLite and JSON")
+
+
+def test_connection_per_thread():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'crm.sqlite3')
+        bulk_import('data/mock_db.json', db_path)
+        db = SQLiteCRM(db_path)
+        connections, errors = [], []
+
+        def worker():
+            try:
+                assert db.get('9876543210')['name'] == 'Amit Kumar'
+                connections.append(db.conn)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        assert len({id(conn) for conn in connections}) == 4
+        assert all(conn is not db.conn for conn in connections)
+        db.close()
+        print("✅ PASS: Lookups from 4 threads on separate connections")
+
+
+if __name__ == '__main__':
+    test_json_round_trip()
+    test_streaming_import_formats()
+    test_verification_agent_contract()
+    test_connection_per_thread()
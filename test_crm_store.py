@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the shared in-memory CRM store.
+Verifies:
+1. The CRM file is parsed once, however many lookups follow
+2. A changed file is reloaded; an unchanged rewrite is not re-parsed
+3. A corrupt file keeps the last good records
+4. agents.load_db and master_agent.load_mock_db share the store
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from agents import load_db
+from crm_store import CRMStore, get_crm_store
+from master_agent import load_mock_db
+
+
+def _write(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+    # Make sure the mtime differs even on coarse-grained filesystems
+    stamp = time.time() + _write.bump
+    _write.bump += 1
+    os.utime(path, (stamp, stamp))
+
+
+_write.bump = 1
+
+
+def test_parsed_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crm.json')
+        _write(path, {str(9000000000 + i): {'name': f'A{i}', 'credit_score': 700} for i in range(20000)})
+        store = CRMStore(path, check_interval_s=0)
+
+        start = time.perf_counter()
+        for i in range(20000):
+            assert store.get(str(9000000000 + i))['name'] == f'A{i}'
+        per_lookup_us = (time.perf_counter() - start) * 1e6 / 20000
+        assert store.loads == 1
+        print(f"✅ PASS: 20k lookups, 1 parse, {per_lookup_us:.1f}µs per lookup")
+
+
+def test_reload_on_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'crm.json')
+        _write(path, {'9876543210': {'name': 'Amit', 'approved_amount': 1200000}})
+        store = CRMStore(path, check_interval_s=0)
+        view = store.snapshot()
+        assert store.get('9876543210')['approved_amount'] == 1200000
+
+        _write(path, {'9876543210': {'name': 'Amit', 'approved_amount': 1500000}})
+        assert store.get('9876543210')['approved_amount'] == 1500000
+        assert view['9876543210']['approved_amount'] == 1200000  # old snapshot stays consistent
+        assert store.loads == 2
+
+        _write(path, {'9876543210': {'name': 'Amit', 'approved_amount': 1500000}})
+        store.get('9876543210')
+        assert store.loads == 2  # same content, new mtime: hash matched, no re-parse
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"9876543210": {"name": ')
+        assert store.get('9876543210')['approved_amount'] == 1500000
+        assert store.load_errors == 1
+        print("✅ PASS: Reload on change, hash-skip on identical rewrite, corrupt file ignored")
+
+
+def test_loaders_share_store():
+    assert load_db() is load_mock_db()
+    assert load_db().get('9876543210')['name'] == 'Amit Kumar'
+    assert get_crm_store('data/mock_db.json').loads == 1
+    print("✅ PASS: agents.load_db and master_agent.load_mock_db share one store")
+
+
+if __name__ == '__main__':
+    test_parsed_once()
+    test_reload_on_change()
+    test_loaders_share_store()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the compiled multilingual extractor against eval/utterances.jsonl and
+the held-out eval/utterances_heldout.jsonl.
+Verifies:
+1. Every labelled slot in both corpora is extracted exactly
+2. Phone numbers and tenures are never read as loan amounts
+3. "a"/"an" is 1 only before money units; annual incomes become monthly
+4. Picks from a numbered list are read; amounts and tenures are not picks
+5. The batch API matches the single-utterance API
+6. Compound amounts add up, amounts below the loan minimum are not loan
+   requests, and tenures outside the offered range are flagged
+"""
+
+from bench_extraction import HELDOUT_CORPUS, SLOTS, load_corpus
+from extraction import (MAX_TENURE_MONTHS, MIN_LOAN_AMOUNT, MIN_TENURE_MONTHS, extract_all,
+                        extract_batch, extract_choice)
+from offer_optimiser import OFFER_TENURES
+from template_router import TEMPLATE_TENURE_MONTHS
+
+
+def test_corpus_accuracy():
+    corpus = load_corpus() + load_corpus(HELDOUT_CORPUS)
+    misses = []
+    for row in corpus:
+        result = extract_all(row['text'])
+        for slot in SLOTS:
+            if slot in row and result[slot] != row[slot]:
+                misses.append((row['text'], slot, row[slot], result[slot]))
+
+    for miss in misses:
+        print(f"❌ MISS: {miss}")
+    assert not misses
+    print(f"✅ PASS: {len(corpus)} utterances extracted exactly")
+
+
+def test_phone_and_tenure_not_amounts():
+    assert extract_all("9876543210")['requested_amount'] is None
+    assert extract_all("I am 30 years old")['tenure_months'] is None
+    assert extract_all("for 5 years")['requested_amount'] is None
+    print("✅ PASS: No phone/amount or tenure/amount confusion")
+
+
+def test_articles_and_annual_income():
+    assert extract_all("I earn 50000 a month") == {
+        'phone': None, 'requested_amount': None, 'tenure_months': None, 'income': 50000,
+        'tenure_out_of_range': None}
+    assert extract_all("my salary is 6 lakh a year")['income'] == 50000
+    assert extract_all("income 720000 p.a.")['income'] == 60000
+    assert extract_all("salary 50000 for 2 saal")['income'] == 50000
+    assert extract_all("an hundred thousand")['requested_amount'] == 100000
+    assert extract_all("a lakh for a year")['tenure_months'] is None
+    print("✅ PASS: Articles and annual income cues handled")
+
+
+def test_offer_choice():
+    for text, choice in [("2", 2), ("option 1", 1), ("the second one", 2), ("doosra wala", 2),
+                         ("दूसरा वाला", 2), ("#3", 3), ("२", 2), ("2nd", 2), ("I'll take option 3", 3),
+                         ("offer 2 please", 2)]:
+        assert extract_choice(text) == choice, text
+    for text in ("2 lakh", "2 years", "9876543210", "hello", "I have 2 kids and need a bigger loan",
+                 "give me 2 minutes", "I will upload in 2 days", "5 hazaar", "2 3", "option"):
+        assert extract_choice(text) is None, text
+    print("✅ PASS: Offer picks read, amounts and tenures ignored")
+
+
+def test_compound_amounts_and_policy_ranges():
+    assert extract_all("5 lakh 50 thousand")['requested_amount'] == 550000
+    assert extract_all("1 crore 20 lakh")['requested_amount'] == 12000000
+    # Groups only add up when adjacent and falling; one below the minimum is skipped
+    assert extract_all("5 lakh or 6 lakh")['requested_amount'] == 500000
+    assert extract_all("50 thousand 5 lakh")['requested_amount'] == 500000
+    for text in ("15k", "I need 50,000 rupees", "5 hazaar"):
+        assert extract_all(text)['requested_amount'] is None, text
+
+    assert extract_all("3 lakh for 10 years")['tenure_out_of_range'] == 120
+    assert extract_all("3 lakh for 10 years")['tenure_months'] is None
+    assert extract_all("3 lakh for 5 years")['tenure_out_of_range'] is None
+    assert (MIN_TENURE_MONTHS, MAX_TENURE_MONTHS) == (min(OFFER_TENURES), max(OFFER_TENURES))
+    assert MAX_TENURE_MONTHS == TEMPLATE_TENURE_MONTHS and MIN_LOAN_AMOUNT == 100000
+    print("✅ PASS: Compound amounts summed; small amounts and long tenures rejected")
+
+
+def test_batch_matches_single():
+    texts = [row['text'] for row in load_corpus()]
+    assert extract_batch(texts) == [extract_all(t) for t in texts]
+    print("✅ PASS: Batch API consistent")
+
+
+if __name__ == '__main__':
+    test_corpus_accuracy()
+    test_phone_and_tenure_not_amounts()
+    test_articles_and_annual_income()
+    test_offer_choice()
+    test_compound_amounts_and_policy_ranges()
+    test_batch_matches_single()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test Gemini streaming against a local fake endpoint (no network, no API key needed).
+Verifies:
+1. Deltas arrive in order and assemble into the full answer
+2. Time-to-first-token is recorded before generation finishes
+3. Sources are available once the stream is exhausted
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gemini_integration import GeminiClient, GeminiStream
+
+CHUNKS = ["Personal loans ", "need KYC ", "documents [kyc.pdf]."]
+CHUNK_DELAY = 0.05
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Minimal streamGenerateContent?alt=sse endpoint."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        assert body['contents'][0]['parts'][0]['text']
+        assert ':streamGenerateContent' in self.path and 'alt=sse' in self.path
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for text in CHUNKS:
+            event = {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(CHUNK_DELAY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_gemini_streaming():
+    """Stream from the fake endpoint and check deltas, TTFT and sources."""
+    server, api_base = _start_fake_server()
+    try:
+        deltas = GeminiClient.stream_text("What KYC is needed?", api_key='test-key', api_base=api_base)
+        stream = GeminiStream(deltas, sources=['kyc.pdf', 'kyc.pdf', 'rates.md'])
+
+        received = []
+        for delta in stream:
+            received.append(delta)
+            print(f"  delta: {delta!r}")
+
+        print(f"TTFT: {stream.ttft_ms:.1f}ms, total: {stream.total_ms:.1f}ms")
+
+        assert received == CHUNKS
+        assert stream.text == ''.join(CHUNKS)
+        assert stream.sources == ['kyc.pdf', 'rates.md']
+        assert stream.done
+        # First token must arrive well before the whole answer is generated
+        assert stream.ttft_ms < stream.total_ms
+        assert stream.total_ms >= CHUNK_DELAY * (len(CHUNKS) - 1) * 1000
+        print("✅ PASS: Streaming deltas, TTFT and sources")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    test_gemini_streaming()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test the nearest-centroid intent router and its use in run_unified_agent.
+Uses a character n-gram embedder so the test runs offline; in the app the
+classifier embeds with the project's SentenceTransformer.
+Verifies:
+1. Labelled intents in data/intents.jsonl are learned
+2. Classification takes a few milliseconds on CPU
+3. "haan" after a fast-track approval completes the loan without the LLM
+4. "what is my EMI?" is answered from a template
+5. The shared classifier warms up in the background (None until ready) and
+   embeds with the process-wide model from embeddings.py
+"""
+
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import embeddings
+import intent_router
+from intent_router import IntentClassifier, load_labelled_intents, route_intent
+from master_agent import run_unified_agent
+
+DIM = 512
+
+
+def ngram_embed(texts):
+    """Hashed character 2/3-gram counts (deterministic, no model download)."""
+    out = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        for n in (2, 3):
+            for i in range(len(padded) - n + 1):
+                out[row, zlib.crc32(padded[i:i + n].encode('utf-8')) % DIM] += 1
+    return out
+
+
+def _classifier():
+    return IntentClassifier(load_labelled_intents(), embed_fn=ngram_embed, min_similarity=0.2, min_margin=0.01)
+
+
+def test_classifies_labelled_intents():
+    classifier = _classifier()
+    cases = {
+        "yes please": 'affirm',
+        "haan ji": 'affirm',
+        "nahi chahiye": 'deny',
+        "what is my EMI?": 'ask_emi',
+        "interest rate kya hai": 'ask_rate',
+        "मुझे लोन चाहिए": 'loan_request',
+    }
+    start = time.perf_counter()
+    results = classifier.classify_batch(list(cases))
+    per_turn_ms = (time.perf_counter() - start) * 1000 / len(cases)
+
+    for (text, expected), (intent, score) in zip(cases.items(), results):
+        print(f"  {text!r:28} -> {intent} ({score:.2f})")
+        assert intent == expected
+    print(f"✅ PASS: Intents classified ({per_turn_ms:.2f}ms per turn)")
+    assert per_turn_ms < 20
+
+
+def test_route_intent_table():
+    fast = {'eligibility_path': 'FAST_TRACK', 'requested_amount': 500000}
+    assert route_intent('affirm', 'approved', fast) == ('affirm_approved', {}, 'completed')
+    assert route_intent('ask_emi', 'approved', fast)[0] == 'emi_info'
+    assert route_intent('affirm', 'document_needed', {'eligibility_path': 'CONDITIONAL_REVIEW'}) is None
+    assert route_intent('other', 'approved', fast) is None
+    print("✅ PASS: (intent, stage) routing")
+
+
+def test_agent_uses_intents():
+    intent_router.set_intent_classifier(_classifier())
+    try:
+        state = {'phone': '9876543210', 'verified': True, 'customer_name': 'Amit Kumar',
+                 'credit_score': 780, 'pre_approved_limit': 1200000, 'requested_amount': 500000,
+                 'eligibility_path': 'FAST_TRACK'}
+        history = [{'role': 'user', 'content': 'I need 5 lakh'}]
+
+        emi = run_unified_agent("what is my EMI?", state, history)
+        print(f"Bot: {emi['message']}")
+        assert emi['served_by'] == 'intent' and '10,871' in emi['message']
+
+        done = run_unified_agent("haan", state, history)
+        print(f"Bot: {done['message']}")
+        assert done['served_by'] == 'intent'
+        assert done['conversation_stage'] == 'completed'
+        print("✅ PASS: Intent router drives replies and stage transitions")
+    finally:
+        intent_router.set_intent_classifier(None)
+
+
+class NgramModel:
+    """Stands in for a SentenceTransformer in the shared model registry."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        self.calls += 1
+        return ngram_embed(texts)
+
+
+def test_background_warmup_with_shared_model():
+    release = threading.Event()
+    model = NgramModel()
+    embeddings._MODELS['test-ngram'] = model
+    saved = intent_router.IntentClassifier
+
+    def slow_classifier(examples):
+        release.wait(5)
+        return saved(examples, model_name='test-ngram', min_similarity=0.2, min_margin=0.01)
+
+    if intent_router._LOADER is not None:
+        intent_router._LOADER.join(10)  # a warm-up started by an earlier test
+    intent_router.set_intent_classifier(None)
+    intent_router.IntentClassifier = slow_classifier
+    try:
+        start = time.perf_counter()
+        assert intent_router.get_intent_classifier() is None  # warming: the turn goes to the LLM
+        assert (time.perf_counter() - start) < 0.5
+        loader = intent_router._LOADER
+        release.set()
+        loader.join(5)
+        classifier = intent_router.get_intent_classifier()
+        assert classifier is not None and classifier.classify("haan ji")[0] == 'affirm'
+        assert model.calls == 2  # training examples + the turn, on the shared model
+    finally:
+        intent_router.IntentClassifier = saved
+        intent_router.set_intent_classifier(None)
+        del embeddings._MODELS['test-ngram']
+    print("✅ PASS: Classifier warmed in the background on the shared model")
+
+
+if __name__ == '__main__':
+    test_classifies_labelled_intents()
+    test_route_intent_table()
+    test_agent_uses_intents()
+    test_background_warmup_with_shared_model()
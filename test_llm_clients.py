@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test pooled LLM client handles against a local fake Groq endpoint.
+Verifies:
+1. The Groq client is created once and reused across turns
+2. Consecutive requests reuse one keep-alive connection
+3. Per-provider latency stats are exposed
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_clients import ClientManager
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat completions endpoint with keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        reply = {
+            'id': 'fake', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': 'Namaste! How much do you need?'}}],
+        }
+        data = json.dumps(reply).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pooled_groq_client():
+    """Three turns should share one client and one connection."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGroqHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    saved = {k: os.environ.get(k) for k in ('GROQ_API_KEY', 'GROQ_BASE_URL')}
+    os.environ['GROQ_API_KEY'] = 'test-key'
+    os.environ['GROQ_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    ClientManager.close()
+    ClientManager._stats.pop('groq', None)
+    try:
+        from groq_integration import GroqClient
+
+        for _ in range(3):
+            assert GroqClient.generate_text("Hi", max_tokens=20) == 'Namaste! How much do you need?'
+
+        stats = ClientManager.stats()['groq']
+        print(f"Groq stats: {stats}")
+
+        assert stats['clients_created'] == 1
+        assert stats['requests'] == 3
+        assert stats['errors'] == 0
+        assert stats['connections_opened'] == 1
+        assert stats['p95_latency_ms'] is not None
+        print("✅ PASS: One client, one keep-alive connection, latency stats recorded")
+    finally:
+        ClientManager.close()
+        server.shutdown()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+if __name__ == '__main__':
+    test_pooled_groq_client()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the unified provider layer with in-process fake providers.
+Verifies:
+1. Failover to the secondary provider when the primary errors
+2. A hung primary cannot push the turn past its deadline, and gives up
+   early enough for the secondary to answer within it
+3. The circuit breaker opens after repeated failures; once half-open it
+   lets exactly one trial call through
+4. Hedged requests fire the secondary once the primary is slower than p95
+5. A provider out of rate-limit quota fails over instead of stalling the turn
+"""
+
+import threading
+import time
+
+from llm_provider import CircuitBreaker, LLMProvider, ProviderRouter
+from rate_limiter import RateLimiter
+
+
+class FakeProvider(LLMProvider):
+    """Provider with scripted latency and failures."""
+
+    def __init__(self, name: str, reply: str = "ok", delay: float = 0.0, fail: bool = False):
+        self.name = name
+        super().__init__()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        self.reply = reply
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def _complete(self, prompt: str, max_tokens: int, timeout: float, json_mode: bool = False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("503 Service Unavailable")
+        return self.reply
+
+
+def test_failover_on_error():
+    primary = FakeProvider('fake_groq_err', fail=True)
+    secondary = FakeProvider('fake_gemini_err', reply="from gemini")
+    router = ProviderRouter([primary, secondary], deadline_s=2, max_retries=1, backoff_base_s=0.01)
+
+    assert router.generate("hi") == "from gemini"
+    assert primary.calls == 2  # one retry before failing over
+    print("✅ PASS: Failover after retries")
+
+
+def test_deadline_bounds_hung_provider():
+    primary = FakeProvider('fake_groq_hang', delay=2.0)
+    secondary = FakeProvider('fake_gemini_hang', reply="late", delay=2.0)
+    router = ProviderRouter([primary, secondary], deadline_s=0.3, max_retries=0)
+
+    start = time.monotonic()
+    result = router.generate("hi")
+    elapsed = time.monotonic() - start
+
+    print(f"Hung provider returned {result!r} after {elapsed:.2f}s")
+    assert result is None
+    assert elapsed < 0.6
+    print("✅ PASS: Turn bounded by deadline")
+
+
+def test_hung_primary_fails_over():
+    primary = FakeProvider('fake_groq_stuck', delay=3.0)
+    secondary = FakeProvider('fake_gemini_stuck', reply="from gemini", delay=0.05)
+    router = ProviderRouter([primary, secondary], deadline_s=1.0, max_retries=0)
+
+    start = time.monotonic()
+    result = router.generate("hi")
+    elapsed = time.monotonic() - start
+
+    assert result == "from gemini"
+    assert 0.4 < elapsed < 0.9  # primary given half the deadline
+    assert primary.breaker.failures == 1
+    print(f"✅ PASS: Hung primary abandoned, secondary answered after {elapsed:.2f}s")
+
+
+def test_circuit_breaker_opens():
+    primary = FakeProvider('fake_groq_cb', fail=True)
+    secondary = FakeProvider('fake_gemini_cb', reply="fallback")
+    router = ProviderRouter([primary, secondary], deadline_s=2, max_retries=0)
+
+    for _ in range(3):
+        assert router.generate("hi") == "fallback"
+
+    assert primary.breaker.state == 'open'
+    assert primary.calls == 2  # third turn skipped the open circuit
+    print("✅ PASS: Circuit breaker skips failing provider")
+
+
+def test_half_open_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(breaker.allow())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1 and breaker.state == 'half_open'
+
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    # Through the router: the trial call is made (not refused by its own permission) and closes the circuit
+    primary = FakeProvider('fake_groq_trial', reply="recovered")
+    secondary = FakeProvider('fake_gemini_trial', reply="fallback")
+    primary.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    primary.breaker.record_failure()
+    time.sleep(0.06)
+    router = ProviderRouter([primary, secondary], deadline_s=2, max_retries=0)
+    assert router.generate("hi") == "recovered"
+    assert primary.breaker.state == 'closed' and secondary.calls == 0
+    print("✅ PASS: Half-open breaker admits a single trial call")
+
+
+def test_hedged_request():
+    primary = FakeProvider('fake_groq_hedge', reply="slow", delay=1.0)
+    secondary = FakeProvider('fake_gemini_hedge', reply="fast", delay=0.05)
+    router = ProviderRouter([primary, secondary], deadline_s=3, hedge=True)
+    primary.p95_seconds = lambda: 0.1
+
+    start = time.monotonic()
+    result = router.generate("hi")
+    elapsed = time.monotonic() - start
+
+    print(f"Hedged result {result!r} after {elapsed:.2f}s")
+    assert result == "fast"
+    assert elapsed < 0.5
+    assert secondary.calls == 1
+    print("✅ PASS: Secondary fired after primary p95")
+
+
+def test_rate_limited_provider_fails_over():
+    primary = FakeProvider('fake_groq_quota', reply="groq")
+    secondary = FakeProvider('fake_gemini_quota', reply="gemini")
+    primary.limiter = RateLimiter(rpm=60, tpm=10 ** 6)
+    primary.limiter.requests.take(60)  # next request in a second
+    router = ProviderRouter([primary, secondary], deadline_s=0.6, max_retries=0)
+
+    start = time.monotonic()
+    assert router.generate("hi") == "gemini"
+    assert primary.calls == 0 and time.monotonic() - start < 0.6
+    print("✅ PASS: Provider without quota skipped within the deadline")
+
+
+if __name__ == '__main__':
+    test_failover_on_error()
+    test_deadline_bounds_hung_provider()
+    test_hung_primary_fails_over()
+    test_circuit_breaker_opens()
+    test_half_open_single_trial()
+    test_hedged_request()
+    test_rate_limited_provider_fails_over()
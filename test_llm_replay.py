@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test LLM record/replay under the provider layer.
+Verifies:
+1. Record mode stores request -> response pairs with latency
+2. Replay serves identical conversations with no provider call
+3. Recorded latency can be injected (and scaled) on replay
+4. Requests with no recording fail over like an unavailable provider, and
+   their turns are tagged llm_failed rather than counted as LLM turns
+5. The benchmark's strict replay raises on a miss and refuses an empty cassette
+"""
+
+import os
+import tempfile
+import time
+import zlib
+
+import llm_replay
+import master_agent
+import bench_conversation
+from bench_conversation import CONVERSATIONS, run_conversation
+from llm_provider import LLMProvider, ProviderRouter, reset_breakers
+
+
+class EchoProvider(LLMProvider):
+    """Live stand-in: deterministic reply per prompt, fixed latency, call counter."""
+
+    name = 'echo_live'
+    model = 'echo-1'
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def _complete(self, prompt, max_tokens, timeout, json_mode=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        return f"Sure, happy to help with that (ref {zlib.crc32(prompt.encode('utf-8')) % 10000})."
+
+
+class OfflineProvider(EchoProvider):
+    """Same identity as EchoProvider but fails if it is ever called."""
+
+    def _complete(self, prompt, max_tokens, timeout, json_mode=False):
+        raise AssertionError("network call during replay")
+
+
+def _play(provider, mode, cassette, latency=0.0, strict=False):
+    saved = master_agent.CHAT_ROUTER
+    master_agent.CHAT_ROUTER = ProviderRouter([provider], deadline_s=5, max_retries=0)
+    llm_replay.configure(mode, cassette, latency_scale=latency)
+    try:
+        if mode == 'replay':
+            llm_replay.cassette().rewind()
+        reset_breakers()
+        return run_conversation(CONVERSATIONS[0], strict=strict)
+    finally:
+        master_agent.CHAT_ROUTER = saved
+        llm_replay.configure('live')
+
+
+def test_record_then_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = os.path.join(tmp, 'cassette.jsonl')
+
+        live = EchoProvider(delay=0.05)
+        recorded = _play(live, 'record', cassette)
+        assert live.calls > 0
+        assert len(llm_replay.cassette()) == live.calls
+
+        replayed = _play(OfflineProvider(), 'replay', cassette, latency=0.0)
+        assert [t['message'] for t in replayed] == [t['message'] for t in recorded]
+        assert llm_replay.cassette().misses == 0
+
+        slow = _play(OfflineProvider(), 'replay', cassette, latency=1.0)
+        llm_turns = [t for t in slow if t['served_by'] == 'llm']
+        fast_llm = [t for t in replayed if t['served_by'] == 'llm']
+        print(f"LLM turns: replay x0 {[round(t['ms']) for t in fast_llm]}ms, "
+              f"x1 {[round(t['ms']) for t in llm_turns]}ms")
+        assert all(t['ms'] >= 45 for t in llm_turns)
+        assert all(t['ms'] < 45 for t in fast_llm)
+        print(f"✅ PASS: {live.calls} calls recorded and replayed offline")
+
+
+def test_missing_recording_fails_over():
+    with tempfile.TemporaryDirectory() as tmp:
+        result = _play(OfflineProvider(), 'replay', os.path.join(tmp, 'empty.jsonl'))
+        failed = [t for t in result if t['served_by'] == 'llm_failed']
+        assert failed
+        assert all("rephrase" in t['message'] for t in failed)
+        assert not [t for t in result if t['served_by'] == 'llm']
+        print("✅ PASS: Unrecorded request falls back like a provider failure")
+
+
+def test_strict_replay_fails_loudly():
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = os.path.join(tmp, 'empty.jsonl')
+        stale = os.path.join(tmp, 'stale.jsonl')
+        llm_replay.Cassette(stale).record('old-prompt', EchoProvider.name, EchoProvider.model,
+                                          'an older prompt', 'Sure.', 10.0)
+        try:
+            _play(OfflineProvider(), 'replay', stale, strict=True)
+            assert False, "strict replay served a turn with no recording"
+        except RuntimeError as e:
+            assert 're-record' in str(e)
+
+        try:
+            bench_conversation.main('replay', empty, 0.0, 1)
+            assert False, "benchmark ran against an empty cassette"
+        except SystemExit as e:
+            assert 'empty' in str(e)
+        finally:
+            llm_replay.configure('live')
+        print("✅ PASS: Strict replay raises on a miss and on an empty cassette")
+
+
+if __name__ == '__main__':
+    test_record_then_replay()
+    test_missing_recording_fails_over()
+    test_strict_replay_fails_loudly()
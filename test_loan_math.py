@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test the vectorised loan arithmetic.
+Verifies:
+1. emi, foir and total_interest equal the scalar utils formulas exactly,
+   including zero rates and zero incomes
+2. Schedules match a month-by-month scalar walk, sum to the principal and
+   total interest, and close at a zero balance
+3. Mixed tenures are zero-padded; iter_schedules chunks match one call
+4. master_agent.calculate_emi is utils.compute_emi
+"""
+
+import random
+
+import numpy as np
+
+import loan_math
+from loan_math import amortisation_schedule, emi, foir, iter_schedules, total_interest
+from master_agent import calculate_emi
+from utils import compute_emi, compute_foir
+
+TENURES = [1, 6, 12, 24, 36, 60, 84, 120, 240, 360]
+
+
+def _loans(n: int, seed: int = 5):
+    rng = random.Random(seed)
+    principal = [float(rng.randrange(10000, 5000000, 500)) for _ in range(n)]
+    rate = [rng.choice([0.0, 7.25, 10.5, 12.0, 13.5, 15.0, 24.0]) for _ in range(n)]
+    tenure = [rng.choice(TENURES) for _ in range(n)]
+    return principal, rate, tenure
+
+
+def _scalar_schedule(principal, rate, tenure):
+    r = rate / 100.0 / 12.0
+    instalment = compute_emi(principal, rate, tenure)
+    balance = principal
+    rows = []
+    for month in range(tenure):
+        interest = balance * r
+        repaid = balance if month == tenure - 1 else instalment - interest
+        balance = balance - repaid
+        rows.append((interest + repaid, interest, repaid, balance))
+    return rows
+
+
+def test_emi_foir_match_scalar_exactly():
+    principal, rate, tenure = _loans(20000)
+    vector = emi(principal, rate, tenure)
+    scalar = [compute_emi(p, r, n) for p, r, n in zip(principal, rate, tenure)]
+    assert vector.tolist() == scalar
+
+    interest = total_interest(principal, rate, tenure)
+    assert interest.tolist() == [e * n - p for e, p, n in zip(scalar, principal, tenure)]
+
+    rng = random.Random(9)
+    income = [rng.choice([0.0, 15000.0, 30000.0, 52000.0, 125000.0]) for _ in principal]
+    existing = [float(rng.randrange(0, 40000, 250)) for _ in principal]
+    vector = foir(income, existing, scalar)
+    assert vector.tolist() == [compute_foir(i, x, e) for i, x, e in zip(income, existing, scalar)]
+
+    # Broadcasting: one amount across every tenure
+    assert emi(500000, 12.0, TENURES).tolist() == [compute_emi(500000, 12.0, n) for n in TENURES]
+
+    # Too many distinct (rate, tenure) pairs: NumPy's pow, within an ulp
+    saved = loan_math.MAX_EXACT_TERMS
+    loan_math.MAX_EXACT_TERMS = 4
+    try:
+        assert np.allclose(emi(principal, rate, tenure), scalar, rtol=1e-14, atol=0)
+    finally:
+        loan_math.MAX_EXACT_TERMS = saved
+    print(f"✅ PASS: EMI, FOIR and total interest identical to the scalar formulas on {len(principal):,} loans")
+
+
+def test_schedule_matches_scalar_walk():
+    principal, rate, tenure = _loans(300, seed=8)
+    schedule = amortisation_schedule(principal, rate, tenure)
+    assert schedule['payment'].shape == (300, max(tenure))
+    assert schedule['month'][0] == 1 and schedule['month'][-1] == max(tenure)
+
+    for i, (p, r, n) in enumerate(zip(principal, rate, tenure)):
+        rows = _scalar_schedule(p, r, n)
+        for key, column in zip(('payment', 'interest', 'principal', 'balance'), zip(*rows)):
+            assert schedule[key][i, :n].tolist() == list(column), (i, key)
+            assert not schedule[key][i, n:].any()
+
+    assert not schedule['balance'][np.arange(300), np.array(tenure) - 1].any()
+    assert np.allclose(schedule['principal'].sum(axis=1), principal, rtol=1e-12)
+    assert np.allclose(schedule['interest'].sum(axis=1), total_interest(principal, rate, tenure),
+                       rtol=1e-9, atol=1e-4)
+    print("✅ PASS: Schedules match the scalar walk, repay the principal and close at zero")
+
+
+def test_iter_schedules_chunks():
+    principal, rate, tenure = _loans(250, seed=3)
+    whole = amortisation_schedule(principal, rate, tenure)
+    starts = []
+    for chunk in iter_schedules(principal, rate, tenure, chunk_size=64):
+        start = chunk['start']
+        starts.append(start)
+        rows, months = chunk['payment'].shape
+        assert np.array_equal(chunk['payment'], whole['payment'][start:start + rows, :months])
+        assert np.array_equal(chunk['balance'], whole['balance'][start:start + rows, :months])
+    assert starts == [0, 64, 128, 192]
+    print("✅ PASS: Chunked schedules equal a single call")
+
+
+def test_calculate_emi_is_shared():
+    for n in TENURES:
+        assert calculate_emi(750000, 10.5, n) == compute_emi(750000, 10.5, n)
+    assert calculate_emi(120000, 0, 12) == 10000
+    print("✅ PASS: master_agent.calculate_emi delegates to utils.compute_emi")
+
+
+if __name__ == '__main__':
+    test_emi_foir_match_scalar_exactly()
+    test_schedule_matches_scalar_walk()
+    test_iter_schedules_chunks()
+    test_calculate_emi_is_shared()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test precomputed offer bundles.
+Verifies:
+1. The precompute job builds a bundle (eligibility, EMI per tenure, pitch) per CRM record
+2. Lookups are a single keyed read
+3. A changed CRM record invalidates its bundle; re-running rebuilds only that one
+4. Readers never miss while a re-run publishes a new generation
+5. run_unified_agent renders the verification reply (eligibility, EMI table,
+   pitch) from the bundle, identical to the live reply
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import offer_cache
+from master_agent import run_unified_agent
+from offer_cache import OfferCache, precompute
+from offer_optimiser import OFFER_TENURES
+from template_router import TemplateRouter
+from utils import compute_emi
+
+
+def _crm():
+    with open('data/mock_db.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_precompute_and_lookup():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'offers')
+        stats = precompute(crm, path)
+        assert stats == {'records': len(crm), 'built': len(crm), 'reused': 0}
+
+        bundle = OfferCache.lookup('9876543210', crm['9876543210'], path=path)
+        assert bundle['profile']['pre_approved_limit'] == 1200000
+        assert bundle['eligibility'] == {'fast_track_up_to': 1200000, 'conditional_up_to': 2400000}
+        assert [row['tenure_months'] for row in bundle['emi_table']] == list(OFFER_TENURES)
+        assert bundle['emi_table'][-1]['emi'] == round(compute_emi(1200000, bundle['rate'], 60))
+        assert set(bundle['pitch']) == {'english', 'hindi', 'hinglish'}
+        assert 'Amit Kumar' in TemplateRouter.verified_reply(bundle, 'hindi')
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            OfferCache.lookup('9876543210', crm['9876543210'], path=path)
+        per_lookup_us = (time.perf_counter() - start) * 1000
+        print(f"✅ PASS: {len(crm)} bundles built, lookup {per_lookup_us:.1f}µs")
+        OfferCache.reset()
+
+
+def test_changed_record_invalidates():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'offers')
+        precompute(crm, path)
+
+        crm['9876543210'] = dict(crm['9876543210'], approved_amount=1500000)
+        assert OfferCache.lookup('9876543210', crm['9876543210'], path=path) is None
+        assert OfferCache.stats()['stale'] == 1
+
+        stats = precompute(crm, path)
+        assert stats['built'] == 1 and stats['reused'] == len(crm) - 1
+        bundle = OfferCache.lookup('9876543210', crm['9876543210'], path=path)
+        assert bundle['profile']['pre_approved_limit'] == 1500000
+        print("✅ PASS: Changed record rebuilt, others reused")
+        OfferCache.reset()
+
+
+def test_swap_is_atomic_for_readers():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'offers')
+        precompute(crm, path)
+        stop = threading.Event()
+        results = []
+
+        def read():
+            while not stop.is_set():
+                results.append(OfferCache.lookup('9876543210', crm['9876543210'], path=path) is not None)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for limit in (1300000, 1400000, 1500000):
+                crm['9998887776'] = dict(crm['9998887776'], approved_amount=limit)
+                precompute(crm, path)
+        finally:
+            stop.set()
+            reader.join()
+        assert results and all(results)
+        generations = [e for e in os.listdir(path) if e.startswith('gen-')]
+        assert len(generations) == 2 and open(os.path.join(path, 'CURRENT')).read() in generations
+        bundle = OfferCache.lookup('9998887776', crm['9998887776'], path=path)
+        assert bundle['profile']['pre_approved_limit'] == 1500000
+        print(f"✅ PASS: {len(results)} lookups during 3 re-runs, none missed")
+        OfferCache.reset()
+
+
+def test_agent_uses_bundle():
+    crm = _crm()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'offers')
+        precompute(crm, path)
+        saved = offer_cache.OFFER_CACHE_PATH, TemplateRouter.verified_offer
+        history = [{'role': 'user', 'content': 'I need a loan'},
+                   {'role': 'assistant', 'content': 'Please share your phone number.'}]
+        offer_cache.OFFER_CACHE_PATH = path
+        TemplateRouter.verified_offer = None  # must not be recomputed when the bundle is fresh
+        try:
+            result = run_unified_agent("My number is 9876543210", {}, list(history))
+        finally:
+            offer_cache.OFFER_CACHE_PATH, TemplateRouter.verified_offer = saved
+            OfferCache.reset()
+
+        bundle = result['offer']
+        assert result['verified'] and bundle['phone'] == '9876543210'
+        message = result['message']
+        assert '1,200,000' in message and '2,400,000' in message and bundle['pitch']['english'].strip() in message
+        assert all(f"₹{row['emi']:,}" in message for row in bundle['emi_table'])
+
+        live = run_unified_agent("My number is 9876543210", {}, list(history))
+        assert 'offer' not in live and live['message'] == message
+        print("✅ PASS: Verification reply rendered from the offer bundle, same as the live reply")
+
+
+if __name__ == '__main__':
+    test_precompute_and_lookup()
+    test_changed_record_invalidates()
+    test_swap_is_atomic_for_readers()
+    test_agent_uses_bundle()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test the vectorised counter-offer optimiser.
+Verifies:
+1. Every offer is approved by orchestration.decide_applicant and clears
+   FOIR by utils.eligibility_band
+2. No point of the search grid (checked one by one with the scalar policy)
+   beats a returned offer on amount, EMI, interest and paperwork
+3. Blacklisted, hard-rejected and unpriced profiles get no offers
+4. The chat's salary slip reply lists the offers at the rate approvals quote;
+   latency stays sub-millisecond
+5. A picked offer is approved on the terms shown, but only right after the
+   list; within the limit, an approval whose EMI breaks FOIR also lists offers
+"""
+
+import random
+import time
+
+import numpy as np
+
+from offer_optimiser import OFFER_TENURES, _candidate_amounts, counter_offers
+from orchestration import decide_applicant
+from policy_engine import decide, get_policy
+from master_agent import run_unified_agent
+from template_router import TEMPLATE_RATE, TemplateRouter, _crm_profile
+from utils import compute_emi, compute_foir, eligibility_band
+
+
+def _profiles(n: int, seed: int = 4):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield {
+            'credit_score': rng.choice([690, 700, 720, 750, 780, 810]),
+            'income': rng.choice([30000, 45000, 50000, 65000, 90000, 150000]),
+            'approved_amount': rng.choice([200000, 500000, 800000, 1200000]),
+            'blacklisted': False,
+        }, rng.choice([1.2, 1.8, 2.5, 4.0])
+
+
+def _scalar_grid(profile, requested):
+    """Every approvable, affordable grid point, evaluated one at a time."""
+    policy = get_policy()
+    rate = decide('underwriting', credit_score=profile['credit_score'], income=profile['income'])['rate']
+    caps = np.array([[(policy.thresholds['foir_eligible_pct'] / 100.0 * profile['income'])
+                      / compute_emi(1.0, rate, n) for n in OFFER_TENURES]])
+    points = []
+    for amount in _candidate_amounts(requested, profile['approved_amount'], caps,
+                                     policy.thresholds['conditional_limit_multiple']).tolist():
+        for n in OFFER_TENURES:
+            emi = compute_emi(amount, rate, n)
+            route = decide('routing', amount=amount, limit=profile['approved_amount'],
+                           credit_score=profile['credit_score'], found=True, blacklisted=False,
+                           uw_reject=False, underwriting_reason='')
+            if route['decision'] not in ('Approved', 'Conditional Approval'):
+                continue
+            if eligibility_band(compute_foir(profile['income'], 0, emi), profile['credit_score']) != 'Likely Eligible':
+                continue
+            points.append((amount, emi, emi * n - amount, route['documents'] != 'Not Requested'))
+    return points
+
+
+def test_offers_are_approved_and_affordable():
+    checked = 0
+    for profile, multiple in _profiles(40):
+        requested = profile['approved_amount'] * multiple
+        db = {'9000000001': dict(profile, name='Test')}
+        for offer in counter_offers(profile, requested):
+            assert offer['amount'] <= requested
+            outcome = decide_applicant('9000000001', offer['amount'], None, None, db)
+            assert outcome['decision'] == offer['decision'], (profile, offer, outcome)
+            assert outcome['policy_rule'] == offer['policy_rule']
+            emi = compute_emi(offer['amount'], offer['rate'], offer['tenure_months'])
+            assert round(emi) == offer['emi']
+            band = eligibility_band(compute_foir(profile['income'], 0, emi), profile['credit_score'])
+            assert band == 'Likely Eligible'
+            checked += 1
+    assert checked > 40
+    print(f"✅ PASS: {checked} offers approved by decide_applicant and within FOIR")
+
+
+def test_offers_not_dominated_by_grid():
+    for profile, multiple in _profiles(25, seed=9):
+        requested = profile['approved_amount'] * multiple
+        offers = counter_offers(profile, requested, max_offers=100)
+        points = _scalar_grid(profile, requested)
+        assert bool(offers) == bool(points)
+        for offer in offers:
+            emi = compute_emi(offer['amount'], offer['rate'], offer['tenure_months'])
+            mine = (-offer['amount'], emi, emi * offer['tenure_months'] - offer['amount'],
+                    offer['documents'] != 'Not Requested')
+            for amount, point_emi, interest, docs in points:
+                other = (-amount, point_emi, interest, docs)
+                dominates = all(o <= m for o, m in zip(other, mine)) and any(o < m for o, m in zip(other, mine))
+                assert not dominates, (profile, offer, other)
+        # The largest instant offer is the largest instant grid point
+        instant = [p[0] for p in points if not p[3]]
+        if instant:
+            assert offers[0]['amount'] == max(instant)
+    print("✅ PASS: No grid point dominates a returned offer")
+
+
+def test_no_offers_when_policy_rejects():
+    base = {'credit_score': 760, 'income': 80000, 'approved_amount': 500000, 'blacklisted': False}
+    assert counter_offers(base, 900000)
+    assert counter_offers(dict(base, blacklisted=True), 900000) == []
+    assert counter_offers(dict(base, credit_score=680), 900000) == []  # pipeline hard-rejects < 700
+    assert counter_offers(dict(base, income=20000), 900000) == []  # underwriting rejects: no rate
+    assert counter_offers(base, 0) == []
+    # A rate card instead of the underwriting rate
+    offers = counter_offers(base, 900000, rates=(9.0, 12.0))
+    assert {o['rate'] for o in offers} == {9.0}
+    print("✅ PASS: Rejected and unpriced profiles get no offers; rate cards respected")
+
+
+def test_chat_reply_and_latency():
+    state = {'verified': True, 'credit_score': 780, 'income': 65000, 'pre_approved_limit': 1200000}
+    reply = TemplateRouter.route('', 'amount_asked', {'requested_amount': 2000000}, state, 'english')
+    assert 'Salary Slip' in reply
+    best = counter_offers({'credit_score': 780, 'income': 65000, 'approved_amount': 1200000}, 2000000,
+                          rates=(TEMPLATE_RATE,))[0]
+    assert f"1. ₹{best['amount']:,} for {best['tenure_months']} months at 11%" in reply
+    # Chat offers use the chat's flat rate, so the approval for a picked offer quotes the same EMI
+    approval = TemplateRouter.eligibility_reply(best['amount'], 1200000, 'english',
+                                                tenure_months=best['tenure_months'], show_offers=False)
+    assert f"₹{best['emi']:,}" in approval
+
+    # Within the limit: the unchanged fast-track reply
+    within = TemplateRouter.route('', 'amount_asked', {'requested_amount': 500000}, state, 'english')
+    assert within == TemplateRouter.eligibility_reply(500000, 1200000, 'english')
+
+    profile = {'credit_score': 780, 'income': 65000, 'approved_amount': 1200000}
+    counter_offers(profile, 2000000)
+    timings = []
+    for _ in range(200):
+        start = time.perf_counter()
+        counter_offers(profile, 2000000)
+        timings.append(time.perf_counter() - start)
+    p50_us = sorted(timings)[len(timings) // 2] * 1e6
+    assert p50_us < 2000
+    print(f"✅ PASS: Offers in the chat reply; optimiser p50 {p50_us:.0f}µs")
+
+
+def test_picked_offer_is_approved():
+    state, messages = {}, []
+    for user_input in ("Hi", "9876543210", "I need 20 lakh", "option 2"):
+        messages.append({'role': 'user', 'content': user_input})
+        result = run_unified_agent(user_input, state, messages)
+        messages.append({'role': 'assistant', 'content': result['message']})
+        state.update({k: v for k, v in result.items() if k != 'message'})
+        if user_input == "I need 20 lakh":
+            listed = result['message']
+
+    offer = TemplateRouter.chat_offers(2000000, 1200000, {'credit_score': 780, 'income': 65000,
+                                                           'approved_amount': 1200000})[1]
+    assert f"2. ₹{offer['amount']:,} for {offer['tenure_months']} months" in listed
+    assert state['requested_amount'] == offer['amount'] and state['tenure_months'] == offer['tenure_months']
+    assert state['eligibility_path'] == 'FAST_TRACK' and state['conversation_stage'] == 'approved'
+    assert 'APPROVED' in result['message'] and f"₹{offer['emi']:,}" in result['message']
+    assert not result['offers_shown']
+
+    # A digit in an unrelated message, or a pick after the list has gone, changes nothing
+    asked = {k: v for k, v in state.items() if k not in ('accepted_offer', 'tenure_months')}
+    asked.update(requested_amount=2000000, offers_shown=True)
+    history = messages[:6]
+    assert run_unified_agent("give me 2 minutes", dict(asked), history).get('accepted_offer') is None
+    stale = run_unified_agent("2", dict(asked, offers_shown=False), history)
+    assert stale.get('accepted_offer') is None
+    print(f"✅ PASS: Offer 2 (₹{offer['amount']:,}, {offer['tenure_months']} months) accepted and approved")
+
+
+def test_foir_breach_within_limit():
+    state = {'verified': True, 'credit_score': 780, 'income': 30000, 'pre_approved_limit': 1200000}
+    reply = TemplateRouter.route('', 'amount_asked', {'requested_amount': 1000000}, state, 'english')
+    assert 'APPROVED' in reply and '72.5% of your monthly income' in reply
+    offers = TemplateRouter.chat_offers(1000000, 1200000, _crm_profile(state))
+    assert offers and f"1. ₹{offers[0]['amount']:,}" in reply
+    assert all(o['foir'] <= 40 for o in offers)
+    print("✅ PASS: Approval with a FOIR-breaking EMI also lists counter-offers")
+
+
+if __name__ == '__main__':
+    test_offers_are_approved_and_affordable()
+    test_offers_not_dominated_by_grid()
+    test_no_offers_when_policy_rejects()
+    test_chat_reply_and_latency()
+    test_picked_offer_is_approved()
+    test_foir_breach_within_limit()
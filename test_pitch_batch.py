@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test the bulk pitch batch job offline with the stub model.
+Verifies:
+1. Every CRM record gets a personalised pitch
+2. Applicants in the same profile bucket share one generation
+3. Model concurrency stays within the bound
+4. A re-run resumes from the JSONL checkpoint without regenerating
+5. Unusable generations (no {name}, Gemini unavailable) are errors, not rows
+"""
+
+import asyncio
+import json
+import os
+import random
+import tempfile
+
+import pitch_batch
+from pitch_batch import GeminiPitchModel, StubPitchModel, profile_bucket, run_batch
+
+
+class CountingStub(StubPitchModel):
+    """Stub model that tracks the peak number of concurrent generations."""
+
+    def __init__(self):
+        super().__init__(delay=0.02)
+        self.active = 0
+        self.peak = 0
+
+    async def generate(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().generate(prompt)
+        finally:
+            self.active -= 1
+
+
+def _write_crm(path, count=300):
+    rng = random.Random(7)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                'phone': str(9000000000 + i),
+                'name': f'Applicant {i}',
+                'credit_score': rng.choice([690, 720, 760, 810]),
+                'income': rng.choice([40000, 55000, 80000]),
+                'approved_amount': rng.choice([500000, 800000, 1200000]),
+            }) + '\n')
+
+
+def _read_rows(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_profile_bucket():
+    record = {'credit_score': 782, 'income': 65000, 'approved_amount': 1200000}
+    assert profile_bucket(record) == (750, 50000, 1000000)
+    print("✅ PASS: Profile buckets")
+
+
+def test_batch_dedupes_and_bounds_concurrency():
+    with tempfile.TemporaryDirectory() as tmp:
+        crm, out = os.path.join(tmp, 'crm.jsonl'), os.path.join(tmp, 'pitches.jsonl')
+        _write_crm(crm)
+        model = CountingStub()
+
+        stats = run_batch(crm, out, concurrency=4, model=model)
+        rows = _read_rows(out)
+        buckets = {tuple(row['bucket']) for row in rows}
+
+        print(f"Batch stats: {stats}, peak concurrency {model.peak}")
+        assert stats['written'] == 300 and len(rows) == 300
+        assert len({row['phone'] for row in rows}) == 300
+        assert stats['generated'] == model.calls == len(buckets)
+        assert stats['cache_hits'] == 300 - len(buckets)
+        assert model.peak <= 4
+        assert all(row['name'] in row['pitch'] and '{name}' not in row['pitch'] for row in rows)
+        print(f"✅ PASS: 300 pitches from {model.calls} generations")
+
+
+def test_resume_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        crm, out = os.path.join(tmp, 'crm.jsonl'), os.path.join(tmp, 'pitches.jsonl')
+        _write_crm(crm)
+        run_batch(crm, out, concurrency=8, model=StubPitchModel(delay=0))
+        all_buckets = {tuple(row['bucket']) for row in _read_rows(out)}
+
+        # Simulate an interrupted run: keep 120 rows and a torn last line
+        with open(out, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[:120]
+        with open(out, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+            f.write('{"phone": "90000')
+
+        seen_buckets = {tuple(json.loads(line)['bucket']) for line in lines}
+
+        model = StubPitchModel(delay=0)
+        stats = run_batch(crm, out, concurrency=8, model=model)
+        rows = _read_rows_tolerant(out)
+        assert stats['skipped'] == 120 and stats['written'] == 180
+        assert model.calls == len(all_buckets - seen_buckets)  # checkpointed buckets are reused
+        assert len(rows) == 300 and len({row['phone'] for row in rows}) == 300
+        print("✅ PASS: Resumed from checkpoint without regenerating")
+
+
+class NamelessStub(StubPitchModel):
+    """Forgets the {name} placeholder."""
+
+    async def generate(self, prompt):
+        return (await super().generate(prompt)).replace('{name}', 'Dear customer')
+
+
+class UnavailableGemini:
+    @staticmethod
+    def is_available():
+        return False
+
+
+def test_unusable_pitches_not_checkpointed():
+    with tempfile.TemporaryDirectory() as tmp:
+        crm, out = os.path.join(tmp, 'crm.jsonl'), os.path.join(tmp, 'pitches.jsonl')
+        _write_crm(crm, count=40)
+        stats = run_batch(crm, out, concurrency=4, model=NamelessStub(delay=0))
+        assert stats['written'] == 0 and stats['errors'] == 40
+        assert _read_rows(out) == []
+
+        saved = pitch_batch.GeminiClient
+        pitch_batch.GeminiClient = UnavailableGemini
+        try:
+            stats = run_batch(crm, out, concurrency=4, model=GeminiPitchModel())
+        finally:
+            pitch_batch.GeminiClient = saved
+        assert stats['written'] == 0 and stats['errors'] == 40
+        assert _read_rows(out) == []
+    print("✅ PASS: Placeholder-less and fallback pitches counted as errors")
+
+
+def _read_rows_tolerant(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    return rows
+
+
+if __name__ == '__main__':
+    test_profile_bucket()
+    test_batch_dedupes_and_bounds_concurrency()
+    test_resume_from_checkpoint()
+    test_unusable_pitches_not_checkpointed()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test the declarative policy engine.
+Verifies:
+1. data/policy.json reproduces the rule sets it replaced (underwriting,
+   eligibility, chat path, FOIR band) over full input grids
+2. Batch evaluation matches scalar evaluation rule for rule
+3. explain() traces every rule checked and the one that fired
+4. Hot reload picks up an edited policy; a broken edit or a missing file
+   keeps the last good one
+5. Malformed policies are rejected at compile time
+6. Reason texts are formatted from the thresholds, so they follow an edit
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import policy_engine
+from agents import underwriting_agent
+from eligibility import check_eligibility
+from master_agent import _eligibility_path
+from policy_engine import Policy, PolicyError, explain, get_policy
+from utils import eligibility_band
+
+SCORES = [None, 0, 600, 649, 650, 699, 700, 749, 750, 800]
+INCOMES = [None, 0, 29999, 30000, 49999, 50000, 90000]
+AMOUNTS = [0, 100000, 500000, 500001, 1000000, 1000001, 2000000]
+LIMITS = [0, 500000, 1000000]
+
+
+def _legacy_underwriting(credit_score, income):
+    if credit_score is None or income is None:
+        return "Needs docs", "Missing credit score or income"
+    if credit_score < 650:
+        return "Reject", "Credit score < 650"
+    if credit_score < 700:
+        return "Conditional @ 15%", "Score from 650 to below 700 triggers conditional review"
+    if income < 30000:
+        return "Reject", "Income below Rs. 30,000"
+    if credit_score >= 750 and income >= 50000:
+        return "Approved @ 10.5%", "Score >= 750 and income >= Rs. 50,000"
+    return "Approved @ 13.5%", "Standard rate for mid-tier profile"
+
+
+def _legacy_eligibility(amount, limit, score):
+    if score < 650:
+        return "HARD_REJECTION"
+    if amount <= limit and score >= 700:
+        return "FAST_TRACK"
+    if amount <= (2 * limit) or score >= 750:
+        return "CONDITIONAL_REVIEW"
+    return "HARD_REJECTION"
+
+
+def _legacy_band(foir, credit_score):
+    if credit_score is not None and credit_score < 650:
+        return 'High Risk (credit score under threshold)'
+    if foir <= 40:
+        return 'Likely Eligible'
+    if foir <= 50:
+        return 'Borderline'
+    return 'Likely Ineligible'
+
+
+def test_policy_matches_legacy_rules():
+    cases = 0
+    for score, income in itertools.product(SCORES, INCOMES):
+        assert underwriting_agent(score, income) == _legacy_underwriting(score, income), (score, income)
+        cases += 1
+    for amount, limit, score in itertools.product(AMOUNTS, LIMITS, SCORES[1:]):
+        user = {'pre_approved_limit': limit, 'credit_score': score}
+        assert check_eligibility(amount, user) == _legacy_eligibility(amount, limit, score)
+        assert _eligibility_path(amount, limit) == ('FAST_TRACK' if amount <= limit else 'CONDITIONAL_REVIEW')
+        cases += 2
+    for foir, score in itertools.product([0, 39.9, 40, 45, 50, 50.1, 999.0], SCORES):
+        assert eligibility_band(foir, score) == _legacy_band(foir, score)
+        cases += 1
+    print(f"✅ PASS: {cases} cases identical to the hard-coded rules")
+
+
+def test_batch_matches_scalar():
+    policy = get_policy()
+    table = policy.table('underwriting')
+    grid = list(itertools.product(SCORES, INCOMES))
+    columns = {
+        'credit_score': np.array([np.nan if s is None else s for s, _ in grid], dtype=np.float64),
+        'income': np.array([np.nan if i is None else i for _, i in grid], dtype=np.float64),
+    }
+    batch = table.match_batch(columns)
+    scalar = [table.rule_ids.index(table.evaluate({'credit_score': s, 'income': i})['rule']) for s, i in grid]
+    assert list(batch) == scalar
+
+    table = policy.table('eligibility')
+    grid = list(itertools.product(AMOUNTS, LIMITS, SCORES[1:]))
+    columns = {name: np.array([row[k] for row in grid], dtype=np.float64)
+               for k, name in enumerate(('amount', 'limit', 'score'))}
+    batch = table.match_batch(columns)
+    scalar = [table.rule_ids.index(table.evaluate(dict(zip(('amount', 'limit', 'score'), row)))['rule'])
+              for row in grid]
+    assert list(batch) == scalar
+    print(f"✅ PASS: Batch rule selection matches scalar on {len(grid)} eligibility rows")
+
+
+def test_explain_trace():
+    result = explain('eligibility', amount=900000, limit=500000, score=680)
+    assert result['path'] == 'CONDITIONAL_REVIEW' and result['rule'] == 'within_limit_multiple'
+    assert [step['rule'] for step in result['trace']] == [
+        'score_below_min', 'within_limit_good_score', 'within_limit_multiple']
+    assert [step['matched'] for step in result['trace']] == [False, False, True]
+    first = result['trace'][1]['conditions']
+    assert first[0] == {'condition': 'amount <= limit', 'value': 900000, 'holds': False}
+    assert first[1]['condition'] == 'score >= good_score (700)'
+    print("✅ PASS: Trace lists each rule checked and the one that fired")
+
+
+def _write(path, spec):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(spec if isinstance(spec, str) else json.dumps(spec))
+    stamp = time.time() + _write.bump
+    _write.bump += 1
+    os.utime(path, (stamp, stamp))
+
+
+_write.bump = 1
+
+
+def test_hot_reload():
+    with open('data/policy.json', 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    saved = policy_engine.POLICY_RELOAD_CHECK_S
+    policy_engine.POLICY_RELOAD_CHECK_S = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'policy.json')
+            _write(path, spec)
+            policy = get_policy(path)
+            assert policy.evaluate('eligibility', amount=100000, limit=500000, score=640)['path'] == 'HARD_REJECTION'
+
+            spec['thresholds']['min_score'] = 600
+            _write(path, spec)
+            reloaded = get_policy(path)
+            assert reloaded is not policy and reloaded.fingerprint != policy.fingerprint
+            assert reloaded.evaluate('eligibility', amount=100000, limit=500000, score=640)['path'] == 'CONDITIONAL_REVIEW'
+
+            _write(path, '{"tables": ')  # mid-edit
+            assert get_policy(path) is reloaded
+
+            os.remove(path)  # replaced by a rename, or deleted
+            assert get_policy(path) is reloaded
+            _write(path, spec)
+            assert get_policy(path) is not reloaded
+    finally:
+        policy_engine.POLICY_RELOAD_CHECK_S = saved
+    print("✅ PASS: Edited policy reloaded; broken edit or missing file kept the last good policy")
+
+
+def test_malformed_policy_rejected():
+    bad = [
+        {'tables': {'t': {'inputs': ['x'], 'rules': [], }}},
+        {'tables': {'t': {'inputs': ['x'], 'rules': [{'id': 'r', 'when': [['y', '<', 1]], 'then': {}}],
+                          'default': {'id': 'd', 'then': {}}}}},
+        {'tables': {'t': {'inputs': ['x'], 'rules': [{'id': 'r', 'when': [['x', '<', 'nope']], 'then': {}}],
+                          'default': {'id': 'd', 'then': {}}}}},
+        {'tables': {'t': {'inputs': ['x'], 'rules': [{'id': 'r', 'when': [['x', '~', 1]], 'then': {}}],
+                          'default': {'id': 'd', 'then': {}}}}},
+        {'tables': {'t': {'inputs': ['x'], 'rules': [],
+                          'default': {'id': 'd', 'then': {'out': '$missing'}}}}},
+        {'tables': {'t': {'inputs': ['x'], 'rules': [],
+                          'default': {'id': 'd', 'then': {'reason': 'below {no_such_threshold}'}}}}},
+    ]
+    for spec in bad:
+        try:
+            Policy(spec)
+        except PolicyError:
+            continue
+        raise AssertionError(f"accepted malformed policy {spec}")
+    print(f"✅ PASS: {len(bad)} malformed policies rejected")
+
+
+def test_reasons_follow_thresholds():
+    with open('data/policy.json', 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    spec['thresholds'].update(min_score=600, good_score=680, min_income=25000, conditional_limit_multiple=3)
+    policy = Policy(spec)
+    assert policy.evaluate('underwriting', credit_score=590, income=50000)['reason'] == "Credit score < 600"
+    assert policy.evaluate('underwriting', credit_score=690, income=20000)['reason'] == "Income below Rs. 25,000"
+    routed = policy.evaluate('routing', amount=400000, limit=100000, credit_score=750, found=True,
+                             blacklisted=False, uw_reject=False, underwriting_reason='')
+    assert routed['reason'] == "Hard rejection: amount > 3x pre-approved or credit score < 680"
+    print("✅ PASS: Reason texts follow the thresholds")
+
+
+if __name__ == '__main__':
+    test_policy_matches_legacy_rules()
+    test_batch_matches_scalar()
+    test_explain_trace()
+    test_hot_reload()
+    test_malformed_policy_rejected()
+    test_reasons_follow_thresholds()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test prefix-cache-friendly prompt assembly in master_agent.
+Verifies:
+1. Every prompt in a language starts with the same byte-identical static prefix
+2. The stage name never appears in the static prefix
+3. Dynamic history/state/message come after the stage block
+4. Static parts are memoised per (language, stage)
+"""
+
+from master_agent import _build_full_prompt, _get_prompt_prefix, _get_static_system_prompt
+from utils import estimate_tokens
+
+
+def test_static_prefix_is_stable():
+    history = [{'role': 'user', 'content': 'I need a loan'}]
+    prefix = _get_static_system_prompt('english')
+
+    prompts = [
+        _build_full_prompt("hi", {}, history, 'phone_asked', 'english'),
+        _build_full_prompt("what rate?", {'phone': '9876543210', 'verified': True}, history * 3,
+                           'amount_asked', 'english'),
+        _build_full_prompt("ok", {'requested_amount': 500000}, history, 'approved', 'english'),
+    ]
+    for prompt in prompts:
+        assert prompt.startswith(prefix)
+
+    assert "CONVERSATION STAGE:" not in prefix
+    for stage in ('phone_asked', 'amount_asked', 'approved', 'document_needed'):
+        assert f"'{stage}'" not in prefix
+
+    assert _get_static_system_prompt('hindi') != prefix
+    print(f"✅ PASS: Static prefix shared ({estimate_tokens(prefix)} tokens)")
+
+
+def test_dynamic_parts_come_last():
+    prompt = _build_full_prompt("My number is 9998887776", {}, [], 'phone_asked', 'hinglish')
+    stage_at = prompt.index("CONVERSATION STAGE: PHONE_ASKED")
+    history_at = prompt.index("CONVERSATION HISTORY:")
+    message_at = prompt.index("9998887776")
+    assert stage_at < history_at < message_at
+    print("✅ PASS: Stage block before history/state/message")
+
+
+def test_prefix_memoised():
+    _get_prompt_prefix.cache_clear()
+    for _ in range(5):
+        _get_prompt_prefix('english', 'amount_asked')
+    info = _get_prompt_prefix.cache_info()
+    assert info.misses == 1 and info.hits == 4
+    print("✅ PASS: Prefix memoised per (language, stage)")
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("I need 5 lakhs") >= 4
+    assert estimate_tokens("मुझे पाँच लाख चाहिए") >= 4
+    print("✅ PASS: Token estimates")
+
+
+if __name__ == '__main__':
+    test_static_prefix_is_stable()
+    test_dynamic_parts_come_last()
+    test_prefix_memoised()
+    test_estimate_tokens()
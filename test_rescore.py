@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the portfolio re-scoring CLI.
+Verifies:
+1. Decisions across a process pool come back in input order and match decide_applicant
+2. --resume continues after an interrupted run (torn last line included)
+3. --start-offset skips input rows; JSONL and CSV inputs give the same decisions
+4. Bad rows (missing phone, empty or non-numeric amounts, broken JSON) get
+   an 'error' decision and are counted; the rest of the file is still scored
+"""
+
+import csv
+import json
+import os
+import random
+import tempfile
+
+from agents import load_db
+from orchestration import decide_applicant
+from rescore import rescore
+
+PHONES = ['9876543210', '9998887776', '8887776665', '7776665554', '6665554443', '1234567890']
+
+
+def _applications(n=300, seed=46):
+    rng = random.Random(seed)
+    return [{
+        'application_id': f'APP{i:05d}',
+        'phone': rng.choice(PHONES),
+        'requested_amount': rng.choice([200000, 900000, 1500000, 3000000]),
+        'monthly_income': rng.choice(['', 25000, 60000]),
+        'credit_score': rng.choice(['', 680, 760]),
+    } for i in range(n)]
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ordered_and_matching():
+    rows = _applications()
+    with tempfile.TemporaryDirectory() as tmp:
+        source, out = os.path.join(tmp, 'apps.csv'), os.path.join(tmp, 'decisions.jsonl')
+        _write_csv(source, rows)
+        stats = rescore(source, out, workers=2, chunk_size=37)
+        assert stats['rows'] == len(rows) and stats['next_offset'] == len(rows)
+        assert stats['errors'] == 0
+
+        results = _read(out)
+        assert [r['offset'] for r in results] == list(range(len(rows)))
+        db = load_db()
+        for row, result in zip(rows, results):
+            expected = decide_applicant(row['phone'], float(row['requested_amount']),
+                                        float(row['monthly_income']) if row['monthly_income'] != '' else None,
+                                        row['credit_score'] if row['credit_score'] != '' else None, db)
+            assert result['application_id'] == row['application_id']
+            assert (result['decision'], result['reason']) == (expected['decision'], expected['reason'])
+        print(f"✅ PASS: {stats['rows']} rows in order across 2 workers ({stats['rows_per_s']:,} rows/s)")
+
+
+def test_resume_after_interruption():
+    rows = _applications()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'apps.csv')
+        full, partial = os.path.join(tmp, 'full.jsonl'), os.path.join(tmp, 'partial.jsonl')
+        _write_csv(source, rows)
+        rescore(source, full, workers=2, chunk_size=50)
+
+        with open(full, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:120])
+            f.write(lines[120][:25])  # killed mid-write
+
+        stats = rescore(source, partial, workers=2, chunk_size=50, resume=True)
+        assert stats['start_offset'] == 120 and stats['rows'] == 180
+        assert _read(partial) == _read(full)
+        print("✅ PASS: Resumed at offset 120 after a torn write, output identical")
+
+
+def test_start_offset_and_jsonl():
+    rows = _applications()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_source, jsonl_source = os.path.join(tmp, 'apps.csv'), os.path.join(tmp, 'apps.jsonl')
+        _write_csv(csv_source, rows)
+        with open(jsonl_source, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+
+        from_csv, from_jsonl = os.path.join(tmp, 'a.jsonl'), os.path.join(tmp, 'b.jsonl')
+        rescore(csv_source, from_csv, workers=1, start_offset=250)
+        rescore(jsonl_source, from_jsonl, workers=1, start_offset=250)
+        assert [r['offset'] for r in _read(from_csv)] == list(range(250, 300))
+        assert _read(from_csv) == _read(from_jsonl)
+        print("✅ PASS: --start-offset skips rows; CSV and JSONL agree")
+
+
+def test_bad_rows_reported():
+    rows = _applications(20)
+    rows[3]['phone'] = ''
+    rows[7]['requested_amount'] = ''
+    rows[11]['requested_amount'] = 'ten lakh'
+    rows[15]['credit_score'] = 'nan'
+    bad = {3: 'phone', 7: 'requested_amount', 11: 'requested_amount', 15: 'credit_score'}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_source, out = os.path.join(tmp, 'apps.csv'), os.path.join(tmp, 'out.jsonl')
+        _write_csv(csv_source, rows)
+        stats = rescore(csv_source, out, workers=1, chunk_size=8)
+        assert stats['rows'] == 20 and stats['errors'] == len(bad)
+        for result in _read(out):
+            if result['offset'] in bad:
+                assert result['decision'] == 'error' and bad[result['offset']] in result['error']
+            else:
+                assert result['decision'] != 'error'
+
+        jsonl_source = os.path.join(tmp, 'apps.jsonl')
+        with open(jsonl_source, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(rows[0]) + '\n{"phone": "98765\n' + json.dumps(rows[1]) + '\n')
+        stats = rescore(jsonl_source, out, workers=1)
+        results = _read(out)
+        assert stats['errors'] == 1 and [r['decision'] == 'error' for r in results] == [False, True, False]
+        assert 'invalid JSON' in results[1]['error']
+    print(f"✅ PASS: {len(bad)} bad CSV rows and a broken JSONL line reported as errors")
+
+
+if __name__ == '__main__':
+    test_ordered_and_matching()
+    test_resume_after_interruption()
+    test_start_offset_and_jsonl()
+    test_bad_rows_reported()
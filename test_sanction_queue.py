@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test background sanction-letter rendering.
+Verifies:
+1. submit() returns while the letter is still queued; wait() delivers the PDF
+2. Paths are content-addressed: same name with different amounts, or with
+   the same amount and different phones, never collide; the same letter is
+   rendered once, and finished letters are
+   found on disk after the in-memory jobs are forgotten
+3. Failures are reported through status() and can be resubmitted
+4. run_pipeline returns the decision with a job id instead of waiting for the PDF
+"""
+
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import sanction_queue
+from orchestration import run_pipeline
+from sanction_queue import SANCTION_WORKERS, SanctionLetters
+
+
+def _block_workers():
+    """Occupy every worker so newly submitted letters stay queued."""
+    release = threading.Event()
+    started = [threading.Event() for _ in range(SANCTION_WORKERS)]
+    for event in started:
+        sanction_queue._EXECUTOR.submit(lambda e=event: (e.set(), release.wait(10)))
+    for event in started:
+        event.wait(5)
+    return release
+
+
+def test_submit_returns_before_render():
+    SanctionLetters.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        release = _block_workers()
+        job = SanctionLetters.submit("Amit Kumar", 500000, phone="9876543210", output_dir=Path(tmp))
+        assert job['status'] == 'queued'
+        assert not os.path.exists(job['path'])
+        assert SanctionLetters.status(job['job_id'])['status'] == 'queued'
+        assert SanctionLetters.stats()['pending'] == 1
+
+        release.set()
+        done = SanctionLetters.wait(job['job_id'], timeout=10)
+        assert done['status'] == 'ready' and done['render_ms'] is not None
+        with open(done['path'], 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+        assert SanctionLetters.stats() == {'pending': 0, 'rendered': 1, 'reused': 0, 'failed': 0}
+    print(f"✅ PASS: Submitted while workers were busy; rendered in {done['render_ms']}ms once free")
+
+
+def test_content_addressed_paths():
+    SanctionLetters.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        release = _block_workers()
+        first = SanctionLetters.submit("Neha Singh", 500000, output_dir=out)
+        again = SanctionLetters.submit("Neha Singh", 500000, output_dir=out)
+        other = SanctionLetters.submit("Neha Singh", 750000, output_dir=out)
+        namesake = SanctionLetters.submit("Neha Singh", 500000, phone="9123456780", output_dir=out)
+        assert first['job_id'] == again['job_id'] and first['path'] == again['path']
+        assert len({first['path'], other['path'], namesake['path']}) == 3
+        release.set()
+        for job in (first, other, namesake):
+            assert SanctionLetters.wait(job['job_id'], timeout=10)['status'] == 'ready'
+        assert SanctionLetters.stats()['rendered'] == 3
+        assert sorted(os.listdir(tmp)) == sorted(os.path.basename(j['path']) for j in (first, other, namesake))
+
+        # Already on disk: ready at once, nothing rendered
+        assert SanctionLetters.submit("Neha Singh", 500000, output_dir=out)['status'] == 'ready'
+        assert SanctionLetters.stats()['reused'] == 1
+
+        # Forgotten jobs are still answered from the file
+        SanctionLetters.reset()
+        assert SanctionLetters.status(first['job_id'], out)['path'] == first['path']
+        assert SanctionLetters.status('0' * 24, out)['status'] == 'unknown'
+    print("✅ PASS: One file per distinct letter, duplicate submits share a render")
+
+
+def test_failure_reported_and_retried():
+    SanctionLetters.reset()
+    with tempfile.TemporaryDirectory() as tmp:
+        blocker = Path(tmp) / 'not_a_dir'
+        blocker.write_text('')
+        job = SanctionLetters.submit("Ravi Sharma", 300000, output_dir=blocker)
+        failed = SanctionLetters.wait(job['job_id'], timeout=10, output_dir=blocker)
+        assert failed['status'] == 'failed' and failed['error']
+        assert SanctionLetters.stats()['failed'] == 1
+
+        blocker.unlink()
+        retried = SanctionLetters.submit("Ravi Sharma", 300000, output_dir=blocker)
+        assert retried['status'] in ('queued', 'rendering')
+        assert SanctionLetters.wait(job['job_id'], timeout=10)['status'] == 'ready'
+    print("✅ PASS: Failed render reported, resubmission succeeds")
+
+
+def test_run_pipeline_queues_letter():
+    SanctionLetters.reset()
+    saved = sanction_queue.SANCTION_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        sanction_queue.SANCTION_DIR = Path(tmp)
+        try:
+            release = _block_workers()
+            result = run_pipeline("Amit Kumar", "9876543210", 500000, None, None, 11.0, 5)
+            assert result['decision'] == 'Approved'
+            assert result['sanction_status'] == 'queued'
+            assert result['sanction_path'] == os.path.join(tmp, result['sanction_file'])
+            release.set()
+            assert SanctionLetters.wait(result['sanction_job'], timeout=10)['status'] == 'ready'
+            assert os.path.exists(result['sanction_path'])
+        finally:
+            sanction_queue.SANCTION_DIR = saved
+    print("✅ PASS: run_pipeline returned the decision with the letter still queued")
+
+
+if __name__ == '__main__':
+    test_submit_returns_before_render()
+    test_content_addressed_paths()
+    test_failure_reported_and_retried()
+    test_run_pipeline_queues_letter()
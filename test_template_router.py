@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the deterministic template fast path.
+Verifies:
+1. Scripted stages (profile found, fast-track with EMI, salary slip) skip the LLM;
+   EMIs use the customer's stated tenure
+2. Replies follow the detected language
+3. Free-form questions still go to the LLM
+4. The fraction of template-served turns is reported
+5. A tenure that is not offered is asked again, and the answer gets the verdict
+"""
+
+from master_agent import run_unified_agent
+from session_manager import WELCOME_MESSAGE
+from template_router import TemplateRouter
+
+VERIFIED_STATE = {
+    'phone': '9876543210', 'verified': True, 'customer_name': 'Amit Kumar',
+    'credit_score': 780, 'income': 65000, 'pre_approved_limit': 1200000
+}
+
+
+def test_profile_found_template():
+    extracted = {k: v for k, v in VERIFIED_STATE.items()}
+    reply = TemplateRouter.route("My number is 9876543210", 'phone_asked', extracted, {}, 'english')
+    assert reply and 'Amit Kumar' in reply and '1,200,000' in reply
+    print("✅ PASS: Profile found served from template")
+
+
+def test_fast_track_and_conditional():
+    fast = TemplateRouter.route("5 lakh", 'amount_asked', {'requested_amount': 500000}, VERIFIED_STATE, 'hinglish')
+    assert fast and 'APPROVED' in fast and 'EMI' in fast and '10,871' in fast
+
+    # A stated tenure replaces the 60-month default
+    three_years = TemplateRouter.route("5 lakh for 3 years", 'amount_asked',
+                                       {'requested_amount': 500000, 'tenure_months': 36}, VERIFIED_STATE, 'english')
+    assert '16,369' in three_years and '36 months' in three_years
+
+    slip = TemplateRouter.route("15 lakh", 'amount_asked', {'requested_amount': 1500000}, VERIFIED_STATE, 'english')
+    assert slip and 'Salary Slip' in slip
+    print("✅ PASS: Eligibility verdicts served from templates")
+
+
+def test_out_of_range_tenure_asked_again():
+    state = dict(VERIFIED_STATE, conversation_stage='amount_asked')
+    history = [{'role': 'assistant', 'content': WELCOME_MESSAGE},
+               {'role': 'user', 'content': "5 lakh for 10 years"}]
+    result = run_unified_agent("5 lakh for 10 years", state, history)
+    assert result['served_by'] == 'template' and '120 months' in result['message']
+    assert '12 to 60 months' in result['message'] and not result.get('tenure_months')
+
+    state.update(requested_amount=result['requested_amount'], conversation_stage=result['conversation_stage'])
+    history += [{'role': 'assistant', 'content': result['message']}, {'role': 'user', 'content': "ok 3 years then"}]
+    answer = run_unified_agent("ok 3 years then", state, history)
+    assert answer['served_by'] == 'template' and answer['tenure_months'] == 36
+    assert 'APPROVED' in answer['message'] and '36 months' in answer['message']
+
+    hindi = TemplateRouter.route("10 साल", 'amount_asked', {'tenure_out_of_range': 120}, VERIFIED_STATE, 'hindi')
+    assert '120 महीने' in hindi
+    print("✅ PASS: Out-of-range tenure asked again, then quoted")
+
+
+def test_phone_prompts_and_free_form():
+    assert 'mobile number' in TemplateRouter.route("I need a loan", 'phone_asked', {}, {}, 'english')
+    assert 'नंबर' in TemplateRouter.route("मुझे लोन चाहिए", 'phone_asked', {}, {}, 'hindi')
+    assert 'valid 10-digit' in TemplateRouter.route("it is 98765432", 'phone_asked', {}, {}, 'english')
+    assert 'record' in TemplateRouter.route("1234567890", 'phone_asked', {}, {}, 'english')
+    assert TemplateRouter.route("What is the interest rate?", 'phone_asked', {}, {}, 'english') is None
+    assert TemplateRouter.route("Can I prepay later?", 'approved', {}, VERIFIED_STATE, 'english') is None
+    print("✅ PASS: Phone prompts templated, free-form left to LLM")
+
+
+def test_fast_path_fraction():
+    TemplateRouter.reset_stats()
+    for served_by_template in (True, True, True, False):
+        TemplateRouter.record_turn(served_by_template)
+    TemplateRouter.record_turn(False, llm_failed=True)
+    stats = TemplateRouter.stats()
+    print(f"Fast-path stats: {stats}")
+    assert stats['template_fraction'] == 0.6 and stats['llm_turns'] == 1
+    assert stats['llm_failed_turns'] == 1
+    print("✅ PASS: Template fraction reported")
+
+
+if __name__ == '__main__':
+    test_profile_found_template()
+    test_fast_track_and_conditional()
+    test_out_of_range_tenure_asked_again()
+    test_phone_prompts_and_free_form()
+    test_fast_path_fraction()
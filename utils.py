@@ -1,6 +1,9 @@
 import math
+import re
 from langdetect import detect_langs
 
+from policy_engine import decide
+
 LANG_MAP = {
     'en': 'en',
     'hi': 'hi',
@@ -28,15 +31,20 @@ def compute_foir(monthly_income: float, existing_emis_total: float, new_emi: flo
 
 
 def eligibility_band(foir_percent: float, credit_score: int = None):
-    # If credit score exists and is below threshold
-    if credit_score is not None and credit_score < 650:
-        return 'High Risk (credit score under threshold)'
-    
-    if foir_percent <= 40:
-        return 'Likely Eligible'
-    if foir_percent <= 50:
-        return 'Borderline'
-    return 'Likely Ineligible'
+    # Score gate and FOIR bands: policy table 'foir_band'
+    return decide('foir_band', foir=foir_percent, credit_score=credit_score)['band']
+
+
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    # Provider-neutral approximation: ~4 characters per token for English,
+    # but never fewer than one token per word/punctuation mark (Devanagari
+    # and emoji tokenise much more densely than English).
+    if not text:
+        return 0
+    return max(len(text) // 4, len(_TOKEN_PATTERN.findall(text)))
 
 
 def detect_language(text: str, fallback='en') -> str:
@@ -1,5 +1,8 @@
 # xai_helper.py - Explainability text generation for decision rationale
 
+from policy_engine import get_policy
+
+
 def explain_decision(decision: str, reason: str, context: dict) -> str:
     """
     Generate human-readable explanation for loan decision.
@@ -18,12 +21,15 @@ def explain_decision(decision: str, reason: str, context: dict) -> str:
     amount = context.get('requested_amount')
     limit = context.get('pre_approved_limit', 0)
     fraud_status = context.get('fraud_status', 'Unknown')
+    thresholds = get_policy().thresholds
+    min_score, good_score, prime_score = thresholds['min_score'], thresholds['good_score'], thresholds['prime_score']
+    limit_multiple = thresholds['conditional_limit_multiple']
     
     if decision == "Approved":
         text = f"✅ **Approved**: Your loan of INR {amount:,.0f} has been approved."
         if limit:
             text += f"\n- Amount is within your pre-approved limit of INR {limit:,.0f}."
-        if credit_score and credit_score >= 750:
+        if credit_score and credit_score >= prime_score:
             text += f"\n- Excellent credit score ({credit_score}) qualifies you for our best rates."
         if fraud_status == "Clear":
             text += "\n- Fraud screening: Clear."
@@ -33,7 +39,7 @@ def explain_decision(decision: str, reason: str, context: dict) -> str:
         text = f"⚠️ **Conditional Approval**: Your request for INR {amount:,.0f} requires verification."
         if amount and limit and amount > limit:
             text += f"\n- Amount exceeds pre-approved limit (INR {limit:,.0f}), but your profile is strong."
-        if credit_score and 700 <= credit_score < 750:
+        if credit_score and good_score <= credit_score < prime_score:
             text += f"\n- Credit score ({credit_score}) is good; salary verification needed."
         if income:
             text += f"\n- Declared income: INR {income:,.0f}/month. Please upload latest salary slip to confirm."
@@ -41,10 +47,10 @@ def explain_decision(decision: str, reason: str, context: dict) -> str:
     
     elif decision == "Rejected":
         text = f"❌ **Rejected**: We cannot approve your request at this time."
-        if credit_score and credit_score < 650:
-            text += f"\n- Credit score ({credit_score}) is below minimum threshold (650)."
-        if amount and limit and amount > (2 * limit):
-            text += f"\n- Requested amount (INR {amount:,.0f}) exceeds 2x pre-approved limit (INR {limit:,.0f})."
+        if credit_score and credit_score < min_score:
+            text += f"\n- Credit score ({credit_score}) is below minimum threshold ({min_score})."
+        if amount and limit and amount > (limit_multiple * limit):
+            text += f"\n- Requested amount (INR {amount:,.0f}) exceeds {limit_multiple}x pre-approved limit (INR {limit:,.0f})."
         if fraud_status == "Blacklisted":
             text += "\n- Account flagged for fraud concerns. Please contact support."
         return text